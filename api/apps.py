@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        import pandas as pd
+        # Copy-on-Write: las vistas que entrega el registro de datasets
+        # (api/store.py) comparten buffers con el DataFrame guardado, pero
+        # cualquier escritura sobre ellas copia en lugar de mutarlo. Se activa
+        # al arrancar la app y no al importar un módulo suelto.
+        pd.set_option("mode.copy_on_write", True)
+
+        from . import metrics
+        # los volcados de métricas de una corrida anterior del servidor no
+        # deben sumarse a los de ésta (api/metrics.py)
+        metrics.clear_stale()
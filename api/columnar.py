@@ -0,0 +1,118 @@
+# api/columnar.py
+"""
+Cache columnar de DATASET_PATH: la primera vez que se ve un archivo se
+parsea y se guarda como Arrow IPC (sin compresión) en COLUMNAR_CACHE_DIR;
+las cargas siguientes lo abren con memory-map. Así un worker nuevo no vuelve
+a parsear el CSV y las columnas numéricas sin nulos quedan como vistas sobre
+el mapeo (las páginas las comparte el page cache entre procesos).
+Se usa Arrow IPC y no Parquet porque Parquet siempre se decodifica a memoria
+propia; IPC sin compresión se puede mapear tal cual.
+La clave es (ruta, tamaño, mtime, variante): si el archivo cambia, el sidecar
+viejo se reemplaza. La variante distingue lecturas con opciones distintas
+(p. ej. con o sin compactación de dtypes).
+"""
+import hashlib, logging, os
+
+import pyarrow as pa
+import pandas as pd
+
+from .metrics import cache_event
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_EXT = ".arrow"
+IPC_BATCH_ROWS = 250_000     # filas por record batch al escribir
+_ARROW_TYPES = {pa.large_string(): pd.StringDtype("pyarrow")}
+
+
+def sidecar_path(cache_dir: str, path: str, st: os.stat_result, variant: str = "") -> str:
+    """<hash de la ruta>-<tamaño>-<mtime_ns>[-variante].arrow dentro de cache_dir."""
+    key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+    suffix = f"-{variant}" if variant else ""
+    return os.path.join(cache_dir, f"{key}-{st.st_size}-{st.st_mtime_ns}{suffix}{SIDECAR_EXT}")
+
+
+def table_to_pandas(table: pa.Table) -> pd.DataFrame:
+    """
+    DataFrame de una tabla Arrow sin consolidar columnas (split_blocks: no
+    obliga a copiar); las columnas string[pyarrow] (large_string en Arrow)
+    vuelven como string[pyarrow] y quedan sobre los buffers de la tabla.
+    """
+    return table.to_pandas(split_blocks=True, types_mapper=_ARROW_TYPES.get)
+
+
+def read_ipc(path: str) -> pd.DataFrame:
+    """Abre un archivo Arrow IPC con memory-map (sin copiar lo que Arrow pueda compartir)."""
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table_to_pandas(table)
+
+
+def write_ipc(path: str, df: pd.DataFrame, batch_rows: int = IPC_BATCH_ROWS) -> bool:
+    """
+    Escribe df como Arrow IPC de forma atómica (tmp + rename), por lotes de
+    filas: la copia en formato Arrow nunca pasa de un lote a la vez.
+    False si el DataFrame no se puede pasar a Arrow (p. ej. object con tipos
+    mezclados, nombres de columna repetidos o que no son texto).
+    """
+    try:
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, KeyError, ValueError) as e:
+        logger.warning("No se puede guardar %s como Arrow: %s", path, e)
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for start in range(0, max(len(df), 1), batch_rows):
+                batch = df.iloc[start:start + batch_rows]
+                writer.write_table(pa.Table.from_pandas(batch, schema=schema, preserve_index=False))
+    except (pa.ArrowInvalid, pa.ArrowTypeError, KeyError, ValueError) as e:
+        logger.warning("No se puede guardar %s como Arrow: %s", path, e)
+        os.remove(tmp)
+        return False
+    os.replace(tmp, path)
+    return True
+
+
+def write_sidecar(sidecar: str, df: pd.DataFrame) -> bool:
+    """Escribe el sidecar y borra los de versiones anteriores del mismo archivo."""
+    if not write_ipc(sidecar, df):
+        return False
+    cache_dir = os.path.dirname(sidecar)
+    prefix = os.path.basename(sidecar).split("-", 1)[0] + "-"
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and name.endswith(SIDECAR_EXT) and name != os.path.basename(sidecar):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+    return True
+
+
+def load_columnar(path: str, cache_dir: str, reader, variant: str = "") -> pd.DataFrame:
+    """
+    DataFrame de `path` desde su sidecar si existe; si no, lo lee con
+    `reader(path)` y deja el sidecar escrito para la próxima carga.
+    """
+    st = os.stat(path)
+    sidecar = sidecar_path(cache_dir, path, st, variant)
+    if os.path.exists(sidecar):
+        try:
+            df = read_ipc(sidecar)
+            cache_event("columnar", True)
+            return df
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning("Sidecar ilegible %s, se vuelve a parsear: %s", sidecar, e)
+    cache_event("columnar", False)
+
+    df = reader(path)
+    if sidecar_path(cache_dir, path, os.stat(path), variant) != sidecar:
+        return df   # el archivo cambió mientras se leía
+    try:
+        if write_sidecar(sidecar, df):
+            # todos los workers quedan leyendo del mismo mapeo (y con los mismos dtypes)
+            return read_ipc(sidecar)
+    except OSError as e:
+        logger.warning("No se pudo escribir el sidecar %s: %s", sidecar, e)
+    return df
@@ -0,0 +1,125 @@
+# api/compaction.py
+"""
+Compactación de dtypes de un DataFrame ya cargado:
+- enteros al menor tamaño que los contiene; floats a float32 sólo si no
+  pierden precisión;
+- texto de baja cardinalidad → category (también las columnas sí/no: un
+  byte por fila como bool, pero conservando las etiquetas originales que
+  muestran los gráficos); de alta cardinalidad → strings respaldados por
+  Arrow (un buffer contiguo en vez de un objeto por celda).
+memory_report() compara el uso actual con lo que ocuparían los dtypes por
+defecto de pandas (int64/float64/object), estimado a partir de los datos.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+CATEGORY_MAX_UNIQUE = 1_000      # strings con más valores distintos no van a category
+ARROW_STRING = pd.StringDtype("pyarrow")
+
+_OBJ_POINTER = 8                        # puntero por celda en una columna object
+_NAN_OBJ = sys.getsizeof(float("nan"))  # NaN como objeto Python
+_STR_HEADER = sys.getsizeof("")         # cabecera de un str ASCII
+
+
+def downcast_numeric(s: pd.Series) -> pd.Series:
+    """Enteros al menor tamaño; floats a float32 sólo si el round-trip es exacto."""
+    kind = s.dtype.kind
+    if kind in "iu" and isinstance(s.dtype, np.dtype):
+        return pd.to_numeric(s, downcast="integer" if kind == "i" else "unsigned")
+    if kind == "f" and s.dtype != np.float32 and isinstance(s.dtype, np.dtype):
+        f32 = s.astype(np.float32)
+        if np.array_equal(f32.to_numpy(dtype=np.float64), s.to_numpy(), equal_nan=True):
+            return f32
+    return s
+
+
+def compact_series(s: pd.Series) -> pd.Series:
+    kind = s.dtype.kind
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    if kind in "iuf":
+        return downcast_numeric(s)
+    if kind != "O" or s.dtype == ARROW_STRING:
+        return s
+
+    values = s.dropna().unique()
+    if pd.api.types.infer_dtype(values, skipna=True) != "string":
+        return s   # object con tipos mezclados: se deja igual
+    if len(values) <= CATEGORY_MAX_UNIQUE:
+        return s.astype("category")
+    return s.astype(ARROW_STRING)
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Devuelve df con cada columna en el dtype más chico que conserva los valores."""
+    out = {col: compact_series(df[col]) for col in df.columns}
+    return pd.DataFrame(out, index=df.index, copy=False)
+
+
+# ---------- reporte ----------
+def _text_nbytes(s: pd.Series) -> int:
+    """Tamaño como columna object de str (punteros + objetos), estimado sin materializarla."""
+    n, nulls = len(s), int(s.isna().sum())
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        counts = np.bincount(s.cat.codes.to_numpy()[s.cat.codes.to_numpy() >= 0],
+                             minlength=len(s.cat.categories))
+        sizes = np.array([sys.getsizeof(str(c)) for c in s.cat.categories], dtype=np.int64)
+        payload = int(counts @ sizes) if counts.size else 0
+    elif s.dtype == ARROW_STRING:
+        arr = pa.chunked_array(s.array._pa_array) if hasattr(s.array, "_pa_array") else pa.array(s)
+        payload = int(pc.sum(pc.binary_length(arr)).as_py() or 0) + (n - nulls) * _STR_HEADER
+    else:
+        return int(s.memory_usage(index=False, deep=True))
+    return n * _OBJ_POINTER + payload + nulls * _NAN_OBJ
+
+
+def _baseline(s: pd.Series) -> tuple[str, int]:
+    """(dtype por defecto de pandas, bytes estimados) para la columna."""
+    n = len(s)
+    kind = s.dtype.kind
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        if s.cat.categories.dtype.kind in "iuf":
+            return "float64" if s.isna().any() else "int64", 8 * n
+        return "object", _text_nbytes(s)
+    if kind in "iu":
+        return "int64", 8 * n
+    if kind == "f":
+        return "float64", 8 * n
+    if kind == "b":
+        # bool con nulos: pandas lo deja como object
+        if s.isna().any():
+            return "object", n * _OBJ_POINTER
+        return "bool", n
+    if kind == "O":
+        return "object", _text_nbytes(s)
+    return str(s.dtype), int(s.memory_usage(index=False, deep=True))
+
+
+def memory_report(df: pd.DataFrame) -> dict:
+    """Bytes por columna: actuales vs. dtypes por defecto de pandas (estimado)."""
+    columns = []
+    for col in df.columns:
+        s = df[col]
+        base_dtype, base_bytes = _baseline(s)
+        now = int(s.memory_usage(index=False, deep=True))
+        columns.append({
+            "column": str(col),
+            "dtype": str(s.dtype),
+            "bytes": now,
+            "baseline_dtype": base_dtype,
+            "baseline_bytes": base_bytes,
+            "ratio": round(base_bytes / now, 2) if now else None,
+        })
+    total = sum(c["bytes"] for c in columns)
+    baseline = sum(c["baseline_bytes"] for c in columns)
+    return {
+        "rows": int(len(df)),
+        "bytes": total,
+        "baseline_bytes": baseline,
+        "ratio": round(baseline / total, 2) if total else None,
+        "columns": sorted(columns, key=lambda c: c["baseline_bytes"] - c["bytes"], reverse=True),
+    }
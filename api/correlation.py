@@ -0,0 +1,68 @@
+# api/correlation.py
+"""
+Matriz de correlación (Pearson o Spearman) para muchas columnas numéricas.
+- Selección de las `max` columnas más informativas según el perfil (varianza
+  o cantidad de valores no nulos); las constantes se descartan.
+- Los NaN se tratan por pares (como DataFrame.corr) sin bucles en Python: con
+  X centrada y rellenada con 0 y la máscara de válidos M, todas las sumas por
+  par salen de un único producto G = Wᵀ·W con W = [X | X² | M] en float32.
+- Spearman es Pearson sobre los rangos de cada columna (rangos promedio
+  calculados una vez por columna sobre todos sus valores no nulos; con NaN
+  puede diferir levemente del re-rankeo por par de pandas).
+"""
+import numpy as np
+import pandas as pd
+
+CORR_MAX_COLUMNS = 1_000
+METHODS = ("pearson", "spearman")
+SELECT_BY = ("variance", "count")
+
+
+def select_columns(prof: dict, k: int, by: str = "variance") -> list:
+    """Top-k columnas numéricas no constantes del perfil, ordenadas por `by`."""
+    cols = [c for c in prof["columns"] if c["numeric"] and c["std"]]
+    if by == "count":
+        cols.sort(key=lambda c: c["count"], reverse=True)
+    else:
+        cols.sort(key=lambda c: c["std"], reverse=True)
+    return [c["column"] for c in cols[:k]]
+
+
+def _pairwise_pearson(X: np.ndarray) -> np.ndarray:
+    """Pearson por pares completos de una matriz (filas x columnas) con NaN."""
+    X = X.astype(np.float32, copy=False)
+    mask = ~np.isnan(X)
+    k = X.shape[1]
+    if mask.all():
+        Z = X - X.mean(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            Z /= np.sqrt((Z * Z).sum(axis=0))
+        R = (Z.T @ Z).astype(np.float64)
+    else:
+        # centrar mejora la precisión en float32; la fórmula por pares no depende del centro
+        Xc = np.where(mask, X - np.nanmean(X, axis=0), np.float32(0))
+        M = mask.astype(np.float32)
+        W = np.concatenate([Xc, Xc * Xc, M], axis=1)
+        G = (W.T @ W).astype(np.float64)
+        sxy = G[:k, :k]                  # Σ xi·xj   (filas con ambos válidos)
+        sx = G[:k, 2 * k:]               # Σ xi      (filas donde j es válido)
+        sxx = G[k:2 * k, 2 * k:]         # Σ xi²     (filas donde j es válido)
+        n = G[2 * k:, 2 * k:]            # filas con ambos válidos
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = sxy - sx * sx.T / n
+            var_i = sxx - sx * sx / n
+            R = cov / np.sqrt(var_i * var_i.T)
+        R[n < 2] = np.nan
+    np.clip(R, -1.0, 1.0, out=R)
+    np.fill_diagonal(R, 1.0)
+    return R
+
+
+def correlation_matrix(df: pd.DataFrame, columns: list, method: str = "pearson") -> np.ndarray:
+    """Matriz len(columns) x len(columns); NaN donde el par no tiene datos suficientes."""
+    if not columns:
+        return np.empty((0, 0))
+    sub = df[columns]
+    if method == "spearman":
+        sub = sub.rank(method="average")
+    return _pairwise_pearson(sub.to_numpy(dtype=np.float32, na_value=np.nan))
@@ -0,0 +1,98 @@
+# api/duplicates.py
+"""
+Detección de filas duplicadas por hash de fila.
+DataFrame.duplicated() arma tuplas con todas las columnas (muy lento en
+frames anchos de tipo object); aquí cada fila se reduce a un uint64 con
+pd.util.hash_pandas_object (vectorizado, por chunks y en paralelo) y se
+cuentan las colisiones con una tabla hash de uint64.
+Con 64 bits la probabilidad de un falso duplicado es despreciable (~n²/2⁶⁵).
+DuplicateCounter lleva el mismo conteo de forma incremental (por lotes de
+filas que llegan, sin volver a hashear las anteriores).
+"""
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+HASH_CHUNK_ROWS = 500_000
+
+
+def _hash_rows(df: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def row_hashes(df: pd.DataFrame, workers: int = 1,
+               chunk_rows: int = HASH_CHUNK_ROWS) -> np.ndarray:
+    """Hash uint64 por fila, calculado por chunks de filas (en paralelo si workers > 1)."""
+    if df.shape[1] == 0:
+        return np.zeros(len(df), dtype=np.uint64)
+    chunks = [df.iloc[i:i + chunk_rows] for i in range(0, len(df), chunk_rows)]
+    if not chunks:
+        return np.empty(0, dtype=np.uint64)
+    if workers <= 1 or len(chunks) == 1:
+        parts = [_hash_rows(c) for c in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_hash_rows, chunks))
+    return np.concatenate(parts)
+
+
+def count_duplicates(df: pd.DataFrame, workers: int = 1,
+                     chunk_rows: int = HASH_CHUNK_ROWS) -> int:
+    """Equivalente a int(df.duplicated().sum()) usando hashes de fila."""
+    if df.shape[1] == 0:
+        return 0
+    hashes = row_hashes(df, workers=workers, chunk_rows=chunk_rows)
+    return int(hashes.size - pd.unique(hashes).size)
+
+
+def value_hashes(df: pd.DataFrame, chunk_rows: int = HASH_CHUNK_ROWS) -> np.ndarray:
+    """
+    Hash por fila que depende sólo de los valores, no del dtype: las columnas
+    numéricas y booleanas se hashean como float64 (int8 5, int64 5 y 5.0 dan
+    lo mismo). Así los hashes de filas viejas siguen valiendo aunque un lote
+    nuevo ensanche el dtype de una columna.
+    """
+    def canonical(chunk: pd.DataFrame) -> pd.DataFrame:
+        cols = {}
+        for i in range(chunk.shape[1]):
+            s = chunk.iloc[:, i]
+            if s.dtype.kind in "iufb":
+                s = pd.Series(s.to_numpy(dtype=np.float64, na_value=np.nan), index=s.index)
+            cols[i] = s
+        return pd.DataFrame(cols, index=chunk.index, copy=False)
+
+    if df.shape[1] == 0:
+        return np.zeros(len(df), dtype=np.uint64)
+    parts = [_hash_rows(canonical(df.iloc[i:i + chunk_rows]))
+             for i in range(0, len(df), chunk_rows)]
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.uint64)
+
+
+class DuplicateCounter:
+    """
+    Conteo incremental de filas duplicadas a partir de hashes de fila.
+    Los hashes ya vistos se guardan en segmentos ordenados y disjuntos cuyo
+    tamaño crece geométricamente (como un LSM): cada lote nuevo se busca con
+    searchsorted en O(lote · log n) y se fusiona sólo con los segmentos chicos.
+    """
+
+    def __init__(self):
+        self.segments: list[np.ndarray] = []
+        self.rows = 0
+        self.duplicates = 0
+
+    def update(self, hashes: np.ndarray) -> None:
+        self.rows += int(hashes.size)
+        uniq = np.unique(hashes)
+        self.duplicates += int(hashes.size - uniq.size)
+        seen = np.zeros(uniq.size, dtype=bool)
+        for seg in self.segments:
+            pos = np.minimum(np.searchsorted(seg, uniq), seg.size - 1)
+            seen |= seg[pos] == uniq
+        self.duplicates += int(seen.sum())
+        fresh = uniq[~seen]
+        if fresh.size:
+            self.segments.append(fresh)
+        while len(self.segments) > 1 and self.segments[-2].size <= 2 * self.segments[-1].size:
+            last = self.segments.pop()
+            self.segments[-1] = np.sort(np.concatenate([self.segments[-1], last]))
@@ -0,0 +1,104 @@
+# api/histindex.py
+"""
+Índice por columna para /api/distribution/: los valores no nulos de una
+columna numérica, ordenados, construido una vez por versión del dataset
+(snapshot.memo). Con eso cualquier `bins` se responde con searchsorted sobre
+los bordes en O(bins · log n), con los mismos conteos que np.histogram y
+sin volver a recorrer ni convertir la columna.
+Las categóricas no necesitan índice propio: el perfil ya guarda sus conteos
+exactos (top TOP_VALUES) una vez por versión.
+El mismo índice da los cuartiles y los outliers de /api/boxplot/: los
+outliers son un prefijo y un sufijo del array ordenado, así que se
+muestrean o paginan sin recorrer la columna.
+"""
+import numpy as np
+import pandas as pd
+
+
+def sorted_values(s: pd.Series) -> np.ndarray:
+    """Valores no nulos de la columna como float64 ordenado."""
+    values = s.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[~np.isnan(values)]
+    values.sort()
+    return values
+
+
+def histogram(values: np.ndarray, bins: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (bordes, conteos) igual que np.histogram(values, bins) para `values`
+    ordenado: bins [a, b) salvo el último, cerrado. Los ±inf (en las puntas)
+    quedan fuera: el rango es el de los valores finitos.
+    """
+    a = int(np.searchsorted(values, -np.inf, side="right"))
+    b = int(np.searchsorted(values, np.inf, side="left"))
+    values = values[a:b]
+    if not values.size:
+        lo, hi = 0.0, 1.0
+    else:
+        lo, hi = float(values[0]), float(values[-1])
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5    # mismo rango que usa np.histogram
+    edges = np.linspace(lo, hi, bins + 1)
+    starts = np.searchsorted(values, edges[:-1], side="left")
+    counts = np.diff(np.append(starts, values.size))
+    return edges, counts
+
+
+# ---------- boxplot ----------
+def box_stats(values: np.ndarray, quantiles=(0.25, 0.5, 0.75)) -> dict:
+    """
+    Cuartiles, cercas de Tukey y whiskers desde los valores ordenados.
+    lo/hi delimitan lo que no es outlier: outliers = values[:lo] + values[hi:].
+    Los cuartiles salen de los valores finitos; los ±inf son siempre outliers.
+    """
+    n = int(values.size)
+    finite = values[np.searchsorted(values, -np.inf, side="right"):
+                    np.searchsorted(values, np.inf, side="left")]
+    if not finite.size:
+        return {"q1": None, "median": None, "q3": None,
+                "lower_fence": None, "upper_fence": None,
+                "whisker_min": None, "whisker_max": None,
+                "lo": n, "hi": n, "outliers": n}
+    q1, median, q3 = (float(q) for q in np.quantile(finite, quantiles))
+    iqr = q3 - q1
+    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    lo = int(np.searchsorted(values, lower, side="left"))
+    hi = int(np.searchsorted(values, upper, side="right"))
+    return {
+        "q1": q1, "median": median, "q3": q3,
+        "lower_fence": float(lower), "upper_fence": float(upper),
+        "whisker_min": float(values[lo]) if hi > lo else float(finite[0]),
+        "whisker_max": float(values[hi - 1]) if hi > lo else float(finite[-1]),
+        "lo": lo, "hi": hi, "outliers": lo + (n - hi),
+    }
+
+
+def outlier_sample(values: np.ndarray, lo: int, hi: int, k: int) -> np.ndarray:
+    """
+    Hasta k outliers repartidos entre la cola baja y la alta según su tamaño,
+    equiespaciados dentro de cada cola (incluye siempre los extremos).
+    """
+    low, high = values[:lo], values[hi:]
+    total = low.size + high.size
+    if total <= k:
+        return np.concatenate([low, high])
+    k_low = int(round(k * low.size / total))
+    if low.size and not k_low:
+        k_low = 1
+    if high.size and k_low == k:
+        k_low -= 1
+    k_high = k - k_low
+
+    def spread(tail, m):
+        if not m or not tail.size:
+            return tail[:0]
+        return tail[np.unique(np.linspace(0, tail.size - 1, m).round().astype(np.intp))]
+    return np.concatenate([spread(low, k_low), spread(high, k_high)])
+
+
+def outlier_page(values: np.ndarray, lo: int, hi: int, start: int, limit: int) -> np.ndarray:
+    """Outliers [start, start + limit) en orden (cola baja y después cola alta)."""
+    stop = start + limit
+    low = values[min(start, lo):min(stop, lo)]
+    high = values[hi + max(start - lo, 0):hi + max(stop - lo, 0)]
+    return np.concatenate([low, high])
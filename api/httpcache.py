@@ -0,0 +1,151 @@
+# api/httpcache.py
+"""
+Cache HTTP de los endpoints /api/*:
+- ETag fuerte = hash(fingerprint del dataset + ruta + query normalizada + Accept).
+  El fingerprint (utils.dataset_fingerprint) no toca pandas: id + versión o
+  ruta + tamaño + mtime, así que un If-None-Match válido responde 304 sin
+  cargar ni recorrer el DataFrame.
+- Cache de respuestas ya renderizadas (bytes) en memoria, LRU con TTL y
+  límites de entradas y de bytes; la clave es el mismo ETag.
+Uso: @etag_cached encima de @api_view en las vistas de sólo lectura.
+"""
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+import hashlib, threading, time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+
+from .metrics import cache_event
+from .utils import dataset_fingerprint, request_dataset_id
+
+# cabeceras de la respuesta original que se guardan junto al cuerpo
+_KEPT_HEADERS = ("Content-Type", "X-Sampled", "Vary")
+
+
+class ResponseCache:
+    """LRU de respuestas (bytes + cabeceras) con TTL y presupuesto de bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()   # etag -> (expira, contenido, cabeceras)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    self._pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1], item[2]
+
+    def put(self, key: str, content: bytes, headers: dict) -> None:
+        if self.ttl <= 0 or len(content) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, content, headers)
+            self._bytes += len(content)
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._bytes > self.max_bytes):
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: str) -> None:
+        _, content, _ = self._entries.pop(key)
+        self._bytes -= len(content)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes,
+                    "ttl_s": self.ttl, "hits": self.hits, "misses": self.misses}
+
+
+RESPONSE_CACHE = ResponseCache(
+    max_entries=int(getattr(settings, "RESPONSE_CACHE_MAX_ENTRIES", 512)),
+    max_bytes=int(getattr(settings, "RESPONSE_CACHE_MAX_MB", 64)) * 1024 * 1024,
+    ttl=float(getattr(settings, "RESPONSE_CACHE_TTL_S", 300)),
+)
+
+
+def _normalized_query(request) -> str:
+    """Query string canónica: claves ordenadas, valores en orden de aparición."""
+    return urlencode(sorted((k, v) for k in request.GET for v in request.GET.getlist(k)))
+
+
+def compute_etag(request) -> str | None:
+    """ETag del request, o None si el dataset no existe (la vista decide el error)."""
+    fingerprint = dataset_fingerprint(request_dataset_id(request))
+    if fingerprint is None:
+        return None
+    # los defaults de settings cambian el resultado sin cambiar la query
+    defaults = (getattr(settings, "APPROX_STATS", False),
+                getattr(settings, "SAMPLE_DEFAULT_ROWS", 0),
+                getattr(settings, "DTYPE_COMPACTION", True))
+    raw = "\n".join([fingerprint, request.path, _normalized_query(request),
+                     request.META.get("HTTP_ACCEPT", ""), repr(defaults)])
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _finish(response, etag: str):
+    response["ETag"] = etag
+    # el navegador siempre revalida: la respuesta depende de la sesión
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def etag_cached(view):
+    """Decorador: 304 con If-None-Match, respuestas servidas desde RESPONSE_CACHE."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+        etag = compute_etag(request)
+        if etag is None:
+            return view(request, *args, **kwargs)
+
+        if _matches(request.META.get("HTTP_IF_NONE_MATCH", ""), etag):
+            cache_event("etag", True)
+            return _finish(HttpResponseNotModified(), etag)
+
+        cached = RESPONSE_CACHE.get(etag)
+        cache_event("response", cached is not None)
+        if cached is not None:
+            content, headers = cached
+            response = HttpResponse(content)
+            for k, v in headers.items():
+                response[k] = v
+            return _finish(response, etag)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if hasattr(response, "render") and not response.is_rendered:
+            response.render()
+        RESPONSE_CACHE.put(etag, response.content,
+                           {h: response[h] for h in _KEPT_HEADERS if response.has_header(h)})
+        return _finish(response, etag)
+
+    return wrapper
@@ -0,0 +1,234 @@
+# api/incremental.py
+"""
+Re-perfilado incremental de DATASET_PATH cuando es un CSV append-only
+(DATASET_INCREMENTAL en settings).
+AppendState recuerda hasta qué byte se parseó el archivo, además de las
+estadísticas mergeables de lo ya leído:
+- nulos, distintos (HLL), cuantiles/histograma (KLL) y top-k por columna,
+  en un ColumnSketch (api/sketches.py);
+- hashes de fila para los duplicados (DuplicateCounter).
+Cuando el archivo crece, sólo se parsea la cola nueva: sus filas se llevan a
+los dtypes del DataFrame ya cargado, se agregan a los sketches y al contador
+de duplicados, y el perfil aproximado se rearma desde los sketches en
+O(filas nuevas). Si el archivo no es una extensión del anterior (se achicó,
+cambió el encabezado o los últimos bytes leídos), refresh() devuelve None y
+el llamador hace la recarga completa.
+Las columnas con array numpy (y los códigos de las categóricas) viven en
+buffers con capacidad de sobra (GROWTH): la cola se escribe a continuación
+y el DataFrame nuevo es una vista de los primeros n elementos, así que cada
+append copia sólo las filas nuevas (amortizado). Los snapshots anteriores
+siguen viendo su prefijo, que nunca se reescribe. Las string[pyarrow] se
+encadenan como chunks de Arrow sin copiar; el resto se concatena.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib, logging, os
+
+import numpy as np
+import pandas as pd
+
+from .compaction import ARROW_STRING, downcast_numeric
+from .duplicates import DuplicateCounter, value_hashes
+from .ingest import read_csv_chunked, sniff_csv
+from .profiling import build_sketch_profile, resolve_workers, sketch_column
+
+logger = logging.getLogger(__name__)
+
+CHECK_BYTES = 4096          # bytes antes del offset que deben seguir iguales
+NEWLINE_SCAN_BYTES = 1 << 16
+GROWTH = 1.5                # capacidad de los buffers respecto de las filas al crecer
+# texto que una columna bool acepta en un lote nuevo
+BOOL_TOKENS = {"true": True, "false": False, "yes": True, "no": False,
+               "si": True, "sí": True}
+
+
+def _last_newline(path: str, size: int, floor: int) -> int:
+    """Posición justo después del último '\\n' en (floor, size], o floor si no hay."""
+    with open(path, "rb") as f:
+        pos = size
+        while pos > floor:
+            step = min(NEWLINE_SCAN_BYTES, pos - floor)
+            f.seek(pos - step)
+            block = f.read(step)
+            i = block.rfind(b"\n")
+            if i >= 0:
+                return pos - step + i + 1
+            pos -= step
+    return floor
+
+
+def _signature(path: str, offset: int) -> str:
+    """Hash de la primera línea y de los CHECK_BYTES anteriores a offset."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        h.update(f.readline())
+        f.seek(max(offset - CHECK_BYTES, 0))
+        h.update(f.read(min(offset, CHECK_BYTES)))
+    return h.hexdigest()
+
+
+def _widen(base: pd.Series, tail: pd.Series) -> tuple[pd.Series, pd.Series] | None:
+    """
+    (base, tail) con el mismo dtype; base sólo se convierte si el lote nuevo
+    no entra en su dtype (p. ej. int8 que recibe 1000, o int que recibe NaN).
+    None si no hay un dtype común razonable (el llamador recarga todo).
+    """
+    dtype = base.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        tail = tail.astype(object)
+        fresh = pd.Index(tail.dropna().unique()).difference(dtype.categories)
+        if len(fresh):
+            base = base.cat.add_categories(fresh)
+        return base, pd.Series(pd.Categorical(tail, categories=base.cat.categories),
+                               index=tail.index)
+    if dtype.kind == "b":
+        if tail.dtype.kind != "b":
+            mapped = tail.map(lambda v: BOOL_TOKENS.get(str(v).strip().lower()) if pd.notna(v) else v)
+            if mapped.notna().sum() != tail.notna().sum():
+                return None
+            tail = mapped
+        if tail.isna().any() or isinstance(dtype, pd.BooleanDtype):
+            return base.astype("boolean"), tail.astype("boolean")
+        return base, tail.astype(bool)
+    if dtype.kind in "iuf":
+        if tail.dtype.kind not in "iufb":
+            return None
+        # int8 + lote int16 → int16; int + lote con NaN → float; float32 sigue
+        # float32 si el lote entra sin perder precisión
+        common = np.result_type(dtype, downcast_numeric(tail).dtype)
+        if common != dtype:
+            base = base.astype(common)
+        return base, tail.astype(common)
+    if dtype == ARROW_STRING:
+        return base, tail.astype(ARROW_STRING)
+    return base, tail.astype(dtype)
+
+
+def _buffer_values(s: pd.Series) -> np.ndarray | None:
+    """Array numpy que respalda la columna (códigos si es categórica), o None."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy()
+    if isinstance(s.dtype, np.dtype):
+        return s.to_numpy()
+    return None
+
+
+def _from_buffer(values: np.ndarray, dtype) -> pd.Series:
+    if isinstance(dtype, pd.CategoricalDtype):
+        values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+    return pd.Series(values, copy=False)
+
+
+class AppendState:
+    """Offset + sketches + hashes de un CSV que sólo crece por el final."""
+
+    def __init__(self, path: str, df: pd.DataFrame, offset: int, workers: int | None = None):
+        self.path = path
+        self.offset = offset
+        self.signature = _signature(path, offset)
+        self.sep, encoding = sniff_csv(path)
+        # el BOM sólo está al principio del archivo
+        self.encoding = "utf-8" if encoding == "utf-8-sig" else encoding
+        self.workers = resolve_workers(workers)
+        self.df = df
+        # columna -> buffer cuyo prefijo [:len(df)] es la columna (se crea al primer append)
+        self._buffers = {}
+        self.numeric = {c: bool(df[c].dtype.kind in "iuf") for c in df.columns}
+        self.sketches = self._sketch(df)
+        self.dups = DuplicateCounter()
+        self.dups.update(value_hashes(df))
+
+    @classmethod
+    def open(cls, path: str, df: pd.DataFrame, size: int) -> "AppendState | None":
+        """Estado para un df que se leyó entero con el archivo en `size` bytes."""
+        if not size or _last_newline(path, size, size - 1) != size:
+            return None   # última línea a medio escribir: no se sabe dónde cortar
+        return cls(path, df, size)
+
+    def _sketch(self, df: pd.DataFrame) -> dict:
+        names = list(df.columns)
+        build = lambda c: sketch_column(df[c], self.numeric[c])
+        if self.workers <= 1 or len(names) < 2:
+            return {c: build(c) for c in names}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(zip(names, pool.map(build, names)))
+
+    def refresh(self) -> bool | None:
+        """
+        Parsea lo agregado desde el último offset. True si entraron filas,
+        False si lo nuevo es sólo una línea a medio escribir, None si el
+        archivo ya no es una extensión de lo leído.
+        """
+        size = os.path.getsize(self.path)
+        # mismo tamaño con otro mtime: reescritura (o touch), no un append
+        if size <= self.offset or _signature(self.path, self.offset) != self.signature:
+            return None
+        end = _last_newline(self.path, size, self.offset)
+        if end == self.offset:
+            return False
+        try:
+            # las columnas no numéricas se leen como texto: un lote con sólo
+            # "001", "002" no debe volverse int si el resto de la columna es texto
+            text = {c: str for c, numeric in self.numeric.items()
+                    if not numeric and self.df[c].dtype.kind != "b"}
+            tail = read_csv_chunked(self.path, sep=self.sep, encoding=self.encoding,
+                                    compact=False, start=self.offset, end=end,
+                                    names=list(self.df.columns), dtype=text)
+            if tail.shape[1] != self.df.shape[1]:
+                return None
+            merged = self._conform(tail)
+        except (ValueError, TypeError, UnicodeDecodeError) as e:
+            logger.info("Cola de %s no compatible, se recarga entero: %s", self.path, e)
+            return None
+        if merged is None:
+            return None
+        base, tail = merged
+
+        for col in tail.columns:
+            self.sketches[col].merge(sketch_column(tail[col], self.numeric[col]))
+        self.dups.update(value_hashes(tail))
+        self.df = self._append(base, tail)
+        self.offset = end
+        self.signature = _signature(self.path, end)
+        logger.info("DATASET_PATH %s: +%d filas (incremental)", self.path, len(tail))
+        return True
+
+    def _conform(self, tail: pd.DataFrame):
+        """(base, tail) con dtypes idénticos, o None si alguna columna no encaja."""
+        base_cols, tail_cols = {}, {}
+        for col in self.df.columns:
+            pair = _widen(self.df[col], tail[col])
+            if pair is None:
+                return None
+            base_cols[col], tail_cols[col] = pair
+        base = pd.DataFrame(base_cols, index=self.df.index, copy=False)
+        tail = pd.DataFrame(tail_cols, index=tail.index, copy=False)
+        return base, tail
+
+    def _append(self, base: pd.DataFrame, tail: pd.DataFrame) -> pd.DataFrame:
+        """base + tail escribiendo sólo la cola en los buffers (ver docstring del módulo)."""
+        n, k = len(base), len(tail)
+        cols = {}
+        for col in base.columns:
+            values = _buffer_values(tail[col])
+            if values is None:
+                # string[pyarrow] se encadena por chunks; nullable/object se copian
+                cols[col] = pd.concat([base[col], tail[col]], ignore_index=True)
+                continue
+            buf = self._buffers.get(col)
+            if buf is None or buf.dtype != values.dtype or len(buf) < n + k:
+                # primer append, dtype ensanchado por _widen o sin lugar: se re-aloja
+                grown = np.empty(max(int((n + k) * GROWTH), n + k), dtype=values.dtype)
+                grown[:n] = (buf[:n] if buf is not None and buf.dtype == values.dtype
+                             else _buffer_values(base[col]))
+                buf = self._buffers[col] = grown
+            buf[n:n + k] = values
+            cols[col] = _from_buffer(buf[:n + k], tail[col].dtype)
+        return pd.DataFrame(cols, index=pd.RangeIndex(n + k), copy=False)
+
+    def profile(self) -> dict:
+        """Perfil aproximado (mismo formato que build_approx_profile) desde los sketches."""
+        return build_sketch_profile(self.df, self.sketches, self.dups.duplicates)
+
+    def derived(self) -> dict:
+        """Derivados ya resueltos para el snapshot de esta versión."""
+        return {"dup_rows": self.dups.duplicates, "profile_approx": self.profile()}
@@ -0,0 +1,206 @@
+# api/ingest.py
+"""
+Ingesta de CSV por streaming:
+- detecta separador y codificación una sola vez sobre una muestra acotada;
+- parsea por chunks con el motor C (memoria acotada al tamaño del chunk);
+- compacta cada chunk al llegar (downcast numérico y strings de baja
+  cardinalidad → category);
+- mantiene un dtype por columna en todos los chunks: las columnas con texto
+  en una muestra inicial se leen como texto desde el principio, y si aun así
+  un chunk infiere texto donde otro infirió números, se vuelve a leer con
+  esas columnas como texto (nunca queda una columna mezcla de int y str);
+- reporta progreso (filas, bytes, filas/s) por logging o callback.
+"""
+import codecs, csv, io, logging, os, time
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .compaction import CATEGORY_MAX_UNIQUE, downcast_numeric
+
+logger = logging.getLogger(__name__)
+
+SNIFF_BYTES = 1 << 20            # muestra para detectar separador/codificación
+SCHEMA_ROWS = 10_000             # filas de la muestra que fija las columnas de texto
+CSV_CHUNK_ROWS = 250_000         # filas por chunk
+PROGRESS_EVERY_S = 2.0           # cada cuánto se loguea el progreso
+DELIMITERS = ",;\t|"
+
+
+def sniff_csv(path: str, sample_bytes: int = SNIFF_BYTES) -> tuple[str, str]:
+    """Devuelve (separador, codificación) leyendo sólo los primeros bytes."""
+    with open(path, "rb") as f:
+        raw = f.read(sample_bytes)
+
+    if raw.startswith(codecs.BOM_UTF8):
+        encoding = "utf-8-sig"
+    else:
+        try:
+            # final=False: tolera un carácter multibyte cortado al final de la muestra
+            codecs.getincrementaldecoder("utf-8")().decode(raw, final=False)
+            encoding = "utf-8"
+        except UnicodeDecodeError:
+            encoding = "latin-1"
+
+    text = raw.decode(encoding, errors="replace")
+    if len(raw) == sample_bytes and "\n" in text:
+        text = text[:text.rindex("\n")]   # descarta la última línea incompleta
+    try:
+        sep = csv.Sniffer().sniff(text, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        first = text.split("\n", 1)[0]
+        sep = max(DELIMITERS, key=first.count)
+    return sep, encoding
+
+
+def sniff_text_columns(path: str, sep: str, encoding: str,
+                       rows: int = SCHEMA_ROWS) -> dict:
+    """{columna: str} para las columnas que ya tienen texto en las primeras `rows` filas."""
+    sample = pd.read_csv(path, sep=sep, encoding=encoding, nrows=rows,
+                         on_bad_lines="skip", low_memory=False)
+    return {col: str for col in sample.columns if sample[col].dtype.kind == "O"}
+
+
+def _track_kinds(chunk: pd.DataFrame, seen: dict, conflicts: set) -> None:
+    """
+    Anota si cada columna se infirió como texto o como valor tipado; las que
+    cambian entre chunks van a `conflicts`. Un chunk donde la columna es toda
+    nula (float NaN) no cuenta.
+    """
+    for col in chunk.columns:
+        if col in conflicts:
+            continue
+        s = chunk[col]
+        kind = "text" if s.dtype.kind == "O" else "typed"
+        prev = seen.get(col)
+        if prev == kind:
+            continue
+        if s.dtype.kind == "f" and s.isna().all():
+            continue
+        if prev is None:
+            seen[col] = kind
+        else:
+            conflicts.add(col)
+
+
+def _downcast_chunk(chunk: pd.DataFrame, blocked: set) -> pd.DataFrame:
+    """
+    Compacta un chunk: enteros al menor tamaño, floats a float32 sólo si no
+    pierden precisión y strings de baja cardinalidad a category. `blocked`
+    acumula las columnas que ya superaron CATEGORY_MAX_UNIQUE en otro chunk.
+    """
+    out = {}
+    for col in chunk.columns:
+        s = chunk[col]
+        kind = s.dtype.kind
+        if kind in "iuf":
+            s = downcast_numeric(s)
+        elif kind == "O" and col not in blocked:
+            if s.nunique(dropna=True) <= CATEGORY_MAX_UNIQUE:
+                s = s.astype("category")
+            else:
+                blocked.add(col)
+        out[col] = s
+    return pd.DataFrame(out, index=chunk.index, copy=False)
+
+
+def _concat_chunks(parts: list[pd.DataFrame], blocked: set) -> pd.DataFrame:
+    """
+    Une los chunks columna por columna; las categorías se unen sin pasar por
+    object. Vacía `parts` y suelta los pedazos de cada columna apenas se
+    concatenan, así el pico de memoria es ~1x el resultado y no 2x.
+    """
+    if len(parts) == 1 and not blocked:
+        return parts.pop()
+    names = list(parts[0].columns)
+    pieces_by_col = {col: [p[col].copy(deep=False) for p in parts] for col in names}
+    parts.clear()
+    columns = {}
+    for col in names:
+        pieces = pieces_by_col.pop(col)
+        if col not in blocked and all(isinstance(s.dtype, pd.CategoricalDtype) for s in pieces):
+            columns[col] = pd.Series(union_categoricals(pieces), name=col)
+        else:
+            pieces = [s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s
+                      for s in pieces]
+            columns[col] = pd.concat(pieces, ignore_index=True)
+        del pieces
+    return pd.DataFrame(columns, copy=False)
+
+
+class _ByteRange(io.RawIOBase):
+    """Lectura de `f` sólo hasta el byte `end` (para parsear un tramo del archivo)."""
+
+    def __init__(self, f, end: int):
+        self._f, self._end = f, end
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), self._end - self._f.tell())
+        return self._f.readinto(memoryview(b)[:n]) if n > 0 else 0
+
+
+def read_csv_chunked(path: str, sep: str | None = None, encoding: str | None = None,
+                     chunk_rows: int = CSV_CHUNK_ROWS, compact: bool = True,
+                     progress=None, start: int = 0, end: int | None = None,
+                     names: list | None = None, dtype: dict | None = None) -> pd.DataFrame:
+    """
+    Lee un CSV por chunks con el motor C. `progress(rows, bytes_read, total_bytes,
+    rows_per_s)` se llama tras cada chunk si se pasa.
+    Con start/end se parsea sólo ese tramo de bytes (debe empezar y terminar
+    en un fin de línea); si start > 0 el tramo no tiene encabezado y las
+    columnas salen de `names`. `dtype` se pasa a pd.read_csv (sumado a las
+    columnas de texto detectadas, ver docstring del módulo).
+    """
+    if sep is None or encoding is None:
+        sniffed_sep, sniffed_enc = sniff_csv(path)
+        sep, encoding = sep or sniffed_sep, encoding or sniffed_enc
+    header = {"header": None, "names": names} if start else {}
+    if not start and (end is None or end > SNIFF_BYTES) and os.path.getsize(path) > SNIFF_BYTES:
+        # archivos chicos entran en un solo chunk: no hace falta la muestra
+        dtype = {**sniff_text_columns(path, sep, encoding), **(dtype or {})}
+
+    parts, blocked = [], set()
+    seen, conflicts = {}, set()
+    rows, t0, last_log = 0, time.perf_counter(), 0.0
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        end = size if end is None else min(end, size)
+        total = end - start
+        f.seek(start)
+        source = io.BufferedReader(_ByteRange(f, end)) if end < size else f
+        reader = pd.read_csv(source, sep=sep, encoding=encoding, chunksize=chunk_rows,
+                             on_bad_lines="skip", low_memory=False, dtype=dtype, **header)
+        for chunk in reader:
+            _track_kinds(chunk, seen, conflicts)
+            parts.append(_downcast_chunk(chunk, blocked) if compact else chunk)
+            rows += len(chunk)
+            elapsed = time.perf_counter() - t0
+            rate = rows / elapsed if elapsed > 0 else 0.0
+            pos = min(f.tell() - start, total)
+            if progress is not None:
+                progress(rows, pos, total, rate)
+            if elapsed - last_log >= PROGRESS_EVERY_S:
+                last_log = elapsed
+                logger.info("CSV %s: %d filas, %.0f%% (%.0f filas/s)",
+                            path, rows, 100 * pos / max(total, 1), rate)
+
+    if conflicts:
+        logger.info("CSV %s: %s con tipos distintos entre chunks, se releen como texto",
+                    path, ", ".join(map(str, sorted(conflicts, key=str))))
+        parts.clear()
+        return read_csv_chunked(path, sep=sep, encoding=encoding, chunk_rows=chunk_rows,
+                                compact=compact, progress=progress, start=start, end=end,
+                                names=names, dtype={**(dtype or {}),
+                                                    **{col: str for col in conflicts}})
+    if not parts:
+        # archivo con sólo encabezado
+        if start:
+            return pd.DataFrame(columns=names)
+        return pd.read_csv(path, sep=sep, encoding=encoding, nrows=0)
+    df = _concat_chunks(parts, blocked)
+    elapsed = time.perf_counter() - t0
+    logger.info("CSV %s: %d filas en %.2fs (%.0f filas/s)", path, rows, elapsed,
+                rows / elapsed if elapsed > 0 else 0.0)
+    return df
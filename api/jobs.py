@@ -0,0 +1,88 @@
+# api/jobs.py
+"""
+Trabajos en segundo plano (ingesta de uploads).
+El estado de cada trabajo es un JSON chico en UPLOAD_JOBS_DIR, reescrito de
+forma atómica. Así cualquier worker de gunicorn puede responder el polling
+aunque el trabajo corra en otro proceso. Los trabajos corren en un pool de
+hilos por proceso. Si el proceso muere a mitad de camino, el trabajo deja de
+actualizarse y se informa como interrumpido pasado JOB_STALE_S.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json, logging, os, threading, time, uuid
+
+logger = logging.getLogger(__name__)
+
+JOB_STALE_S = 900           # sin actualizaciones por más de esto → interrumpido
+RUNNING_STATES = ("queued", "parsing", "profiling")
+
+
+class JobStore:
+    def __init__(self, root: str, workers: int = 2):
+        self.root = root
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.root, f"{job_id}.json")
+
+    def _write(self, job: dict) -> None:
+        path = self._path(job["id"])
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp, path)
+
+    def create(self, **fields) -> dict:
+        self.cleanup()
+        now = time.time()
+        job = {"id": uuid.uuid4().hex, "state": "queued", "progress": 0.0,
+               "error": None, "created": now, "updated": now, **fields}
+        self._write(job)
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        # el id viene del cliente: sólo hex, nada de rutas
+        if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if job["state"] in RUNNING_STATES and time.time() - job["updated"] > JOB_STALE_S:
+            job.update(state="error", error="El procesamiento se interrumpió.")
+        return job
+
+    def update(self, job: dict, **fields) -> dict:
+        job.update(fields, updated=time.time())
+        self._write(job)
+        return job
+
+    def submit(self, job: dict, fn, *args) -> None:
+        """Corre fn(job, *args) en el pool; una excepción deja el trabajo en 'error'."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="upload-job")
+
+        def run():
+            try:
+                fn(job, *args)
+            except Exception as e:
+                logger.exception("Trabajo %s falló", job["id"])
+                self.update(job, state="error", error=str(e))
+
+        self._pool.submit(run)
+
+    def cleanup(self, max_age_s: float = 24 * 3600) -> None:
+        """Borra los estados de trabajos terminados hace más de max_age_s."""
+        now = time.time()
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if name.endswith(".json") and now - os.path.getmtime(path) > max_age_s:
+                    os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,55 @@
+# api/memtrack.py
+"""
+Pico de memoria (RSS) del proceso durante un bloque de código. Un hilo
+muestrea /proc/self/statm: ru_maxrss es el máximo de toda la vida del
+proceso y no se puede acotar a un upload. Fuera de Linux sólo queda
+ru_maxrss como aproximación.
+"""
+import os, resource, sys, threading
+
+SAMPLE_EVERY_S = 0.02
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    """RSS actual en bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+class PeakRSS:
+    """
+    with PeakRSS() as mem: ...  →  mem.start, mem.peak (bytes) y mem.delta
+    (pico sobre el inicio). Con otros hilos trabajando a la vez el pico es del
+    proceso entero, no sólo de este bloque.
+    """
+
+    def __init__(self, every: float = SAMPLE_EVERY_S):
+        self.every = every
+        self.start = self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.every):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.start = self.peak = current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+        return False
+
+    @property
+    def delta(self) -> int:
+        return self.peak - self.start
@@ -0,0 +1,331 @@
+# api/metrics.py
+"""
+Instrumentación de /api/*, expuesta en /api/metrics/ (formato de texto de
+Prometheus):
+- MetricsMiddleware mide cada request y lo reparte en etapas: "load"
+  (conseguir el snapshot: parseo, Arrow, registro), "render" (serializar la
+  respuesta) y "compute" (el resto de la vista). Las vistas marcan sus
+  etapas con `with stage("load"):`; los tiempos van a un contexto por request
+  (contextvars), así que funciona igual con hilos.
+- Histogramas de latencia por endpoint y por etapa, contadores de hits/misses
+  por cache y filas/bytes del dataset que tocó cada request.
+- cProfile opcional por request (?_profile=1 o cabecera X-Profile: 1, o al
+  azar con METRICS_PROFILE_SAMPLE) si METRICS_PROFILE está activo; el .prof
+  queda en METRICS_PROFILE_DIR y su nombre vuelve en la cabecera X-Profile.
+Los contadores viven en memoria de cada proceso. Sin METRICS_MULTIPROC_DIR,
+/api/metrics/ muestra sólo los del worker que atiende el scrape (la gauge
+api_metrics_processes vale 1). Con METRICS_MULTIPROC_DIR (como el modo
+multiproceso de prometheus_client) cada proceso vuelca sus series a
+<dir>/<padre>-<pid>-<inicio>.json cada METRICS_FLUSH_S segundos y al salir,
+y el endpoint suma los archivos de todos los workers, vivos o no. Al arrancar
+la app (ApiConfig.ready) se borran los archivos de corridas anteriores: los
+de procesos muertos cuyo padre (el master de gunicorn) tampoco sigue vivo.
+Así los workers reiniciados dentro de la misma corrida siguen sumando.
+"""
+from contextlib import contextmanager
+import atexit, contextvars, cProfile, json, os, random, threading, time
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGES = ("load", "compute", "render")
+PROFILE_KEEP = 50           # archivos .prof que se conservan
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_lock = threading.Lock()
+_counters = {}              # (nombre, labels) -> valor
+_histograms = {}            # (nombre, labels) -> [buckets, conteos por bucket, suma, total]
+_HELP = {
+    "api_requests_total": ("counter", "Requests atendidos por endpoint, método y status."),
+    "api_request_duration_seconds": ("histogram", "Latencia total del request por endpoint."),
+    "api_stage_duration_seconds": ("histogram", "Tiempo por etapa (load/compute/render) y endpoint."),
+    "api_cache_events_total": ("counter", "Hits y misses por cache."),
+    "api_dataset_rows": ("histogram", "Filas del dataset usado por request."),
+    "api_dataset_bytes": ("histogram", "Bytes en memoria del dataset usado por request."),
+}
+_SIZE_BUCKETS = tuple(10.0 ** k for k in range(2, 11))
+
+# etapas y dataset del request en curso
+_current = contextvars.ContextVar("api_metrics_request", default=None)
+
+# archivo de este proceso en METRICS_MULTIPROC_DIR y último volcado
+_proc = {"file": None, "flushed": 0.0}
+
+
+# ---------- registro ----------
+def _key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    with _lock:
+        k = (name, _key(labels))
+        _counters[k] = _counters.get(k, 0) + value
+
+
+def observe(name: str, value: float, buckets=LATENCY_BUCKETS, **labels) -> None:
+    with _lock:
+        k = (name, _key(labels))
+        h = _histograms.get(k)
+        if h is None:
+            h = _histograms[k] = [buckets, [0] * len(buckets), 0.0, 0]
+        for i, b in enumerate(buckets):
+            if value <= b:
+                h[1][i] += 1
+        h[2] += value
+        h[3] += 1
+
+
+def cache_event(cache: str, hit: bool) -> None:
+    inc("api_cache_events_total", cache=cache, result="hit" if hit else "miss")
+
+
+@contextmanager
+def stage(name: str):
+    """Suma el tiempo del bloque a la etapa `name` del request en curso (si hay)."""
+    ctx = _current.get()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        if ctx is not None:
+            ctx["stages"][name] = ctx["stages"].get(name, 0.0) + time.perf_counter() - t0
+
+
+def record_dataset(rows: int, nbytes: int) -> None:
+    """Anota el tamaño del dataset que usa el request en curso."""
+    ctx = _current.get()
+    if ctx is not None:
+        ctx["dataset"] = (rows, nbytes)
+
+
+# ---------- exposición ----------
+def _fmt_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+def render_prometheus(extra_gauges: dict | None = None) -> str:
+    """Texto para /api/metrics/. extra_gauges: {nombre: (ayuda, {labels: valor})}."""
+    counters, histograms, processes = _collect()
+    extra_gauges = {"api_metrics_processes": (
+        "Procesos sumados en estas métricas (1 = sólo el worker que respondió).",
+        {(): processes}), **(extra_gauges or {})}
+    lines = []
+    for name, (kind, help_) in _HELP.items():
+        if kind == "counter":
+            series = [(labels, v) for (n, labels), v in sorted(counters.items()) if n == name]
+        else:
+            series = [(labels, h) for (n, labels), h in sorted(histograms.items()) if n == name]
+        if not series:
+            continue
+        lines += [f"# HELP {name} {help_}", f"# TYPE {name} {kind}"]
+        for labels, v in series:
+            if kind == "counter":
+                lines.append(f"{name}{_fmt_labels(labels)} {v}")
+                continue
+            buckets, counts, total, count = v
+            for b, c in zip(buckets, counts):
+                lines.append(f"{name}_bucket{_fmt_labels(labels, (('le', repr(float(b))),))} {c}")
+            lines.append(f"{name}_bucket{_fmt_labels(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {total}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+    for name, (help_, values) in extra_gauges.items():
+        lines += [f"# HELP {name} {help_}", f"# TYPE {name} gauge"]
+        for labels, v in values.items():
+            lines.append(f"{name}{_fmt_labels(labels)} {v}")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# ---------- modo multiproceso ----------
+def _multiproc_dir() -> str:
+    return getattr(settings, "METRICS_MULTIPROC_DIR", "") or ""
+
+
+def _after_fork() -> None:
+    # el hijo empieza de cero y con archivo propio (lo heredado es del padre);
+    # el lock se recrea por si otro hilo lo tenía tomado al hacer fork
+    global _lock
+    _lock = threading.Lock()
+    _counters.clear()
+    _histograms.clear()
+    _proc.update({"file": None, "flushed": 0.0})
+
+
+def flush(force: bool = False) -> None:
+    """Vuelca las series de este proceso a METRICS_MULTIPROC_DIR (como mucho cada METRICS_FLUSH_S)."""
+    root = _multiproc_dir()
+    if not root:
+        return
+    now = time.monotonic()
+    if not force and now - _proc["flushed"] < float(getattr(settings, "METRICS_FLUSH_S", 1.0)):
+        return
+    _proc["flushed"] = now
+    with _lock:
+        data = {"counters": [[n, labels, v] for (n, labels), v in _counters.items()],
+                "histograms": [[n, labels, list(h[0]), list(h[1]), h[2], h[3]]
+                               for (n, labels), h in _histograms.items()]}
+    if _proc["file"] is None:
+        _proc["file"] = os.path.join(root, f"{os.getppid()}-{os.getpid()}-{time.time_ns()}.json")
+    tmp = f"{_proc['file']}.tmp"
+    try:
+        os.makedirs(root, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, _proc["file"])
+    except OSError:
+        pass    # las métricas nunca rompen un request
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass        # existe, pero es de otro usuario
+    return True
+
+
+def clear_stale() -> None:
+    """Borra de METRICS_MULTIPROC_DIR los archivos de corridas anteriores del servidor."""
+    root = _multiproc_dir()
+    if not root or not os.path.isdir(root):
+        return
+    for entry in os.scandir(root):
+        try:
+            parent, pid, _ = map(int, entry.name.split(".")[0].split("-"))
+        except ValueError:
+            parent = pid = None     # formato viejo o ajeno: no es de esta corrida
+        if parent is not None and (_alive(pid) or _alive(parent)):
+            continue
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _collect() -> tuple[dict, dict, int]:
+    """(contadores, histogramas, procesos) sumados entre todos los workers."""
+    root = _multiproc_dir()
+    if not root:
+        with _lock:
+            return (dict(_counters),
+                    {k: (h[0], list(h[1]), h[2], h[3]) for k, h in _histograms.items()}, 1)
+    flush(force=True)
+    counters, histograms, processes = {}, {}, 0
+    for entry in os.scandir(root):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue    # otro proceso lo está reemplazando o se borró
+        processes += 1
+        for n, labels, v in data["counters"]:
+            k = (n, tuple(map(tuple, labels)))
+            counters[k] = counters.get(k, 0) + v
+        for n, labels, buckets, counts, total, count in data["histograms"]:
+            k = (n, tuple(map(tuple, labels)))
+            h = histograms.get(k)
+            if h is None:
+                histograms[k] = (tuple(buckets), list(counts), total, count)
+            else:
+                histograms[k] = (h[0], [a + b for a, b in zip(h[1], counts)],
+                                 h[2] + total, h[3] + count)
+    return counters, histograms, max(processes, 1)
+
+
+os.register_at_fork(after_in_child=_after_fork)
+atexit.register(flush, True)
+
+
+# ---------- middleware ----------
+def _endpoint(request) -> str:
+    """Patrón de la ruta sin el prefijo api/ (cardinalidad acotada); 'other' si no resolvió."""
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.route:
+        return "other"
+    route = match.route.removeprefix("api/").strip("/")
+    return route or "dashboard"
+
+
+def _wants_profile(request) -> bool:
+    if not getattr(settings, "METRICS_PROFILE", False):
+        return False
+    if request.GET.get("_profile") == "1" or request.META.get("HTTP_X_PROFILE") == "1":
+        return True
+    rate = float(getattr(settings, "METRICS_PROFILE_SAMPLE", 0.0))
+    return rate > 0 and random.random() < rate
+
+
+def _save_profile(prof: cProfile.Profile, endpoint: str) -> str:
+    root = settings.METRICS_PROFILE_DIR
+    os.makedirs(root, exist_ok=True)
+    slug = "".join(c if c.isalnum() else "_" for c in endpoint)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{os.getpid()}-{threading.get_ident()}.prof"
+    prof.dump_stats(os.path.join(root, name))
+    files = sorted((f for f in os.listdir(root) if f.endswith(".prof")),
+                   key=lambda f: os.path.getmtime(os.path.join(root, f)))
+    for old in files[:-PROFILE_KEEP]:
+        try:
+            os.remove(os.path.join(root, old))
+        except OSError:
+            pass
+    return name
+
+
+class MetricsMiddleware:
+    """Mide los requests a /api/ (latencia total y por etapa, dataset, cProfile opcional)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith("/api/") or request.path.startswith("/api/metrics"):
+            return self.get_response(request)
+
+        ctx = {"stages": {}, "dataset": None}
+        token = _current.set(ctx)
+        prof = cProfile.Profile() if _wants_profile(request) else None
+        t0 = time.perf_counter()
+        try:
+            if prof is not None:
+                prof.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if prof is not None:
+                    prof.disable()
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - t0
+
+        endpoint = _endpoint(request)
+        stages = ctx["stages"]
+        stages["compute"] = max(elapsed - stages.get("load", 0.0) - stages.get("render", 0.0), 0.0)
+        inc("api_requests_total", endpoint=endpoint, method=request.method,
+            status=str(response.status_code))
+        observe("api_request_duration_seconds", elapsed, endpoint=endpoint)
+        for name in STAGES:
+            if name in stages:
+                observe("api_stage_duration_seconds", stages[name], endpoint=endpoint, stage=name)
+        if ctx["dataset"] is not None:
+            rows, nbytes = ctx["dataset"]
+            observe("api_dataset_rows", rows, buckets=_SIZE_BUCKETS, endpoint=endpoint)
+            observe("api_dataset_bytes", nbytes, buckets=_SIZE_BUCKETS, endpoint=endpoint)
+        response["Server-Timing"] = ", ".join(f"{k};dur={v * 1000:.1f}" for k, v in stages.items())
+        if prof is not None:
+            response["X-Profile"] = _save_profile(prof, endpoint)
+        flush()
+        return response
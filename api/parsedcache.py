@@ -0,0 +1,113 @@
+# api/parsedcache.py
+"""
+Cache persistente de uploads ya parseados, direccionado por contenido.
+El upload se hashea mientras llega (api/uploadhandlers.py) y ese hash es su
+dataset_id; después del primer parseo el DataFrame se guarda como Parquet en
+PARSED_CACHE_DIR con el hash como nombre. Si el mismo archivo se vuelve a
+subir (aunque el proceso se haya reiniciado) se lee el Parquet en lugar de
+parsear: sobre todo evita pd.read_excel, el camino más lento.
+No hay índice aparte: el directorio es el índice y el mtime de cada archivo
+su último uso (se toca en cada hit). Si se pasa de max_bytes se borran los
+menos usados (LRU). Escribir es atómico (tmp + rename), así que varios
+workers pueden compartir el directorio.
+"""
+import logging, os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .columnar import table_to_pandas
+from .metrics import cache_event
+
+logger = logging.getLogger(__name__)
+
+PARQUET_EXT = ".parquet"
+NAME_KEY = b"dataset_name"      # nombre del primer upload, en la metadata (para inspección)
+
+
+class ParsedCache:
+    def __init__(self, root: str, max_bytes: int | None = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest: str, variant: str = "") -> str:
+        suffix = f"-{variant}" if variant else ""
+        return os.path.join(self.root, f"{digest}{suffix}{PARQUET_EXT}")
+
+    def get(self, digest: str, variant: str = "") -> pd.DataFrame | None:
+        """El DataFrame guardado, o None si no está en cache."""
+        path = self.path(digest, variant)
+        try:
+            table = pq.read_table(path, memory_map=True)
+            os.utime(path)      # último uso, para el LRU
+        except FileNotFoundError:
+            cache_event("parsed", False)
+            return None
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning("Parquet ilegible en cache %s, se vuelve a parsear: %s", path, e)
+            cache_event("parsed", False)
+            return None
+        cache_event("parsed", True)
+        return table_to_pandas(table)
+
+    def put(self, digest: str, df: pd.DataFrame, name: str | None = None, variant: str = "") -> bool:
+        """Guarda df; False si no se puede pasar a Arrow (ver columnar.write_ipc)."""
+        path = self.path(digest, variant)
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, KeyError, ValueError) as e:
+            logger.warning("No se puede guardar %s en la cache de uploads: %s", name, e)
+            return False
+        if name:
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                                   NAME_KEY: name.encode()})
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            pq.write_table(table, tmp)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("No se pudo escribir %s: %s", path, e)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+        self._trim(keep=path)
+        return True
+
+    def stats(self) -> dict:
+        files = self._files()
+        return {"root": self.root, "max_bytes": self.max_bytes,
+                "bytes": sum(size for _, size, _ in files), "datasets": len(files)}
+
+    # ---------- internos ----------
+    def _files(self) -> list[tuple[str, int, float]]:
+        """(ruta, tamaño, último uso) de cada Parquet del directorio."""
+        out = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(PARQUET_EXT):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue    # otro worker lo acaba de borrar
+                out.append((entry.path, st.st_size, st.st_mtime))
+        return out
+
+    def _trim(self, keep: str) -> None:
+        """Borra los menos usados hasta entrar en max_bytes (nunca `keep`)."""
+        if not self.max_bytes:
+            return
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for path, size, _ in sorted(files, key=lambda f: f[2]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
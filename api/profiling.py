@@ -0,0 +1,307 @@
+# api/profiling.py
+"""
+Motor de perfilado: recorre cada columna una sola vez y saca todo lo que
+usan los endpoints (nulos, cardinalidad, dtype, cuantiles, cercas IQR,
+min/max, media/desv. y un histograma base). El resultado se memoiza por
+versión del dataset con snapshot.memo('profile', build_profile).
+
+Las columnas son independientes, así que se reparten en un pool
+(PROFILE_WORKERS / PROFILE_EXECUTOR en settings):
+- "thread": todo en hilos; sort/histogram de numpy liberan el GIL.
+- "process": las columnas object (que no liberan el GIL) van a procesos
+  creados con fork, que heredan el DataFrame por memoria compartida
+  copy-on-write en lugar de serializarlo; las numéricas siguen en hilos.
+"""
+import multiprocessing as mp
+import os, threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from .duplicates import count_duplicates
+from .sketches import ColumnSketch
+
+QUANTILES = (0.05, 0.25, 0.50, 0.75, 0.95)
+HIST_BINS = 20     # bins por defecto de /api/distribution/
+TOP_VALUES = 50    # máximo 'top' que acepta /api/distribution/
+PARALLEL_MIN_CELLS = 1_000_000  # por debajo, el pool cuesta más de lo que ahorra
+APPROX_CHUNK_ROWS = 1_000_000   # filas por chunk al alimentar los sketches
+
+
+def _numeric_stats(s: pd.Series) -> dict:
+    """Estadísticos de una columna numérica a partir de un único sort."""
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "iu":
+        values = np.sort(s.to_numpy())
+        nulls = 0
+    else:
+        values = s.to_numpy(dtype=float, na_value=np.nan)
+        mask = np.isnan(values)
+        nulls = int(mask.sum())
+        values = np.sort(values[~mask])
+
+    n = int(values.size)
+    # comparar vecinos (y no np.diff): inf - inf da NaN y contaría de más
+    distinct = int(np.count_nonzero(values[1:] != values[:-1])) + 1 if n else 0
+    out = {
+        "nulls": nulls,
+        "unique": distinct + (1 if nulls else 0),
+        "count": n,
+        "mean": None, "std": None, "min": None, "max": None,
+        "quantiles": None, "lower_fence": None, "upper_fence": None,
+        "whisker_min": None, "whisker_max": None, "outliers": 0,
+        "hist": None,
+    }
+    if not n:
+        return out
+
+    x = values.astype(float, copy=False)
+    # ±inf quedan en las puntas del array ordenado: los estadísticos y el
+    # histograma salen de la parte finita; los infinitos cuentan como outliers
+    a = int(np.searchsorted(x, -np.inf, side="right"))
+    b = int(np.searchsorted(x, np.inf, side="left"))
+    finite = x[a:b]
+    m = int(finite.size)
+    if not m:
+        out["outliers"] = n
+        return out
+    qs = np.quantile(finite, QUANTILES)
+    q1, q3 = float(qs[1]), float(qs[3])
+    iqr = q3 - q1
+    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    # x está ordenado: las cercas se resuelven con búsqueda binaria
+    lo = int(np.searchsorted(x, lower, side="left"))
+    hi = int(np.searchsorted(x, upper, side="right"))
+    counts, edges = np.histogram(finite, bins=HIST_BINS)
+
+    out.update({
+        "mean": float(finite.mean()),
+        "std": float(finite.std(ddof=1)) if m > 1 else None,
+        "min": float(finite[0]),
+        "max": float(finite[-1]),
+        "quantiles": dict(zip(QUANTILES, (float(q) for q in qs))),
+        "lower_fence": float(lower),
+        "upper_fence": float(upper),
+        "whisker_min": float(x[lo]) if hi > lo else float(finite[0]),
+        "whisker_max": float(x[hi - 1]) if hi > lo else float(finite[-1]),
+        "outliers": lo + (n - hi),
+        "hist": {"bins": edges.tolist(), "counts": counts.tolist()},
+    })
+    return out
+
+
+def _categorical_stats(s: pd.Series) -> dict:
+    """Nulos, cardinalidad y top de valores (como texto) con un solo value_counts."""
+    try:
+        vc = s.value_counts(dropna=False)
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            vc = vc[vc > 0]     # categorías declaradas que no aparecen
+        unique = int(len(vc))
+        labels = vc.index.map(str)
+        if not labels.is_unique:
+            # valores distintos con el mismo texto (1 y '1'): se agrupan como antes
+            vc = vc.groupby(labels).sum().sort_values(ascending=False)
+        else:
+            vc.index = labels
+    except TypeError:
+        # valores no hasheables (listas, dicts): se comparan por su texto
+        vc = s.astype(str).value_counts(dropna=False)
+        unique = int(len(vc))
+    top = vc.head(TOP_VALUES)
+    return {
+        "nulls": int(s.isna().sum()),
+        "unique": unique,
+        "top": {"labels": top.index.tolist(), "counts": [int(c) for c in top.values]},
+    }
+
+
+def profile_column(name, s: pd.Series, numeric: bool) -> dict:
+    """Perfil completo de una columna (independiente del resto)."""
+    stats = _numeric_stats(s) if numeric else _categorical_stats(s)
+    return {"column": name, "dtype": str(s.dtype), "kind": s.dtype.kind,
+            "numeric": numeric, **stats}
+
+
+def resolve_workers(workers: int | None = None) -> int:
+    if workers is None:
+        workers = int(getattr(settings, "PROFILE_WORKERS", 1))
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _profile_tasks(df: pd.DataFrame, tasks, column_fn=profile_column) -> list[dict]:
+    return [column_fn(df.columns[i], df.iloc[:, i], numeric) for i, numeric in tasks]
+
+
+# DataFrame que heredan los procesos hijos (fork); sólo vive durante un perfilado
+_FORK_DF = None
+_FORK_LOCK = threading.Lock()
+
+def _profile_forked_shard(args) -> list[dict]:
+    tasks, column_fn = args
+    return _profile_tasks(_FORK_DF, tasks, column_fn)
+
+
+def _shards(tasks: list, n: int) -> list[list]:
+    """Reparte las tareas en n grupos intercalados (columnas anchas y angostas mezcladas)."""
+    return [tasks[k::n] for k in range(n) if tasks[k::n]]
+
+
+def _run_threads(df: pd.DataFrame, shards: list, workers: int, column_fn, merge) -> None:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_profile_tasks, df, shard, column_fn) for shard in shards]
+        for shard, fut in zip(shards, futures):
+            merge(shard, fut.result())
+
+
+def _profile_columns(df: pd.DataFrame, numeric, workers: int, executor: str,
+                     column_fn=profile_column) -> list[dict]:
+    global _FORK_DF
+    tasks = [(i, bool(numeric[i])) for i in range(df.shape[1])]
+    if workers <= 1 or len(tasks) < 2 or df.size < PARALLEL_MIN_CELLS:
+        return _profile_tasks(df, tasks, column_fn)
+
+    use_processes = executor == "process" and "fork" in mp.get_all_start_methods()
+    thread_shards = _shards([t for t in tasks if t[1] or not use_processes], workers * 4)
+    process_shards = _shards([t for t in tasks if not t[1] and use_processes], workers)
+
+    results = {}
+    def merge(shard, out):
+        results.update({i: prof for (i, _), prof in zip(shard, out)})
+
+    if not process_shards:
+        _run_threads(df, thread_shards, workers, column_fn, merge)
+        return [results[i] for i, _ in tasks]
+    with _FORK_LOCK:
+        _FORK_DF = df
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=mp.get_context("fork")) as procs:
+                # con "fork" todos los hijos se crean en el primer submit: así se
+                # forkea antes de que arranquen los hilos del pool, y ningún hijo
+                # hereda un lock (malloc, logging, pandas) tomado por uno de ellos
+                futures = [procs.submit(_profile_forked_shard, (shard, column_fn))
+                           for shard in process_shards]
+                _run_threads(df, thread_shards, workers, column_fn, merge)
+                for shard, fut in zip(process_shards, futures):
+                    merge(shard, fut.result())
+        finally:
+            _FORK_DF = None
+    return [results[i] for i, _ in tasks]
+
+
+def _assemble(df: pd.DataFrame, columns: list[dict], dup_rows: int | None,
+              workers: int, approx: bool = False) -> dict:
+    rows, cols = df.shape
+    null_cells = sum(c["nulls"] for c in columns)
+    if dup_rows is None:
+        dup_rows = count_duplicates(df, workers=workers)
+    return {
+        "rows": int(rows),
+        "cols": int(cols),
+        "null_cells": int(null_cells),
+        "dup_rows": int(dup_rows),
+        "dtypes": {k: int(v) for k, v in df.dtypes.astype(str).value_counts().items()},
+        "approx": approx,
+        "columns": columns,
+        "by_name": {c["column"]: c for c in columns},
+    }
+
+
+def build_profile(df: pd.DataFrame, workers: int | None = None,
+                  executor: str | None = None, dup_rows: int | None = None) -> dict:
+    """
+    Perfil de todo el DataFrame, una pasada por columna (en paralelo si se configura).
+    `dup_rows` permite reutilizar un conteo de duplicados ya calculado.
+    """
+    workers = resolve_workers(workers)
+    executor = executor or getattr(settings, "PROFILE_EXECUTOR", "thread")
+    numeric = df.columns.isin(df.select_dtypes(include=[np.number]).columns)
+    return _assemble(df, _profile_columns(df, numeric, workers, executor), dup_rows, workers)
+
+
+# ---------------------------------------------------------------------
+# Modo aproximado: sketches mergeables alimentados por chunks de filas
+# ---------------------------------------------------------------------
+def sketch_column(s: pd.Series, numeric: bool, chunk_rows: int = APPROX_CHUNK_ROWS) -> ColumnSketch:
+    """Construye el ColumnSketch de una columna recorriéndola por chunks."""
+    sk = ColumnSketch(numeric)
+    for start in range(0, len(s), chunk_rows):
+        sk.update(s.iloc[start:start + chunk_rows])
+    return sk
+
+
+def sketch_stats(name, dtype, sk: ColumnSketch) -> dict:
+    """Convierte un ColumnSketch al mismo formato que profile_column (+ cotas de error)."""
+    unique = min(sk.hll.estimate(), sk.rows - sk.nulls) + (1 if sk.nulls else 0)
+    errors = {"unique_rel": float(sk.hll.relative_error)}
+    out = {"column": name, "dtype": str(dtype), "kind": dtype.kind, "numeric": sk.numeric,
+           "nulls": sk.nulls, "unique": int(unique), "approx": True, "errors": errors}
+    if not sk.numeric:
+        top, top_errors = sk.topk.top(TOP_VALUES)
+        # sobreestimación máxima entre los conteos informados
+        errors["top_count"] = int(top_errors.max()) if top_errors.size else 0
+        out["top"] = {"labels": top.index.tolist(), "counts": [int(c) for c in top.values]}
+        return out
+
+    n = sk.count        # valores finitos: de ellos salen cuantiles e histograma
+    out.update({
+        "count": n + sk.infinite,
+        "mean": None, "std": None, "min": None, "max": None,
+        "quantiles": None, "lower_fence": None, "upper_fence": None,
+        "whisker_min": None, "whisker_max": None, "outliers": 0,
+        "hist": None,
+    })
+    if not n:
+        out["outliers"] = sk.infinite
+        return out
+
+    rank_err = sk.kll.rank_error
+    qs = sk.kll.quantiles(QUANTILES)
+    q1, q3 = float(qs[1]), float(qs[3])
+    iqr = q3 - q1
+    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    below, upto = sk.kll.cdf([np.nextafter(lower, -np.inf), upper])
+    items, _ = sk.kll.sorted_items()
+    inside = items[(items >= lower) & (items <= upper)]
+    edges = np.linspace(sk.min, sk.max, HIST_BINS + 1)
+    # bins [a, b) como np.histogram (el último cerrado)
+    cdf = np.append(sk.kll.cdf(np.nextafter(edges[1:-1], -np.inf)), 1.0)
+    counts = np.rint(np.diff(np.concatenate([[0.0], cdf])) * n).astype(int)
+
+    out.update({
+        "mean": float(sk.mean),
+        "std": float(np.sqrt(sk.m2 / (n - 1))) if n > 1 else None,
+        "min": float(sk.min),
+        "max": float(sk.max),
+        "quantiles": dict(zip(QUANTILES, (float(q) for q in qs))),
+        "lower_fence": float(lower),
+        "upper_fence": float(upper),
+        "whisker_min": float(sk.min) if sk.min >= lower else float(inside.min() if inside.size else sk.min),
+        "whisker_max": float(sk.max) if sk.max <= upper else float(inside.max() if inside.size else sk.max),
+        "outliers": int(round(n * (below + 1.0 - upto))) + sk.infinite,
+        "hist": {"bins": edges.tolist(), "counts": counts.tolist()},
+    })
+    errors.update({"quantile_rank": float(rank_err), "outliers": int(np.ceil(2 * rank_err * n)),
+                   "hist_count": int(np.ceil(2 * rank_err * n))})
+    return out
+
+
+def approx_profile_column(name, s: pd.Series, numeric: bool) -> dict:
+    return sketch_stats(name, s.dtype, sketch_column(s, numeric))
+
+
+def build_approx_profile(df: pd.DataFrame, workers: int | None = None,
+                         executor: str | None = None, dup_rows: int | None = None) -> dict:
+    """Como build_profile pero con sketches (memoria acotada por columna, con cotas de error)."""
+    workers = resolve_workers(workers)
+    executor = executor or getattr(settings, "PROFILE_EXECUTOR", "thread")
+    numeric = df.columns.isin(df.select_dtypes(include=[np.number]).columns)
+    columns = _profile_columns(df, numeric, workers, executor, approx_profile_column)
+    return _assemble(df, columns, dup_rows, workers, approx=True)
+
+
+def build_sketch_profile(df: pd.DataFrame, sketches: dict, dup_rows: int) -> dict:
+    """Perfil aproximado desde ColumnSketch ya armados (p. ej. mantenidos por api/incremental.py)."""
+    columns = [sketch_stats(name, df[name].dtype, sketches[name]) for name in df.columns]
+    return _assemble(df, columns, dup_rows, workers=1, approx=True)
@@ -0,0 +1,368 @@
+# api/query.py
+"""
+Consultas sobre un dataset: ?where= filtra filas y ?columns= proyecta
+columnas antes de perfilar. Lo usan todos los endpoints que pasan por
+_analysis (summary, distribution, boxplot, outliers, describe, ...).
+
+Sintaxis de where (palabras clave sin distinguir mayúsculas):
+    Age > 50 and (Outcome == 1 or `Blood Pressure` >= 80.5)
+    city in ('Lima', 'Quito') and not name is null
+Comparaciones ==, =, !=, <>, <, <=, >, >=; `in (...)`, `not in (...)`,
+`is null`, `is not null`; and/or/not y paréntesis. A la izquierda siempre
+una columna (con `backticks` si tiene espacios o símbolos); a la derecha un
+número, 'texto', true/false. Un texto contra una columna de fechas se
+convierte a fecha.
+
+El predicado se parsea a un árbol de tuplas y se normaliza (and/or
+aplanados, hijos ordenados y sin repetir, operadores canónicos): su texto
+es la clave de cache, así `Age>50 and Outcome=1` y `Outcome == 1 AND
+Age > 50` comparten resultado.
+La evaluación es vectorizada con pyarrow.compute sobre las columnas que el
+predicado nombra (numéricas sin copia) con lógica de tres valores: una fila
+cuyo predicado da null (p. ej. Age > 50 con Age nulo) no pasa.
+"""
+from collections import OrderedDict
+import re, threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+COMPARISONS = {"==": "equal", "!=": "not_equal", "<": "less", "<=": "less_equal",
+               ">": "greater", ">=": "greater_equal"}
+_ALIASES = {"=": "==", "<>": "!="}
+MAX_WHERE_LENGTH = 4_000
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<num>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    | (?P<str>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    | `(?P<quoted>[^`]+)`
+    | (?P<op><=|>=|==|!=|<>|[<>=(),])
+    | (?P<word>[A-Za-z_][A-Za-z0-9_.]*)
+    )""", re.VERBOSE)
+_KEYWORDS = {"and", "or", "not", "in", "is", "null", "true", "false"}
+
+
+class QueryError(ValueError):
+    """where/columns inválidos (400 en la vista)."""
+
+
+# ---------- parser ----------
+def _tokens(text: str) -> list[tuple[str, object]]:
+    out, pos, text = [], 0, text.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None or m.end() == pos:
+            raise QueryError(f"no se entiende el texto en la posición {pos}: {text[pos:pos + 20]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == "num":
+            value = float(value) if any(c in value for c in ".eE") else int(value)
+        elif kind == "str":
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        elif kind == "word" and value.lower() in _KEYWORDS:
+            kind, value = "kw", value.lower()
+        elif kind == "word":
+            kind = "quoted"     # identificador sin backticks
+        out.append((kind, value))
+    return out
+
+
+class _Parser:
+    """or → and → not → comparación (descenso recursivo)."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self, kind=None, value=None) -> bool:
+        if self.i >= len(self.tokens):
+            return False
+        k, v = self.tokens[self.i]
+        return (kind is None or k == kind) and (value is None or v == value)
+
+    def take(self, kind=None, value=None):
+        if not self.peek(kind, value):
+            found = self.tokens[self.i][1] if self.i < len(self.tokens) else "el final"
+            raise QueryError(f"se esperaba {value or kind}, vino {found!r}")
+        self.i += 1
+        return self.tokens[self.i - 1][1]
+
+    def parse(self):
+        node = self.or_()
+        if self.i != len(self.tokens):
+            raise QueryError(f"sobra texto desde {self.tokens[self.i][1]!r}")
+        return node
+
+    def or_(self):
+        terms = [self.and_()]
+        while self.peek("kw", "or"):
+            self.take()
+            terms.append(self.and_())
+        return terms[0] if len(terms) == 1 else ("or", tuple(terms))
+
+    def and_(self):
+        terms = [self.not_()]
+        while self.peek("kw", "and"):
+            self.take()
+            terms.append(self.not_())
+        return terms[0] if len(terms) == 1 else ("and", tuple(terms))
+
+    def not_(self):
+        if self.peek("kw", "not"):
+            self.take()
+            return ("not", self.not_())
+        if self.peek("op", "("):
+            self.take()
+            node = self.or_()
+            self.take("op", ")")
+            return node
+        return self.comparison()
+
+    def literal(self):
+        if self.peek("num") or self.peek("str"):
+            return self.take()
+        if self.peek("kw", "true") or self.peek("kw", "false"):
+            return self.take() == "true"
+        found = self.tokens[self.i][1] if self.i < len(self.tokens) else "el final"
+        raise QueryError(f"se esperaba un número, 'texto' o true/false, vino {found!r}")
+
+    def comparison(self):
+        column = self.take("quoted")
+        if self.peek("kw", "is"):
+            self.take()
+            negated = self.peek("kw", "not") and bool(self.take())
+            self.take("kw", "null")
+            return ("notnull" if negated else "isnull", column)
+        negated = self.peek("kw", "not") and bool(self.take())
+        if negated or self.peek("kw", "in"):
+            self.take("kw", "in")
+            self.take("op", "(")
+            values = [self.literal()]
+            while self.peek("op", ","):
+                self.take()
+                values.append(self.literal())
+            self.take("op", ")")
+            node = ("in", column, tuple(values))
+            return ("not", node) if negated else node
+        if not self.peek("op"):
+            raise QueryError(f"se esperaba una comparación después de {column!r}")
+        op = _ALIASES.get(self.tokens[self.i][1], self.tokens[self.i][1])
+        if op not in COMPARISONS:
+            raise QueryError(f"operador no válido: {op!r}")
+        self.take()
+        return ("cmp", op, column, self.literal())
+
+
+# ---------- normalización ----------
+def _literal_text(v) -> str:
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, str):
+        return "'" + v.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    return repr(v)
+
+
+def _column_text(name: str) -> str:
+    return f"`{name}`"
+
+
+def normalize(node) -> tuple:
+    """Árbol canónico: and/or aplanados, hijos ordenados y sin duplicados, not(not x) = x."""
+    kind = node[0]
+    if kind in ("and", "or"):
+        children = []
+        for child in (normalize(c) for c in node[1]):
+            children.extend(child[1] if child[0] == kind else (child,))
+        unique = sorted(set(children), key=to_text)
+        return unique[0] if len(unique) == 1 else (kind, tuple(unique))
+    if kind == "not":
+        inner = normalize(node[1])
+        return inner[1] if inner[0] == "not" else ("not", inner)
+    if kind == "in":
+        values = tuple(sorted(set(node[2]), key=lambda v: (type(v).__name__, v)))
+        return ("in", node[1], values)
+    return node
+
+
+def to_text(node) -> str:
+    """Texto canónico (re-parseable) de un árbol."""
+    kind = node[0]
+    if kind in ("and", "or"):
+        return f" {kind} ".join(f"({to_text(c)})" if c[0] in ("and", "or") else to_text(c)
+                                for c in node[1])
+    if kind == "not":
+        inner = node[1]
+        return f"not ({to_text(inner)})" if inner[0] in ("and", "or") else f"not {to_text(inner)}"
+    if kind == "cmp":
+        return f"{_column_text(node[2])} {node[1]} {_literal_text(node[3])}"
+    if kind == "in":
+        return f"{_column_text(node[1])} in ({', '.join(_literal_text(v) for v in node[2])})"
+    return f"{_column_text(node[1])} is {'not ' if kind == 'notnull' else ''}null"
+
+
+def parse_where(text: str) -> tuple:
+    """Árbol normalizado de un where (QueryError si no es válido)."""
+    if len(text) > MAX_WHERE_LENGTH:
+        raise QueryError(f"where no puede pasar de {MAX_WHERE_LENGTH} caracteres")
+    tokens = _tokens(text)
+    if not tokens:
+        raise QueryError("where vacío")
+    return normalize(_Parser(tokens).parse())
+
+
+def parse_columns(text: str) -> tuple[str, ...]:
+    """?columns=a,b,`c,d` → ('a', 'b', 'c,d') sin repetidos, en orden."""
+    names = [m.group(1) if m.group(1) is not None else m.group(2).strip()
+             for m in re.finditer(r"\s*(?:`([^`]+)`|([^,]+))\s*(?:,|$)", text)]
+    names = [n for n in names if n]
+    if not names:
+        raise QueryError("columns vacío")
+    return tuple(dict.fromkeys(names))
+
+
+# ---------- evaluación ----------
+def _columns_in(node, out: set) -> set:
+    kind = node[0]
+    if kind in ("and", "or"):
+        for c in node[1]:
+            _columns_in(c, out)
+    elif kind == "not":
+        _columns_in(node[1], out)
+    else:
+        out.add(node[2] if kind == "cmp" else node[1])
+    return out
+
+
+def _arrow(s: pd.Series):
+    """Columna como array Arrow (sin copia si es numérica sin nulos o ya es Arrow); NaN → null."""
+    try:
+        arr = pa.array(s, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise QueryError(f"la columna {s.name!r} no se puede filtrar: {e}")
+    if pa.types.is_dictionary(arr.type):
+        arr = arr.cast(arr.type.value_type)
+    return arr
+
+
+def _scalar(value, arr) -> pa.Scalar:
+    """Literal como escalar Arrow comparable con la columna."""
+    t = arr.type
+    if isinstance(value, bool) or pa.types.is_boolean(t):
+        if not pa.types.is_boolean(t) or not isinstance(value, bool):
+            raise QueryError(f"no se puede comparar {_literal_text(value)} con una columna {t}")
+        return pa.scalar(value)
+    if isinstance(value, (int, float)) and (pa.types.is_integer(t) or pa.types.is_floating(t)):
+        return pa.scalar(value)
+    try:
+        return pc.cast(pa.scalar(value), t)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise QueryError(f"no se puede comparar {_literal_text(value)} con una columna {t}: {e}")
+
+
+def _value_set(values: pa.Array, t: pa.DataType) -> pa.Array:
+    """
+    Literales de un `in` con el tipo de la columna. Los que no entran en ese
+    tipo (300 contra int8) no pueden coincidir con ninguna fila: se descartan
+    en lugar de rechazar el where.
+    """
+    if values.type == t:
+        return values
+    kept = []
+    for v in values:
+        try:
+            kept.append(v.cast(t).as_py())
+        except (pa.ArrowInvalid, OverflowError):
+            continue
+    return pa.array(kept, type=t)
+
+
+def _mask(node, cols: dict):
+    kind = node[0]
+    if kind == "and":
+        out = _mask(node[1][0], cols)
+        for c in node[1][1:]:
+            out = pc.and_kleene(out, _mask(c, cols))
+        return out
+    if kind == "or":
+        out = _mask(node[1][0], cols)
+        for c in node[1][1:]:
+            out = pc.or_kleene(out, _mask(c, cols))
+        return out
+    if kind == "not":
+        return pc.invert(_mask(node[1], cols))
+    if kind == "isnull":
+        return pc.is_null(cols[node[1]], nan_is_null=True)
+    if kind == "notnull":
+        return pc.invert(pc.is_null(cols[node[1]], nan_is_null=True))
+    arr = cols[node[2] if kind == "cmp" else node[1]]
+    try:
+        if kind == "in":
+            values = [_scalar(v, arr) for v in node[2]]
+            # valores con el tipo de la columna (o el común, p. ej. int8 contra 1.5)
+            common = pa.array([v.as_py() for v in values])
+            if common.type != arr.type and pa.types.is_floating(common.type):
+                arr = pc.cast(arr, common.type)
+            found = pc.is_in(arr, value_set=_value_set(common, arr.type))
+            # is_in da false para null: se deja null para que `not in` tampoco lo deje pasar
+            return pc.if_else(pc.is_null(arr), pa.scalar(None, pa.bool_()), found)
+        return getattr(pc, COMPARISONS[node[1]])(arr, _scalar(node[3], arr))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:
+        raise QueryError(f"no se puede evaluar {to_text(node)}: {e}")
+
+
+def row_mask(df: pd.DataFrame, where: tuple) -> np.ndarray:
+    """Máscara booleana (numpy) de las filas que cumplen el predicado."""
+    names = {str(c): c for c in df.columns}
+    missing = sorted(_columns_in(where, set()) - names.keys())
+    if missing:
+        raise QueryError(f"columnas desconocidas en where: {', '.join(missing)}")
+    cols = {name: _arrow(df[names[name]]) for name in _columns_in(where, set())}
+    mask = pc.fill_null(_mask(where, cols), False)
+    return mask.to_numpy(zero_copy_only=False).astype(bool, copy=False)
+
+
+def apply_query(df: pd.DataFrame, where: tuple | None, columns: tuple | None) -> pd.DataFrame:
+    """Filas que cumplen `where` (antes de proyectar) y sólo `columns`, con índice 0..n-1."""
+    if columns is not None:
+        names = {str(c): c for c in df.columns}
+        missing = [c for c in columns if c not in names]
+        if missing:
+            raise QueryError(f"columnas desconocidas: {', '.join(missing)}")
+    if where is not None:
+        df = df[row_mask(df, where)].reset_index(drop=True)
+    if columns is not None:
+        df = df[[names[c] for c in columns]]
+    return df
+
+
+# ---------- cache de resultados ----------
+class QueryCache:
+    """
+    LRU de resultados por (where normalizado, columnas): en la API, un
+    snapshot hijo con el DataFrame filtrado y sus derivados. Hay una por
+    versión del dataset (vive en snapshot.memo), así que nunca sirve un
+    resultado de otra versión; max_entries acota la memoria de los
+    resultados y de todo lo calculado sobre ellos.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        value = compute()
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return value
@@ -0,0 +1,212 @@
+# api/renderers.py
+"""
+Renderers de DRF del proyecto (REST_FRAMEWORK en settings). Todos anotan su
+tiempo como etapa "render" del request (api/metrics.py).
+- NumpyJSONRenderer: JSON que acepta numpy/pandas tal cual. Los arrays
+  numéricos se codifican en bloque con pyarrow (cast a texto con la
+  representación más corta que vuelve al mismo float, y join), sin un
+  objeto Python por elemento; NaN/±inf salen como null, también en escalares.
+- ArrowIPCRenderer (Accept: application/vnd.apache.arrow.stream o
+  ?format=arrow): una tabla Arrow IPC. Un dict da una fila con una columna
+  por clave (los arrays como list<T>, sin copiar); una lista de dicts da
+  una fila por elemento.
+- MessagePackRenderer (Accept: application/msgpack o ?format=msgpack): sólo
+  si msgpack está instalado. Los arrays numéricos van como
+  {"dtype", "shape", "data"} con los bytes crudos del array.
+"""
+import json, re, uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from rest_framework.compat import INDENT_SEPARATORS, LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .metrics import stage
+
+try:
+    import msgpack
+except ImportError:     # dependencia opcional: sin ella no se ofrece el formato
+    msgpack = None
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+# ---------- conversión a tipos de Python / arrays ----------
+def _as_ndarray(obj) -> np.ndarray | None:
+    """El array numpy (numérico o bool) detrás de obj, o None si no lo es."""
+    if isinstance(obj, (pd.Series, pd.Index)):
+        if not isinstance(obj.dtype, np.dtype):
+            return None     # nullable/categorical/strings: van como lista
+        obj = obj.to_numpy()
+    if isinstance(obj, np.ndarray) and obj.dtype.kind in "biuf" and obj.ndim in (1, 2):
+        return obj
+    return None
+
+
+class _Refs:
+    """Arrays apartados por _plain; en el documento queda un marcador de texto."""
+
+    def __init__(self):
+        self.token = uuid.uuid4().hex
+        self.arrays = []
+        self.pattern = re.compile(rb'"' + self.token.encode() + rb'(\d+)"')
+
+    def add(self, arr: np.ndarray) -> str:
+        self.arrays.append(arr)
+        return f"{self.token}{len(self.arrays) - 1}"
+
+    def splice(self, doc: bytes) -> bytes:
+        """Reemplaza cada marcador (con sus comillas) por el array codificado."""
+        return self.pattern.sub(lambda m: encode_array(self.arrays[int(m.group(1))]), doc)
+
+
+def _plain(obj, arrays: _Refs | None = None):
+    """
+    obj con tipos JSON de Python: escalares numpy → int/float/bool, NaN/inf →
+    None, Series/DataFrame → listas/dicts. Con `arrays`, los arrays numéricos
+    se apartan ahí y en su lugar queda un marcador (ver NumpyJSONRenderer).
+    """
+    if isinstance(obj, dict):
+        return {k: _plain(v, arrays) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v, arrays) for v in obj]
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, np.generic):
+        if obj.dtype.kind == "f":
+            return float(obj) if np.isfinite(obj) else None
+        if obj.dtype.kind in "biu":
+            return obj.item()
+        if obj.dtype.kind == "M":
+            return None if np.isnat(obj) else pd.Timestamp(obj).isoformat()
+        if obj.dtype.kind == "m":
+            return None if np.isnat(obj) else pd.Timedelta(obj).isoformat()
+        return _plain(obj.item(), arrays)
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, pd.DataFrame):
+        return {str(c): _plain(obj[c], arrays) for c in obj.columns}
+    arr = _as_ndarray(obj)
+    if arr is not None:
+        if arrays is None:
+            return _plain(arr.tolist())
+        return arrays.add(arr)
+    if isinstance(obj, (np.ndarray, pd.Series, pd.Index)):
+        return _plain(obj.tolist(), arrays)
+    return obj
+
+
+def encode_array(arr: np.ndarray) -> bytes:
+    """
+    Array numérico o bool 1-D/2-D como JSON, vectorizado con pyarrow: cada
+    float sale con su representación más corta exacta y NaN/±inf como null.
+    """
+    if arr.ndim == 2:
+        return b"[" + b",".join(encode_array(row) for row in arr) + b"]"
+    if not arr.size:
+        return b"[]"
+    if arr.dtype == np.float16:
+        arr = arr.astype(np.float32)
+    values = pa.array(arr)
+    if arr.dtype.kind == "f":
+        values = pc.if_else(pc.is_finite(values), values, pa.scalar(None, values.type))
+    text = pc.cast(values, pa.string())
+    if arr.dtype.kind == "f":
+        # como repr(float): 7.0 y no 7, para que el cliente siga viendo floats
+        integral = pc.match_substring_regex(text, r"^-?\d+$")
+        text = pc.if_else(integral, pc.binary_join_element_wise(text, ".0", ""), text)
+    text = text.fill_null("null")
+    joined = pc.binary_join(pa.ListArray.from_arrays(pa.array([0, len(text)], pa.int32()), text), ",")
+    return b"[" + joined[0].as_buffer().to_pybytes() + b"]"
+
+
+# ---------- renderers ----------
+class NumpyJSONRenderer(JSONRenderer):
+    """JSONRenderer con numpy/pandas vectorizado y NaN → null."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        with stage("render"):
+            renderer_context = renderer_context or {}
+            indent = self.get_indent(accepted_media_type, renderer_context)
+            if indent is None:
+                separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+            else:
+                separators = INDENT_SEPARATORS
+
+            # los arrays numéricos se apartan y se escriben en bloque al final
+            refs = _Refs()
+            ret = json.dumps(_plain(data, refs), cls=self.encoder_class,
+                             indent=indent, ensure_ascii=self.ensure_ascii,
+                             allow_nan=False, separators=separators)
+            ret = ret.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+            return refs.splice(ret) if refs.arrays else ret
+
+
+def _arrow_column(value) -> pa.Array:
+    """Una fila: arrays numéricos como list<T> sin copiar; el resto inferido por pyarrow."""
+    arr = _as_ndarray(value)
+    if arr is not None and arr.ndim == 1:
+        return pa.ListArray.from_arrays(pa.array([0, len(arr)], pa.int32()), pa.array(arr))
+    plain = _plain(value)
+    try:
+        return pa.array([plain])
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # tipos mezclados (p. ej. etiquetas numéricas y de texto): JSON en texto
+        return pa.array([json.dumps(plain)])
+
+
+def arrow_table(data) -> pa.Table:
+    """Tabla Arrow para el payload de una vista (ver docstring del módulo)."""
+    if isinstance(data, list) and all(isinstance(item, dict) for item in data):
+        return pa.Table.from_pylist(_plain(data))
+    if not isinstance(data, dict):
+        data = {"values": data}
+    return pa.table({str(k): _arrow_column(v) for k, v in data.items()})
+
+
+def ipc_stream(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class ArrowIPCRenderer(BaseRenderer):
+    media_type = ARROW_STREAM
+    format = "arrow"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        with stage("render"):
+            return ipc_stream(arrow_table(data))
+
+
+def _msgpack_default(obj):
+    arr = _as_ndarray(obj)
+    if arr is not None:
+        arr = np.ascontiguousarray(arr)
+        return {"dtype": arr.dtype.str, "shape": list(arr.shape), "data": arr.tobytes()}
+    plain = _plain(obj)
+    if plain is obj:
+        raise TypeError(f"tipo no serializable: {type(obj).__name__}")
+    return plain
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        with stage("render"):
+            return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
@@ -0,0 +1,53 @@
+# api/sampling.py
+"""
+Muestras de filas para los endpoints interactivos.
+- uniform_sample: n filas al azar sin reemplazo (semilla fija: misma muestra
+  para la misma versión del dataset).
+- stratified_sample: asignación proporcional por estrato (mín. 1 fila por
+  estrato), tomando las filas en un orden aleatorio fijo.
+Los tamaños se redondean a una escalera 1-2-5 para que la cache por versión
+(snapshot.memo) no crezca con cada valor distinto de ?sample=.
+"""
+import numpy as np
+import pandas as pd
+
+SAMPLE_MIN = 1_000
+SAMPLE_MAX = 1_000_000
+SEED = 12345
+
+
+def normalize_size(n: int) -> int:
+    """Redondea hacia arriba a 1k, 2k, 5k, 10k, ... acotado a [SAMPLE_MIN, SAMPLE_MAX]."""
+    n = max(SAMPLE_MIN, min(int(n), SAMPLE_MAX))
+    step = 10 ** (len(str(n)) - 1)
+    for m in (1, 2, 5, 10):
+        if m * step >= n:
+            return min(m * step, SAMPLE_MAX)
+    return SAMPLE_MAX
+
+
+def uniform_sample(df: pd.DataFrame, n: int, seed: int = SEED) -> pd.DataFrame:
+    if n >= len(df):
+        return df
+    rng = np.random.default_rng(seed)
+    idx = np.sort(rng.choice(len(df), size=n, replace=False))
+    return df.iloc[idx]
+
+
+def stratified_sample(df: pd.DataFrame, n: int, by, seed: int = SEED) -> pd.DataFrame:
+    if n >= len(df):
+        return df
+    codes, uniques = pd.factorize(df[by], use_na_sentinel=False)
+    sizes = np.bincount(codes, minlength=len(uniques))
+    quota = np.maximum(1, np.floor(sizes * (n / len(df)))).astype(np.int64)
+    # orden aleatorio fijo; dentro de cada estrato se quedan las primeras `quota` filas
+    order = np.random.default_rng(seed).permutation(len(df))
+    rank = pd.Series(codes[order]).groupby(codes[order]).cumcount().to_numpy()
+    keep = order[rank < quota[codes[order]]]
+    return df.iloc[np.sort(keep)]
+
+
+def take_sample(df: pd.DataFrame, n: int, stratify=None) -> pd.DataFrame:
+    if stratify is not None:
+        return stratified_sample(df, n, stratify)
+    return uniform_sample(df, n)
@@ -0,0 +1,129 @@
+# api/shared.py
+"""
+Store de datasets compartido entre procesos (workers de gunicorn).
+Cada dataset subido se escribe una vez como Arrow IPC en SHARED_STORE_DIR
+(por defecto /dev/shm, o sea memoria compartida POSIX) y los workers lo
+abren con memory-map: todos ven los mismos uploads y las páginas existen
+una sola vez en RAM sin importar cuántos workers haya.
+Un índice JSON en el mismo directorio mapea dataset_id → segmento, nombre,
+versión y tamaño. Se reescribe de forma atómica bajo un flock, así que los
+lectores no necesitan lock. Si se pasa de max_bytes, se borran los segmentos
+más viejos. Los workers que ya los tenían mapeados siguen leyéndolos hasta
+soltarlos.
+"""
+import fcntl, json, os, threading, time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from .columnar import read_ipc, write_ipc
+
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+
+
+class SharedStore:
+    def __init__(self, root: str, max_bytes: int | None = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._index_path = os.path.join(root, INDEX_FILE)
+        # índice leído por última vez: ((inode, mtime_ns, tamaño), contenido)
+        self._cached = (None, {})
+        self._local = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    # ---------- índice ----------
+    def _read_index(self) -> dict:
+        try:
+            st = os.stat(self._index_path)
+        except FileNotFoundError:
+            return {}
+        # cada escritura es un archivo nuevo (rename), así que cambia el inode
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._local:
+            if self._cached[0] == stamp:
+                return self._cached[1]
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        with self._local:
+            self._cached = (stamp, index)
+        return index
+
+    def _write_index(self, index: dict) -> None:
+        tmp = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, self._index_path)
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.root, LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # ---------- API pública ----------
+    def publish(self, dataset_id: str, df: pd.DataFrame, name: str | None = None) -> int | None:
+        """
+        Escribe el dataset en memoria compartida y lo registra en el índice.
+        Devuelve su versión (común a todos los procesos) o None si no se pudo
+        pasar a Arrow; en ese caso el dataset queda sólo en el proceso local.
+        """
+        segment = f"{dataset_id}.arrow"
+        path = os.path.join(self.root, segment)
+        if not write_ipc(path, df):
+            return None
+        version = time.time_ns()
+        with self._locked():
+            index = dict(self._read_index())
+            index[dataset_id] = {"segment": segment, "name": name, "version": version,
+                                 "rows": int(df.shape[0]), "cols": int(df.shape[1]),
+                                 "bytes": os.path.getsize(path)}
+            self._trim(index, keep=dataset_id)
+            self._write_index(index)
+        return version
+
+    def info(self, dataset_id: str) -> dict | None:
+        return self._read_index().get(dataset_id)
+
+    def __contains__(self, dataset_id) -> bool:
+        return dataset_id in self._read_index()
+
+    def load(self, dataset_id: str) -> tuple[pd.DataFrame, dict] | None:
+        """(DataFrame mapeado, entrada del índice) o None si ya no existe."""
+        info = self.info(dataset_id)
+        if info is None:
+            return None
+        try:
+            return read_ipc(os.path.join(self.root, info["segment"])), info
+        except OSError:
+            return None
+
+    def stats(self) -> dict:
+        index = self._read_index()
+        return {"root": self.root, "max_bytes": self.max_bytes,
+                "bytes": sum(i["bytes"] for i in index.values()),
+                "datasets": len(index)}
+
+    # ---------- internos ----------
+    def _trim(self, index: dict, keep: str) -> None:
+        """Borra los segmentos más viejos hasta entrar en max_bytes."""
+        if not self.max_bytes:
+            return
+        total = sum(i["bytes"] for i in index.values())
+        for dataset_id in sorted(index, key=lambda k: index[k]["version"]):
+            if total <= self.max_bytes:
+                break
+            if dataset_id == keep:
+                continue
+            info = index.pop(dataset_id)
+            total -= info["bytes"]
+            try:
+                os.remove(os.path.join(self.root, info["segment"]))
+            except OSError:
+                pass
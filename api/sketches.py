@@ -0,0 +1,286 @@
+# api/sketches.py
+"""
+Sketches mergeables para el modo aproximado (?approx=1 / APPROX_STATS):
+- HyperLogLog: valores distintos con error relativo ~1.04/sqrt(2^p).
+- KLLSketch: cuantiles con error de rango ~2.3/k^0.97 (fórmula de DataSketches).
+- TopKSketch: Space-Saving para los valores más frecuentes; cada conteo
+  trae su cota de error (exacto mientras los distintos entren en el resumen).
+- ColumnSketch: junta todo lo anterior para una columna; se alimenta por chunks
+  y dos sketches de la misma columna se combinan con merge().
+Todos trabajan sobre arrays de numpy (sin bucles por elemento en Python).
+"""
+import numpy as np
+import pandas as pd
+
+HLL_P = 14          # 2^14 registros (16 KB por columna), error ~0.8%
+KLL_K = 200         # error de rango ~1.3%
+TOPK_CAPACITY = 4096 # contadores del resumen de frecuentes (error <= n / 4096)
+
+
+def _hash_values(s: pd.Series) -> np.ndarray:
+    """
+    Hash de 64 bits por valor (no nulos), estable entre chunks y entre dtypes:
+    como value_hashes (api/duplicates.py), números y booleanos se hashean
+    como float64, así int8 5, int64 5 y 5.0 caen en el mismo registro aunque
+    un append ensanche la columna después.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype(s.dtype.categories.dtype)
+    if s.dtype.kind in "iufb":
+        s = pd.Series(s.to_numpy(dtype=np.float64, na_value=np.nan))
+    return pd.util.hash_pandas_object(s, index=False).to_numpy()
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """bit_length de uint64 vectorizado (exacto: cada mitad cabe en un float64)."""
+    hi = (x >> np.uint64(32)).astype(np.float64)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1])
+
+
+class HyperLogLog:
+    def __init__(self, p: int = HLL_P):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        if not hashes.size:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        q = 64 - self.p
+        idx = (hashes >> np.uint64(q)).astype(np.intp)
+        rest = hashes & np.uint64((1 << q) - 1)
+        rank = (q - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = float(self.registers.size)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            est = m * np.log(m / zeros)   # linear counting para cardinalidades bajas
+        return int(round(est))
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / np.sqrt(self.registers.size)
+
+
+class KLLSketch:
+    def __init__(self, k: int = KLL_K, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        while True:
+            over = [h for h in range(len(self.levels)) if self.levels[h].size > self._capacity(h)]
+            if not over:
+                return
+            h = over[0]
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            buf = np.sort(self.levels[h])
+            keep = buf[-1:] if buf.size % 2 else buf[:0]
+            buf = buf[:buf.size - keep.size]
+            promoted = buf[int(self._rng.integers(2))::2]
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            self.levels[h] = keep
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return
+        self.n += int(values.size)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+
+    def sorted_items(self):
+        """Items del sketch ordenados y su peso acumulado."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(lv.size, 1 << h, dtype=np.float64)
+                                  for h, lv in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs) -> np.ndarray:
+        items, cum = self.sorted_items()
+        if not items.size:
+            return np.full(len(qs), np.nan)
+        targets = np.asarray(qs, dtype=np.float64) * cum[-1]
+        pos = np.searchsorted(cum, targets, side="left")
+        return items[np.minimum(pos, items.size - 1)]
+
+    def cdf(self, points) -> np.ndarray:
+        """Fracción estimada de valores <= cada punto."""
+        items, cum = self.sorted_items()
+        if not items.size:
+            return np.zeros(len(points))
+        pos = np.searchsorted(items, np.asarray(points, dtype=np.float64), side="right")
+        return np.where(pos > 0, cum[np.maximum(pos - 1, 0)], 0.0) / cum[-1]
+
+    @property
+    def rank_error(self) -> float:
+        if self.n <= self.k:
+            return 0.0
+        return 2.296 / self.k ** 0.9723
+
+
+class TopKSketch:
+    """
+    Space-Saving mergeable (Agarwal et al., "Mergeable summaries") para los
+    valores más frecuentes. Guarda hasta `capacity` contadores; cada conteo
+    es una sobreestimación y `errors` acota cuánto: el conteo real está en
+    [count - error, count]. Un valor sin contador apareció como mucho `floor`
+    veces, y floor <= n / capacity. Mientras la columna tenga menos de
+    `capacity` valores distintos todo es exacto (error 0).
+    Cada chunk llega ya contado (un value_counts, ver ColumnSketch) y sólo
+    sus `capacity` valores más frecuentes entran al resumen.
+    """
+
+    def __init__(self, capacity: int = TOPK_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+        self.floor = 0
+        self.n = 0
+
+    def _absorb(self, counts: pd.Series, errors: pd.Series, floor: int, n: int) -> None:
+        """Combina con otro resumen (counts/errors por valor, floor de los ausentes)."""
+        if self.counts.empty and not self.floor:
+            merged, err = counts, errors
+        else:
+            keys = self.counts.index.union(counts.index)
+            # un valor que falta en un lado pudo aparecer ahí hasta `floor` veces
+            merged = (self.counts.reindex(keys, fill_value=self.floor)
+                      + counts.reindex(keys, fill_value=floor))
+            err = (self.errors.reindex(keys, fill_value=self.floor)
+                   + errors.reindex(keys, fill_value=floor))
+        self.floor += floor
+        self.n += n
+        if merged.size > self.capacity:
+            order = np.argsort(-merged.to_numpy(), kind="stable")
+            self.floor = max(self.floor, int(merged.iloc[order[self.capacity]]))
+            keep = order[:self.capacity]
+            merged, err = merged.iloc[keep], err.iloc[keep]
+        self.counts = merged.astype(np.int64)
+        self.errors = err.astype(np.int64)
+
+    def update(self, vc: pd.Series, n: int) -> None:
+        """Agrega los conteos por valor (value_counts) de un chunk de n filas."""
+        floor = 0
+        if vc.size > self.capacity:
+            # los que no entran quedan acotados por el mayor conteo descartado
+            top = vc.nlargest(self.capacity + 1, keep="first")
+            floor = int(top.iloc[-1])
+            vc = top.iloc[:-1]
+        self._absorb(vc, pd.Series(0, index=vc.index, dtype=np.int64), floor, n)
+
+    def merge(self, other: "TopKSketch") -> None:
+        self._absorb(other.counts, other.errors, other.floor, other.n)
+
+    def top(self, k: int) -> tuple[pd.Series, pd.Series]:
+        """(conteos, errores) de los k más frecuentes, con etiquetas de texto."""
+        labels = self.counts.index.map(str)
+        counts = self.counts.groupby(labels, sort=False, observed=True).sum()
+        errors = self.errors.groupby(labels, sort=False, observed=True).sum()
+        counts = counts.sort_values(ascending=False, kind="stable").head(k)
+        return counts, errors.reindex(counts.index)
+
+
+class ColumnSketch:
+    """Estadísticos mergeables de una columna: nulos, distintos, cuantiles, top-k, momentos."""
+
+    def __init__(self, numeric: bool):
+        self.numeric = numeric
+        self.rows = 0
+        self.nulls = 0
+        self.hll = HyperLogLog()
+        self.kll = KLLSketch() if numeric else None
+        self.topk = None if numeric else TopKSketch()
+        # momentos (Chan et al.) y extremos de los valores finitos: exactos y
+        # combinables; los ±inf sólo se cuentan
+        self.infinite = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, s: pd.Series) -> None:
+        self.rows += int(s.size)
+        if not self.numeric:
+            self._update_categorical(s)
+            return
+        mask = s.isna().to_numpy()
+        self.nulls += int(mask.sum())
+        valid = s[~mask]
+        self.hll.update_hashes(_hash_values(valid))
+        x = valid.to_numpy(dtype=np.float64)
+        finite = np.isfinite(x)
+        if not finite.all():
+            self.infinite += int(x.size - finite.sum())
+            x = x[finite]
+        self.kll.update(x)
+        if x.size:
+            self._merge_moments(x.size, float(x.mean()), float(((x - x.mean()) ** 2).sum()),
+                                float(x.min()), float(x.max()))
+
+    def _update_categorical(self, s: pd.Series) -> None:
+        """
+        Un solo value_counts por chunk: da los nulos, alimenta el top-k y el
+        HLL hashea sólo los valores distintos del chunk (no cada fila).
+        """
+        try:
+            vc = s.value_counts(dropna=False, sort=False)
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                vc = vc[vc.to_numpy() > 0]      # categorías sin filas en el chunk
+            na = vc.index.isna()
+            self.nulls += int(vc[na].sum())
+            distinct = pd.Series(vc.index[~na])
+        except TypeError:
+            # valores no hasheables (listas, dicts): se cuentan por su texto
+            mask = s.isna().to_numpy()
+            self.nulls += int(mask.sum())
+            vc = s.astype(str).value_counts(dropna=False, sort=False)
+            distinct = pd.Series(s[~mask].astype(str).unique())
+        self.hll.update_hashes(_hash_values(distinct))
+        self.topk.update(vc, int(s.size))
+
+    def _merge_moments(self, n, mean, m2, lo, hi) -> None:
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    def merge(self, other: "ColumnSketch") -> None:
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.hll.merge(other.hll)
+        if self.numeric:
+            self.kll.merge(other.kll)
+            self.infinite += other.infinite
+            if other.count:
+                self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+        else:
+            self.topk.merge(other.topk)
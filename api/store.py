@@ -0,0 +1,237 @@
+# api/store.py
+import itertools, os, threading, time
+from collections import OrderedDict
+import pandas as pd
+
+from .metrics import cache_event
+
+# Contador global de generaciones: cada dataset activado recibe una versión nueva
+_VERSIONS = itertools.count(1)
+
+def next_version() -> int:
+    """Devuelve un número de versión nuevo (monótono en el proceso)."""
+    return next(_VERSIONS)
+
+
+class DatasetNotFound(KeyError):
+    """El dataset pedido no existe (o fue desalojado sin copia en disco)."""
+
+
+def _frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class DatasetSnapshot:
+    """
+    Vista consistente de un dataset: DataFrame + versión + cache de derivados.
+    memo() calcula cada derivado (perfil, gráficas...) una sola vez por versión.
+    """
+    __slots__ = ("dataset_id", "df", "name", "version", "_derived", "_lock")
+
+    def __init__(self, dataset_id, df, name, version, derived, lock):
+        self.dataset_id = dataset_id
+        self.df = df
+        self.name = name
+        self.version = version
+        self._derived = derived
+        self._lock = lock
+
+    def memo(self, key, fn):
+        """Devuelve fn(df) cacheado bajo `key`; se calcula una vez aunque haya concurrencia."""
+        try:
+            value = self._derived[key]
+            cache_event("memo", True)
+            return value
+        except KeyError:
+            pass
+        with self._lock:
+            hit = key in self._derived
+            if not hit:
+                self._derived[key] = fn(self.df)
+            cache_event("memo", hit)
+            return self._derived[key]
+
+    def child(self, df: pd.DataFrame) -> "DatasetSnapshot":
+        """
+        Snapshot de un DataFrame derivado de éste (p. ej. una consulta), misma
+        versión y con su propio cache de derivados: se libera junto con él.
+        """
+        return DatasetSnapshot(self.dataset_id, df, self.name, self.version, {}, threading.RLock())
+
+
+class _Entry:
+    __slots__ = ("dataset_id", "df", "name", "version", "nbytes", "rows", "cols",
+                 "spill_path", "shared", "hits", "misses", "last_access", "derived", "derived_lock")
+
+    def __init__(self, dataset_id, df, name, version, shared=False):
+        self.dataset_id = dataset_id
+        self.df = df
+        self.name = name
+        self.version = version
+        self.nbytes = _frame_nbytes(df)
+        self.rows, self.cols = df.shape
+        self.spill_path = None
+        # respaldado por el store compartido entre procesos: no hace falta spill
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self.last_access = time.time()
+        # derivados por versión (perfil, muestras, índices, consultas); no entran
+        # en nbytes, así que se descartan junto con el DataFrame al desalojarlo
+        self.derived = {}
+        self.derived_lock = threading.RLock()
+
+
+class DatasetRegistry:
+    """
+    Registro de DataFrames ya parseados, indexado por dataset_id.
+    - Entrega vistas de solo lectura (Copy-on-Write, sin copiar buffers; el
+      modo lo activa ApiConfig.ready al arrancar la app).
+    - Respeta un presupuesto total de memoria desalojando por LRU.
+    - Si hay spill_dir, lo desalojado se escribe a Parquet y se recarga al pedirlo.
+    - Al desalojar también se sueltan los derivados: el presupuesto cuenta
+      sólo DataFrames residentes, y un dataset en disco no retiene memoria.
+    """
+
+    def __init__(self, budget_bytes: int | None = None, spill_dir: str | None = None):
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir or None
+
+    # ---------- API pública ----------
+    def put(self, dataset_id: str, df: pd.DataFrame, name: str | None = None,
+            version: int | None = None, shared: bool = False) -> int:
+        """
+        Registra (o reemplaza) un dataset y devuelve su versión. `version` la fija
+        el store compartido para que sea la misma en todos los procesos.
+        """
+        entry = _Entry(dataset_id, df.copy(deep=False), name,
+                       version if version is not None else next_version(), shared)
+        with self._lock:
+            old = self._entries.pop(dataset_id, None)
+            if old is not None:
+                self._remove_spill(old)
+            self._entries[dataset_id] = entry
+            self._enforce_budget(keep=dataset_id)
+            return entry.version
+
+    def get(self, dataset_id: str) -> pd.DataFrame:
+        return self.snapshot(dataset_id).df
+
+    def snapshot(self, dataset_id: str) -> DatasetSnapshot:
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is None:
+                raise DatasetNotFound(dataset_id)
+            hit = entry.df is not None
+            if not hit:
+                entry.misses += 1
+                entry.df = self._load_spill(entry)
+                self._enforce_budget(keep=dataset_id)
+            else:
+                entry.hits += 1
+            cache_event("registry", hit)
+            entry.last_access = time.time()
+            self._entries.move_to_end(dataset_id)
+            return DatasetSnapshot(dataset_id, entry.df.copy(deep=False), entry.name,
+                                   entry.version, entry.derived, entry.derived_lock)
+
+    def __contains__(self, dataset_id) -> bool:
+        with self._lock:
+            return dataset_id in self._entries
+
+    def name(self, dataset_id: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            return entry.name if entry else None
+
+    def version(self, dataset_id: str) -> int:
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is None:
+                raise DatasetNotFound(dataset_id)
+            return entry.version
+
+    def drop(self, dataset_id: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(dataset_id, None)
+            if entry is not None:
+                self._remove_spill(entry)
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(e.nbytes for e in self._entries.values() if e.df is not None)
+
+    def stats(self) -> dict:
+        """Bytes residentes y hits/misses por dataset (orden LRU → MRU)."""
+        with self._lock:
+            items = [{
+                "dataset": e.dataset_id,
+                "name": e.name,
+                "version": e.version,
+                "rows": int(e.rows),
+                "cols": int(e.cols),
+                "resident": e.df is not None,
+                "resident_bytes": e.nbytes if e.df is not None else 0,
+                "spilled": e.spill_path is not None,
+                "shared": e.shared,
+                "hits": e.hits,
+                "misses": e.misses,
+            } for e in self._entries.values()]
+            return {
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": sum(i["resident_bytes"] for i in items),
+                "spill_dir": self.spill_dir,
+                "datasets": items,
+            }
+
+    # ---------- internos ----------
+    def _enforce_budget(self, keep: str) -> None:
+        if not self.budget_bytes:
+            return
+        resident = sum(e.nbytes for e in self._entries.values() if e.df is not None)
+        for dataset_id in list(self._entries):
+            if resident <= self.budget_bytes:
+                break
+            entry = self._entries[dataset_id]
+            if dataset_id == keep or entry.df is None:
+                continue
+            resident -= entry.nbytes
+            self._evict(entry)
+
+    def _evict(self, entry: _Entry) -> None:
+        # los snapshots ya entregados conservan el dict viejo hasta terminar
+        entry.derived = {}
+        if entry.shared:
+            # se vuelve a mapear desde el store compartido cuando se pida
+            self._entries.pop(entry.dataset_id, None)
+            entry.df = None
+            return
+        if self.spill_dir and entry.spill_path is None:
+            try:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                path = os.path.join(self.spill_dir, f"{entry.dataset_id}.parquet")
+                entry.df.to_parquet(path)
+                entry.spill_path = path
+            except Exception:
+                entry.spill_path = None
+        if entry.spill_path is None:
+            # sin copia en disco: se olvida por completo
+            self._entries.pop(entry.dataset_id, None)
+        entry.df = None
+
+    def _load_spill(self, entry: _Entry) -> pd.DataFrame:
+        try:
+            return pd.read_parquet(entry.spill_path)
+        except Exception as e:
+            self._entries.pop(entry.dataset_id, None)
+            raise DatasetNotFound(entry.dataset_id) from e
+
+    def _remove_spill(self, entry: _Entry) -> None:
+        if entry.spill_path:
+            try:
+                os.remove(entry.spill_path)
+            except OSError:
+                pass
+            entry.spill_path = None
@@ -0,0 +1,53 @@
+# api/tests/base.py
+"""Utilidades comunes de los tests: directorios temporales, un DataFrame mixto y el TestCase HTTP."""
+import shutil, tempfile
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+
+from .. import utils
+from ..httpcache import RESPONSE_CACHE
+from ..shared import SharedStore
+
+
+def tmp_dir(test) -> str:
+    path = tempfile.mkdtemp(prefix="api-tests-")
+    test.addCleanup(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def mixed_frame(rows: int = 400, seed: int = 0) -> pd.DataFrame:
+    """Mezcla de dtypes con NaN, ±inf, object mezclado y categorías."""
+    rng = np.random.default_rng(seed)
+    floats = rng.normal(size=rows)
+    floats[::17] = np.nan
+    floats[3], floats[5] = np.inf, -np.inf
+    mixed = np.array([i if i % 3 else f"t{i % 7}" for i in range(rows)], dtype=object)
+    mixed[::11] = None
+    return pd.DataFrame({
+        "f": floats,
+        "i": rng.integers(0, 50, size=rows),
+        "mixed": mixed,
+        "cat": pd.Categorical(rng.choice(["a", "b", "c"], size=rows), categories=["a", "b", "c", "z"]),
+        "s": rng.choice(np.array(["x", "y", None], dtype=object), size=rows),
+    })
+
+
+class ApiTestCase(TestCase):
+    """Requests contra /api/* con store compartido propio y sin cache de uploads parseados."""
+
+    def setUp(self):
+        patches = [mock.patch.object(utils, "_SHARED", SharedStore(tmp_dir(self))),
+                   mock.patch.object(utils, "_PARSED", None)]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        RESPONSE_CACHE.clear()
+        self.addCleanup(RESPONSE_CACHE.clear)
+
+    def register(self, df: pd.DataFrame, name: str = "test.csv") -> str:
+        dataset_id = utils.set_df(df, name=name)
+        self.addCleanup(utils._REGISTRY.drop, dataset_id)
+        return dataset_id
@@ -0,0 +1,47 @@
+import os, time
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+
+from ..columnar import load_columnar, read_ipc, write_ipc
+from .base import tmp_dir
+
+
+class ColumnarTests(TestCase):
+    def test_ipc_round_trip(self):
+        path = os.path.join(tmp_dir(self), "df.arrow")
+        df = pd.DataFrame({"v": np.arange(10), "s": list("abcdefghij")})
+        self.assertTrue(write_ipc(path, df, batch_rows=3))
+        pd.testing.assert_frame_equal(read_ipc(path), df, check_dtype=False)
+
+    def test_sidecar_hit_and_invalidation(self):
+        root = tmp_dir(self)
+        cache_dir = os.path.join(root, "cache")
+        csv = os.path.join(root, "data.csv")
+        pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]}).to_csv(csv, index=False)
+        reader = mock.Mock(side_effect=pd.read_csv)
+
+        first = load_columnar(csv, cache_dir, reader)
+        second = load_columnar(csv, cache_dir, reader)
+        self.assertEqual(reader.call_count, 1)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        pd.DataFrame({"a": [9], "b": ["w"]}).to_csv(csv, index=False)
+        os.utime(csv, ns=(time.time_ns() + 10**9,) * 2)
+        third = load_columnar(csv, cache_dir, reader)
+        self.assertEqual(reader.call_count, 2)
+        self.assertEqual(third["a"].tolist(), [9])
+        # el sidecar viejo se borra
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+    def test_variants_do_not_share_sidecar(self):
+        root = tmp_dir(self)
+        csv = os.path.join(root, "data.csv")
+        pd.DataFrame({"a": [1, 2]}).to_csv(csv, index=False)
+        reader = mock.Mock(side_effect=pd.read_csv)
+        load_columnar(csv, os.path.join(root, "cache"), reader, variant="raw")
+        load_columnar(csv, os.path.join(root, "cache"), reader, variant="compact")
+        self.assertEqual(reader.call_count, 2)
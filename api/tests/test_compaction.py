@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+
+from ..compaction import ARROW_STRING, compact_frame
+from .base import ApiTestCase
+
+
+class CompactionTests(TestCase):
+    def test_dtypes_and_values(self):
+        df = pd.DataFrame({
+            "small": np.arange(100, dtype=np.int64),
+            "wide": np.arange(100, dtype=np.int64) * 10**6,
+            "half": np.arange(100, dtype=np.float64) / 2,
+            "exact": np.linspace(0, 1, 100),
+            "yn": np.where(np.arange(100) % 2, "yes", "no").astype(object),
+            "ids": np.array([f"id{i}" for i in range(100)], dtype=object),
+            "mixed": np.array([1, "a"] * 50, dtype=object),
+        })
+        out = compact_frame(df)
+        self.assertEqual(str(out["small"].dtype), "int8")
+        self.assertEqual(str(out["wide"].dtype), "int32")
+        self.assertEqual(out["half"].dtype, np.float32)
+        self.assertEqual(out["exact"].dtype, np.float64)     # float32 perdería precisión
+        # sí/no se queda con sus etiquetas (category), no se vuelve bool
+        self.assertIsInstance(out["yn"].dtype, pd.CategoricalDtype)
+        self.assertEqual(out["mixed"].dtype, object)
+        for col in df.columns:
+            self.assertEqual(out[col].astype(object).tolist(), df[col].tolist(), col)
+
+    def test_high_cardinality_text_goes_to_arrow(self):
+        s = pd.Series([f"v{i}" for i in range(5_000)], dtype=object)
+        self.assertEqual(compact_frame(s.to_frame("s"))["s"].dtype, ARROW_STRING)
+
+
+class BoolDistributionTests(ApiTestCase):
+    def test_yes_no_and_bool_columns_are_label_bars(self):
+        df = pd.DataFrame({"yn": ["yes", "no", "yes", None] * 25, "flag": [True, False, True, True] * 25})
+        dataset_id = self.register(compact_frame(df))
+        for col, labels in (("yn", {"yes", "no", "nan"}), ("flag", {"True", "False"})):
+            body = self.client.get(f"/api/distribution/?dataset={dataset_id}&column={col}").json()
+            self.assertFalse(body["numeric"], col)
+            self.assertEqual(set(body["labels"]), labels, col)
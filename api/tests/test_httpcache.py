@@ -0,0 +1,37 @@
+from .. import utils
+from .base import ApiTestCase, mixed_frame
+
+
+class ETagTests(ApiTestCase):
+    def test_not_modified_and_new_version(self):
+        dataset_id = self.register(mixed_frame())
+        url = f"/api/summary/?dataset={dataset_id}"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], etag)
+        cached = self.client.get(url)
+        self.assertEqual(cached.content, first.content)
+
+        # otra query u otro Accept → otro ETag
+        self.assertNotEqual(self.client.get(url + "&where=i>10")["ETag"], etag)
+        self.assertNotEqual(self.client.get(url, HTTP_ACCEPT="application/vnd.apache.arrow.stream")["ETag"], etag)
+
+        # nueva versión del mismo dataset_id → el ETag viejo ya no sirve
+        utils.set_df(mixed_frame(seed=1), name="test.csv", dataset_id=dataset_id)
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh["ETag"], etag)
+
+    def test_query_order_does_not_change_etag(self):
+        dataset_id = self.register(mixed_frame())
+        a = self.client.get(f"/api/distribution/?dataset={dataset_id}&column=f&bins=7")
+        b = self.client.get(f"/api/distribution/?bins=7&column=f&dataset={dataset_id}")
+        self.assertEqual(a["ETag"], b["ETag"])
+
+    def test_unknown_dataset_is_not_cached(self):
+        resp = self.client.get("/api/summary/?dataset=nope")
+        self.assertFalse(resp.has_header("ETag"))
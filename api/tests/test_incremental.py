@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+from django.test import TestCase
+
+from ..incremental import AppendState
+from ..profiling import build_profile
+from .base import tmp_dir
+
+
+class AppendStateTests(TestCase):
+    def setUp(self):
+        self.path = os.path.join(tmp_dir(self), "log.csv")
+        with open(self.path, "w") as f:
+            f.write("v,name\n" + "".join(f"{i % 7 - 1},n{i % 3}\n" for i in range(70)))
+        df = pd.read_csv(self.path)
+        # como lo deja la compactación de dtypes
+        df["v"] = df["v"].astype("int8")
+        df["name"] = df["name"].astype("category")
+        self.state = AppendState.open(self.path, df, os.path.getsize(self.path))
+
+    def append(self, text: str) -> bool | None:
+        with open(self.path, "a") as f:
+            f.write(text)
+        return self.state.refresh()
+
+    def test_append_matches_full_read(self):
+        before = self.state.df
+        self.assertTrue(self.append("100,n1\n2,n9\n"))
+        full = pd.read_csv(self.path)
+        self.assertEqual(self.state.df["v"].tolist(), full["v"].tolist())
+        self.assertEqual(self.state.df["name"].astype(str).tolist(), full["name"].tolist())
+        # el snapshot anterior sigue viendo su prefijo
+        self.assertEqual(len(before), 70)
+        self.assertEqual(before["v"].tolist(), full["v"].tolist()[:70])
+
+    def test_widened_column_keeps_distinct_count(self):
+        # un nulo lleva la columna de int8 a float: los valores viejos deben
+        # seguir cayendo en los mismos registros del HLL
+        self.assertTrue(self.append("0,n0\n1,n1\n,n2\n3,n0\n"))
+        self.assertEqual(self.state.df["v"].dtype.kind, "f")
+        approx = self.state.profile()["by_name"]
+        exact = build_profile(self.state.df, workers=1)["by_name"]
+        for col in ("v", "name"):
+            self.assertEqual(approx[col]["unique"], exact[col]["unique"], col)
+            self.assertEqual(approx[col]["nulls"], exact[col]["nulls"], col)
+
+    def test_partial_line_and_rewrite(self):
+        self.assertFalse(self.append("5,n"))
+        self.assertTrue(self.append("1\n"))
+        self.assertEqual(self.state.df["name"].iloc[-1], "n1")
+        with open(self.path, "w") as f:
+            f.write("v,name\n1,a\n")
+        self.assertIsNone(self.state.refresh())
@@ -0,0 +1,32 @@
+"""Volcados de métricas entre procesos (api/metrics.py)."""
+import os, subprocess, sys
+
+from django.test import TestCase, override_settings
+
+from .. import metrics
+from .base import tmp_dir
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+class MultiprocDirTests(TestCase):
+    def test_clear_stale_keeps_current_run(self):
+        root = tmp_dir(self)
+        dead = _dead_pid()
+        names = {
+            "previous_run": f"{dead}-{dead}-1.json",
+            "restarted_worker": f"{os.getpid()}-{dead}-2.json",
+            "live_worker": f"{dead}-{os.getpid()}-3.json",
+            "old_format": f"{dead}-4",
+        }
+        for name in names.values():
+            with open(os.path.join(root, name), "w") as f:
+                f.write('{"counters": [], "histograms": []}')
+        with override_settings(METRICS_MULTIPROC_DIR=root):
+            metrics.clear_stale()
+        self.assertEqual(sorted(os.listdir(root)),
+                         sorted([names["restarted_worker"], names["live_worker"]]))
@@ -0,0 +1,22 @@
+"""/api/overview/: todos los paneles sobre un mismo snapshot."""
+from .base import ApiTestCase, mixed_frame
+
+
+class OverviewTests(ApiTestCase):
+    def test_panels_match_individual_endpoints(self):
+        dataset_id = self.register(mixed_frame())
+        body = self.client.get(f"/api/overview/?dataset={dataset_id}&panels=summary,nulls").json()
+        self.assertEqual(set(body["panels"]), {"summary", "nulls"})
+        summary = self.client.get(f"/api/summary/?dataset={dataset_id}").json()
+        self.assertEqual(body["panels"]["summary"]["dup_rows"], summary["dup_rows"])
+
+    def test_bad_parameters_are_panel_errors(self):
+        dataset_id = self.register(mixed_frame())
+        resp = self.client.get(f"/api/overview/?dataset={dataset_id}&column=f&bins=abc")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("error", resp.json()["panels"]["distribution"])
+        self.assertIn("rows", resp.json()["panels"]["summary"])
+        resp = self.client.get(f"/api/distribution/?dataset={dataset_id}&column=f&top=x")
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get(f"/api/overview/?dataset={dataset_id}&panels=nope")
+        self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,101 @@
+import multiprocessing as mp
+import os, threading
+from unittest import skipUnless
+
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+
+from ..profiling import PARALLEL_MIN_CELLS, QUANTILES, TOP_VALUES, build_profile
+from .base import mixed_frame
+
+
+# hilos vivos en cada fork del proceso, mientras un test lo pide
+_FORK_THREADS = None
+
+
+def _record_fork_threads():
+    if _FORK_THREADS is not None:
+        _FORK_THREADS.append([t.name for t in threading.enumerate()])
+
+
+os.register_at_fork(before=_record_fork_threads)
+
+
+class ProfilingTests(TestCase):
+    def assertNumericParity(self, col: dict, s: pd.Series):
+        finite = s[np.isfinite(s.astype(float))]
+        self.assertEqual(col["count"], int(s.count()))
+        self.assertEqual(col["nulls"], int(s.isna().sum()))
+        self.assertEqual(col["unique"], int(s.nunique(dropna=False)))
+        self.assertAlmostEqual(col["min"], float(finite.min()))
+        self.assertAlmostEqual(col["max"], float(finite.max()))
+        self.assertAlmostEqual(col["mean"], float(finite.mean()))
+        self.assertAlmostEqual(col["std"], float(finite.std()))
+        for q in QUANTILES:
+            self.assertAlmostEqual(col["quantiles"][q], float(finite.quantile(q)))
+        self.assertEqual(sum(col["hist"]["counts"]), len(finite))
+
+    def test_numeric_parity_with_pandas(self):
+        df = mixed_frame()
+        prof = build_profile(df, workers=1)
+        self.assertNumericParity(prof["by_name"]["f"], df["f"])
+        self.assertNumericParity(prof["by_name"]["i"], df["i"])
+        self.assertEqual(prof["rows"], len(df))
+        self.assertEqual(prof["dup_rows"], int(df.astype(str).duplicated().sum()))
+
+    def test_infinities_are_outliers_not_stats(self):
+        s = pd.Series([1.0, 2.0, 3.0, np.inf, -np.inf, np.nan])
+        col = build_profile(s.to_frame("v"), workers=1)["by_name"]["v"]
+        self.assertEqual((col["count"], col["nulls"], col["unique"]), (5, 1, 6))
+        self.assertEqual((col["min"], col["max"]), (1.0, 3.0))
+        self.assertEqual(col["outliers"], 2)
+        self.assertTrue(all(np.isfinite(col["hist"]["bins"])))
+
+    def test_only_infinities(self):
+        s = pd.Series([np.inf, -np.inf, np.inf])
+        col = build_profile(s.to_frame("v"), workers=1)["by_name"]["v"]
+        self.assertEqual((col["count"], col["outliers"]), (3, 3))
+        self.assertIsNone(col["quantiles"])
+        self.assertIsNone(col["hist"])
+
+    def test_categorical_parity_with_pandas(self):
+        df = mixed_frame()
+        prof = build_profile(df, workers=1)
+        for name in ("mixed", "cat", "s"):
+            col, s = prof["by_name"][name], df[name]
+            self.assertEqual(col["nulls"], int(s.isna().sum()), name)
+            self.assertEqual(col["unique"], int(s.nunique(dropna=False)), name)
+            expected = s.astype(object).map(str, na_action="ignore").fillna("None").value_counts()
+            self.assertEqual(col["top"]["counts"], expected.head(TOP_VALUES).tolist(), name)
+            for label, count in zip(col["top"]["labels"], col["top"]["counts"]):
+                self.assertEqual(count, expected[label], (name, label))
+
+
+class ParallelProfilingTests(TestCase):
+    def frame(self) -> pd.DataFrame:
+        rows = PARALLEL_MIN_CELLS // 4 + 1
+        rng = np.random.default_rng(3)
+        words = np.array([f"w{i}" for i in range(300)], dtype=object)
+        return pd.DataFrame({"a": rng.normal(size=rows), "b": rng.integers(0, 9, size=rows),
+                             "c": words[rng.integers(0, 300, size=rows)],
+                             "d": words[rng.integers(0, 30, size=rows)]})
+
+    def test_thread_pool_matches_serial(self):
+        df = self.frame()
+        self.assertEqual(build_profile(df, workers=2, executor="thread", dup_rows=0),
+                         build_profile(df, workers=1, dup_rows=0))
+
+    @skipUnless("fork" in mp.get_all_start_methods(), "sin fork en esta plataforma")
+    def test_process_pool_forks_before_threads(self):
+        global _FORK_THREADS
+        df = self.frame()
+        _FORK_THREADS = []
+        try:
+            parallel = build_profile(df, workers=2, executor="process", dup_rows=0)
+        finally:
+            forks, _FORK_THREADS = _FORK_THREADS, None
+        self.assertEqual(parallel, build_profile(df, workers=1, dup_rows=0))
+        self.assertTrue(forks)
+        for names in forks:
+            self.assertFalse([n for n in names if n.startswith("ThreadPoolExecutor")], names)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+
+from ..query import QueryCache, QueryError, apply_query, parse_columns, parse_where, to_text
+from .base import ApiTestCase, mixed_frame
+
+
+class QueryTests(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "Age": [20, 55, np.nan, 70, 51],
+            "Outcome": [1, 0, 1, 1, 0],
+            "city": ["Lima", "Quito", None, "Lima", "Cusco"],
+            "Blood Pressure": [80.0, 90.5, 70.0, np.nan, 85.0],
+        })
+
+    def test_normalized_text_is_order_insensitive(self):
+        a = parse_where("Age>50 and Outcome=1")
+        b = parse_where("Outcome == 1 AND Age > 50")
+        self.assertEqual(a, b)
+        self.assertEqual(to_text(a), "`Age` > 50 and `Outcome` == 1")
+        self.assertEqual(parse_where(to_text(a)), a)
+        self.assertEqual(parse_where("not not Age > 1"), parse_where("Age > 1"))
+
+    def test_parse_errors(self):
+        for text in ("", "Age >", "Age > 1 and", "(Age > 1", "Age ~ 1", "1 > Age", "Age in ()"):
+            with self.subTest(text=text), self.assertRaises(QueryError):
+                parse_where(text)
+
+    def test_parse_columns(self):
+        self.assertEqual(parse_columns("a, b,`c,d`,a"), ("a", "b", "c,d"))
+        with self.assertRaises(QueryError):
+            parse_columns(" , ")
+
+    def test_evaluation_matches_pandas(self):
+        df = self.df
+        cases = {
+            "Age > 50 and Outcome == 1": (df["Age"] > 50) & (df["Outcome"] == 1),
+            "city in ('Lima', 'Cusco')": df["city"].isin(["Lima", "Cusco"]),
+            "city is null or `Blood Pressure` >= 85": df["city"].isna() | (df["Blood Pressure"] >= 85),
+            # lógica de tres valores: un nulo no pasa ni negado
+            "not Age > 50": df["Age"] <= 50,
+            "city not in ('Lima')": df["city"].notna() & (df["city"] != "Lima"),
+        }
+        for text, expected in cases.items():
+            with self.subTest(where=text):
+                out = apply_query(df, parse_where(text), None)
+                pd.testing.assert_frame_equal(out, df[expected.to_numpy()].reset_index(drop=True))
+
+    def test_in_with_literals_outside_the_column_type(self):
+        df = pd.DataFrame({"Age": np.array([20, 50, 127, -5], dtype=np.int8)})
+        self.assertEqual(apply_query(df, parse_where("Age in (50, 300)"), None)["Age"].tolist(), [50])
+        self.assertEqual(apply_query(df, parse_where("Age not in (50, 300)"), None)["Age"].tolist(),
+                         [20, 127, -5])
+        self.assertEqual(len(apply_query(df, parse_where("Age in (300, -200)"), None)), 0)
+        self.assertEqual(apply_query(df, parse_where("Age in (1.5, 20)"), None)["Age"].tolist(), [20])
+
+    def test_columns_and_unknown_names(self):
+        out = apply_query(self.df, parse_where("Outcome == 0"), ("city", "Age"))
+        self.assertEqual(list(out.columns), ["city", "Age"])
+        self.assertEqual(out["city"].tolist(), ["Quito", "Cusco"])
+        with self.assertRaises(QueryError):
+            apply_query(self.df, parse_where("nope > 1"), None)
+        with self.assertRaises(QueryError):
+            apply_query(self.df, None, ("nope",))
+        with self.assertRaises(QueryError):
+            apply_query(self.df, parse_where("Age == 'abc'"), None)
+
+    def test_query_cache_lru(self):
+        cache = QueryCache(max_entries=2)
+        calls = []
+
+        def compute(key):
+            return lambda: calls.append(key) or key
+
+        for key in ("a", "b", "a", "c", "b"):
+            cache.get(key, compute(key))
+        # "b" salió al entrar "c" (el LRU era "b" después de usar "a")
+        self.assertEqual(calls, ["a", "b", "c", "b"])
+
+
+class QueryEndpointTests(ApiTestCase):
+    def test_filtered_summary(self):
+        df = mixed_frame()
+        dataset_id = self.register(df)
+        body = self.client.get(f"/api/summary/?dataset={dataset_id}&where=i < 10&columns=i,s").json()
+        self.assertEqual((body["rows"], body["cols"]), (int((df["i"] < 10).sum()), 2))
+
+    def test_bad_where_is_400(self):
+        dataset_id = self.register(mixed_frame())
+        resp = self.client.get(f"/api/summary/?dataset={dataset_id}&where=nope>1")
+        self.assertEqual(resp.status_code, 400)
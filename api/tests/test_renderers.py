@@ -0,0 +1,58 @@
+import json
+from unittest import skipIf
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from django.test import TestCase
+
+from ..renderers import ArrowIPCRenderer, NumpyJSONRenderer, encode_array, msgpack
+from .base import ApiTestCase, mixed_frame
+
+
+class RendererTests(TestCase):
+    def test_encode_array(self):
+        self.assertEqual(encode_array(np.array([1.0, 2.5, np.nan, np.inf, -3.0])),
+                         b"[1.0,2.5,null,null,-3.0]")
+        self.assertEqual(encode_array(np.array([1, -2, 3], dtype=np.int8)), b"[1,-2,3]")
+        self.assertEqual(encode_array(np.array([True, False])), b"[true,false]")
+        self.assertEqual(encode_array(np.array([[1.0, 2.0], [3.0, 0.1]])), b"[[1.0,2.0],[3.0,0.1]]")
+        self.assertEqual(encode_array(np.array([], dtype=float)), b"[]")
+        # la representación más corta que vuelve al mismo float
+        x = np.array([0.1 + 0.2, 1e-300, 123456789.125])
+        self.assertEqual(encode_array(x).decode(), "[" + ",".join(repr(float(v)) for v in x) + "]")
+
+    def test_json_renderer_matches_plain_json(self):
+        data = {"a": np.array([1.0, np.nan]), "b": pd.Series([1, 2]), "c": np.float64(np.inf),
+                "d": [np.int64(3), {"e": np.array([0.5])}], "f": pd.NaT, "g": "texto"}
+        out = NumpyJSONRenderer().render(data)
+        self.assertEqual(json.loads(out), {"a": [1.0, None], "b": [1, 2], "c": None,
+                                           "d": [3, {"e": [0.5]}], "f": None, "g": "texto"})
+
+    def test_arrow_renderer_round_trip(self):
+        data = {"values": np.array([1.0, 2.0, 3.0]), "name": "x", "n": np.int64(4)}
+        table = pa.ipc.open_stream(ArrowIPCRenderer().render(data)).read_all()
+        self.assertEqual(table.num_rows, 1)
+        self.assertEqual(table.column("values").to_pylist(), [[1.0, 2.0, 3.0]])
+        self.assertEqual(table.column("name").to_pylist(), ["x"])
+        rows = pa.ipc.open_stream(ArrowIPCRenderer().render([{"a": 1}, {"a": 2}])).read_all()
+        self.assertEqual(rows.column("a").to_pylist(), [1, 2])
+
+    @skipIf(msgpack is None, "msgpack no está instalado")
+    def test_msgpack_renderer(self):
+        from ..renderers import MessagePackRenderer
+        out = msgpack.unpackb(MessagePackRenderer().render({"a": np.arange(3, dtype=np.int32)}))
+        self.assertEqual(np.frombuffer(out["a"]["data"], dtype=out["a"]["dtype"]).tolist(), [0, 1, 2])
+
+
+class NegotiationTests(ApiTestCase):
+    def test_arrow_and_json(self):
+        dataset_id = self.register(mixed_frame())
+        resp = self.client.get(f"/api/nulls-per-column/?dataset={dataset_id}&format=arrow")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/vnd.apache.arrow.stream")
+        table = pa.ipc.open_stream(resp.content).read_all()
+        self.assertEqual(table.num_rows, 5)
+        as_json = self.client.get(f"/api/nulls-per-column/?dataset={dataset_id}")
+        self.assertEqual(as_json["Content-Type"], "application/json")
+        self.assertEqual(table.to_pylist(), as_json.json())
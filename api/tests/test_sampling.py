@@ -0,0 +1,17 @@
+"""Muestreo en los endpoints analíticos (api/sampling.py, ?sample=)."""
+import pandas as pd
+
+from .base import ApiTestCase
+
+
+class SampledSummaryTests(ApiTestCase):
+    def test_duplicates_are_estimated_from_the_sample(self):
+        dataset_id = self.register(pd.DataFrame({"a": [1] * 5000, "b": ["x"] * 5000}))
+        sampled = self.client.get(f"/api/summary/?dataset={dataset_id}&sample=1000").json()
+        n = sampled["sample_size"]
+        self.assertTrue(sampled["sampled"])
+        self.assertTrue(sampled["dup_rows_approx"])
+        self.assertEqual(sampled["dup_rows"], round((n - 1) * 5000 / n))
+        exact = self.client.get(f"/api/summary/?dataset={dataset_id}&sample=0").json()
+        self.assertEqual(exact["dup_rows"], 4999)
+        self.assertNotIn("dup_rows_approx", exact)
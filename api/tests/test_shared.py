@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+
+from .. import utils
+from ..columnar import write_ipc
+from ..shared import SharedStore
+from .base import ApiTestCase, tmp_dir
+
+
+class SharedStoreTests(TestCase):
+    def test_round_trip(self):
+        store = SharedStore(tmp_dir(self))
+        df = pd.DataFrame({"n": [1.5, np.nan, 3.0], "s": ["a", None, "c"], "i": [1, 2, 3]})
+        version = store.publish("d1", df, name="d1.csv")
+        self.assertIsNotNone(version)
+        loaded, info = store.load("d1")
+        self.assertEqual((info["name"], info["version"], info["rows"]), ("d1.csv", version, 3))
+        pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+        self.assertIn("d1", store)
+        self.assertIsNone(store.load("otro"))
+
+    def test_trims_oldest(self):
+        df = pd.DataFrame({"v": np.arange(50_000, dtype=np.float64)})
+        store = SharedStore(tmp_dir(self), max_bytes=int(df.memory_usage().sum() * 1.5))
+        store.publish("old", df)
+        store.publish("new", df)
+        self.assertNotIn("old", store)
+        self.assertIn("new", store)
+
+    def test_write_ipc_rejects_unconvertible_frames(self):
+        root = tmp_dir(self)
+        with self.assertLogs("api.columnar", "WARNING"):
+            self.assertFalse(write_ipc(os.path.join(root, "a.arrow"), pd.DataFrame({0: [1], "x": [2]})))
+            self.assertFalse(write_ipc(os.path.join(root, "b.arrow"),
+                                       pd.DataFrame([[1, 2]], columns=["x", "x"])))
+            self.assertFalse(write_ipc(os.path.join(root, "c.arrow"),
+                                       pd.DataFrame({"m": [1, "a", 2.5]})))
+        self.assertEqual(os.listdir(root), [])
+
+
+class SetDfTests(ApiTestCase):
+    def test_numeric_column_names_are_published(self):
+        dataset_id = self.register(pd.DataFrame({0: [1, 2], 1: ["a", "b"]}), name="n.json")
+        self.assertEqual(list(utils.get_df(dataset_id).columns), ["0", "1"])
+        self.assertIn(dataset_id, utils._SHARED)
+
+    def test_unconvertible_frame_stays_local(self):
+        with self.assertLogs("api.columnar", "WARNING"):
+            dataset_id = self.register(pd.DataFrame({"m": [1, "a", 2.5]}))
+        self.assertNotIn(dataset_id, utils._SHARED)
+        self.assertEqual(utils.get_df(dataset_id)["m"].tolist(), [1, "a", 2.5])
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+
+from ..profiling import build_approx_profile, build_profile
+from ..sketches import TopKSketch
+from .base import mixed_frame
+
+
+class SketchTests(TestCase):
+    def test_approx_profile_matches_exact_on_small_frames(self):
+        df = mixed_frame()
+        exact = build_profile(df, workers=1)
+        approx = build_approx_profile(df, workers=1)
+        self.assertTrue(approx["approx"])
+        for name in df.columns:
+            a, e = approx["by_name"][name], exact["by_name"][name]
+            self.assertEqual(a["nulls"], e["nulls"], name)
+            if a["numeric"]:
+                self.assertEqual((a["count"], a["min"], a["max"]), (e["count"], e["min"], e["max"]))
+                self.assertAlmostEqual(a["mean"], e["mean"])
+                self.assertEqual(a["outliers"], e["outliers"], name)
+            else:
+                # pocos valores distintos: el top-k es exacto
+                self.assertEqual(dict(zip(a["top"]["labels"], a["top"]["counts"])),
+                                 dict(zip(e["top"]["labels"], e["top"]["counts"])), name)
+                self.assertEqual(a["errors"]["top_count"], 0)
+
+    def test_topk_error_bounds(self):
+        rng = np.random.default_rng(1)
+        values = pd.Series(rng.zipf(1.5, size=20_000) % 500)
+        sk = TopKSketch(capacity=32)
+        for start in range(0, len(values), 1_000):
+            chunk = values.iloc[start:start + 1_000]
+            sk.update(chunk.value_counts(), len(chunk))
+        true = values.value_counts()
+        counts, errors = sk.top(10)
+        self.assertLessEqual(sk.floor, len(values) / 32)
+        for label, count in counts.items():
+            real = int(true[int(label)])
+            self.assertLessEqual(count - errors[label], real)
+            self.assertGreaterEqual(count, real)
+        # los más frecuentes reales no se pierden
+        self.assertEqual(set(counts.index[:3]), set(true.index[:3].map(str)))
+
+    def test_merge_equals_single_pass(self):
+        values = pd.Series(np.random.default_rng(2).integers(0, 20, size=5_000))
+        whole, left, right = TopKSketch(), TopKSketch(), TopKSketch()
+        whole.update(values.value_counts(), len(values))
+        left.update(values[:2_000].value_counts(), 2_000)
+        right.update(values[2_000:].value_counts(), 3_000)
+        left.merge(right)
+        self.assertEqual(left.top(20)[0].to_dict(), whole.top(20)[0].to_dict())
+        self.assertEqual(left.n, len(values))
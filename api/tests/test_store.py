@@ -0,0 +1,109 @@
+import os
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import TestCase, override_settings
+
+from .. import utils
+from ..store import DatasetNotFound, DatasetRegistry
+from .base import tmp_dir
+
+
+class RegistryTests(TestCase):
+    def frame(self, seed: int) -> pd.DataFrame:
+        return pd.DataFrame({"v": np.arange(10_000, dtype=np.float64) + seed})
+
+    def budget(self, factor: float = 1.5) -> int:
+        return int(self.frame(0).memory_usage(index=True, deep=True).sum() * factor)
+
+    def test_budget_evicts_lru_without_spill(self):
+        reg = DatasetRegistry(budget_bytes=self.budget())
+        reg.put("a", self.frame(0))
+        reg.put("b", self.frame(1))
+        self.assertNotIn("a", reg)
+        with self.assertRaises(DatasetNotFound):
+            reg.snapshot("a")
+        self.assertLessEqual(reg.resident_bytes(), reg.budget_bytes)
+
+    def test_access_refreshes_lru_order(self):
+        reg = DatasetRegistry(budget_bytes=self.budget(2.5))
+        reg.put("a", self.frame(0))
+        reg.put("b", self.frame(1))
+        reg.snapshot("a")
+        reg.put("c", self.frame(2))
+        self.assertIn("a", reg)
+        self.assertNotIn("b", reg)
+
+    def test_spill_and_reload(self):
+        reg = DatasetRegistry(budget_bytes=self.budget(), spill_dir=tmp_dir(self))
+        reg.put("a", self.frame(0))
+        reg.snapshot("a").memo("profile", lambda df: "derivado")
+        reg.put("b", self.frame(1))
+        stats = {d["dataset"]: d for d in reg.stats()["datasets"]}
+        self.assertTrue(stats["a"]["spilled"])
+        self.assertFalse(stats["a"]["resident"])
+
+        snap = reg.snapshot("a")
+        pd.testing.assert_frame_equal(snap.df, self.frame(0))
+        # los derivados se soltaron junto con el DataFrame
+        self.assertEqual(snap.memo("profile", lambda df: "nuevo"), "nuevo")
+        stats = {d["dataset"]: d for d in reg.stats()["datasets"]}
+        self.assertEqual(stats["a"]["misses"], 1)
+        self.assertFalse(stats["b"]["resident"])
+
+    def test_drop_removes_spill_file(self):
+        spill = tmp_dir(self)
+        reg = DatasetRegistry(budget_bytes=1, spill_dir=spill)
+        reg.put("a", self.frame(0))
+        reg.put("b", self.frame(1))
+        self.assertEqual(os.listdir(spill), ["a.parquet"])
+        reg.drop("a")
+        self.assertEqual(os.listdir(spill), [])
+
+    def test_new_version_on_replace(self):
+        reg = DatasetRegistry()
+        v1 = reg.put("a", self.frame(0))
+        old = reg.snapshot("a")
+        v2 = reg.put("a", self.frame(1))
+        self.assertGreater(v2, v1)
+        # el snapshot entregado sigue viendo su versión
+        self.assertEqual(old.df["v"].iloc[0], 0.0)
+        self.assertEqual(reg.snapshot("a").df["v"].iloc[0], 1.0)
+
+    def test_child_snapshot_has_own_derived(self):
+        reg = DatasetRegistry()
+        reg.put("a", self.frame(0))
+        snap = reg.snapshot("a")
+        snap.memo("k", lambda df: 1)
+        child = snap.child(snap.df.head(5))
+        self.assertEqual(child.version, snap.version)
+        self.assertEqual(child.memo("k", lambda df: len(df)), 5)
+
+
+@override_settings(COLUMNAR_CACHE=False, DATASET_INCREMENTAL=False)
+class DatasetPathTests(TestCase):
+    def setUp(self):
+        self.path = os.path.join(tmp_dir(self), "data.csv")
+        self.write(3, mtime=1_000_000)
+        for p in (mock.patch.dict(os.environ, {"DATASET_PATH": self.path}),
+                  mock.patch.dict(utils._CACHE, {"path": None, "mtime": None,
+                                                 "current": None, "append": None})):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def write(self, rows: int, mtime: int) -> None:
+        with open(self.path, "w") as f:
+            f.write("v\n" + "".join(f"{i}\n" for i in range(rows)))
+        os.utime(self.path, (mtime, mtime))
+
+    def test_reload_swaps_frame_version_and_derived_together(self):
+        old = utils.get_snapshot()
+        self.assertEqual(old.memo("rows", len), 3)
+        self.write(5, mtime=1_000_100)
+        new = utils.get_snapshot()
+        self.assertGreater(new.version, old.version)
+        self.assertEqual(utils.get_df_version(), new.version)
+        self.assertEqual(new.memo("rows", len), 5)
+        # el snapshot anterior conserva su DataFrame y sus derivados
+        self.assertEqual((len(old.df), old.memo("rows", len)), (3, 3))
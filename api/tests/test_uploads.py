@@ -0,0 +1,103 @@
+import io, os, time, uuid
+from unittest import mock
+
+from .. import utils, views
+from ..parsedcache import ParsedCache
+from ..shared import SharedStore
+from .base import ApiTestCase, tmp_dir
+
+UPLOAD_TIMEOUT_S = 30
+
+
+def named(name: str, content: bytes) -> io.BytesIO:
+    f = io.BytesIO(content)
+    f.name = name
+    return f
+
+
+class UploadTests(ApiTestCase):
+    def wait(self, body: dict) -> dict:
+        """Polling de /api/uploads/<id>/ hasta que el trabajo termina."""
+        deadline = time.monotonic() + UPLOAD_TIMEOUT_S
+        while body["state"] not in ("done", "error"):
+            self.assertLess(time.monotonic(), deadline, "el upload no terminó")
+            time.sleep(0.02)
+            body = self.client.get(f"/api/uploads/{body['id']}/").json()
+        if body["state"] == "done":
+            self.addCleanup(utils._REGISTRY.drop, body["dataset"])
+        return body
+
+    def upload(self, name: str, content: bytes) -> dict:
+        resp = self.client.post("/api/uploads/", {"data_file": named(name, content)})
+        self.assertIn(resp.status_code, (200, 202), resp.content)
+        return self.wait(resp.json())
+
+    def test_csv_upload_happy_path(self):
+        marker = uuid.uuid4().hex     # contenido nuevo: no lo sirve ninguna cache
+        body = self.upload("data.csv", f"a,b\n1,{marker}\n2,x\n,y\n".encode())
+        self.assertEqual(body["state"], "done", body.get("error"))
+        self.assertEqual(body["rows"], 3)
+
+        # la sesión quedó apuntando al dataset subido
+        summary = self.client.get("/api/summary/").json()
+        self.assertEqual(summary["rows"], 3)
+
+    def test_same_content_is_not_parsed_again(self):
+        content = f"a\n{uuid.uuid4().hex}\n".encode()
+        first = self.upload("data.csv", content)
+        resp = self.client.post("/api/uploads/", {"data_file": named("copy.csv", content)})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {"state": "done", "dataset": first["dataset"]})
+
+    def test_parsed_cache_survives_the_registry(self):
+        content = f"a\n{uuid.uuid4().hex}\n".encode()
+        cache = ParsedCache(tmp_dir(self))
+        with mock.patch.object(utils, "_PARSED", cache):
+            first = self.upload("data.csv", content)
+            # el Parquet se escribe después del 'done'
+            deadline = time.monotonic() + UPLOAD_TIMEOUT_S
+            while not os.path.exists(cache.path(first["dataset"], utils._parsed_variant())):
+                self.assertLess(time.monotonic(), deadline, "no se guardó en la cache")
+                time.sleep(0.02)
+            utils._REGISTRY.drop(first["dataset"])
+            # sin registro ni store compartido: sólo queda el Parquet de la cache
+            with mock.patch.object(utils, "_SHARED", SharedStore(tmp_dir(self))), \
+                    mock.patch.object(views, "read_dataset_file", side_effect=AssertionError("re-parseo")):
+                resp = self.client.post("/api/uploads/", {"data_file": named("copy.csv", content)})
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(utils.get_df(first["dataset"])["a"].tolist(), [content.decode().split()[1]])
+
+    def test_unparseable_upload_ends_in_error(self):
+        with self.assertLogs("api.jobs", "ERROR"):
+            body = self.upload("broken.json", b"{not json " + uuid.uuid4().hex.encode())
+        self.assertEqual(body["state"], "error")
+        self.assertTrue(body["error"])
+        self.assertNotIn("dataset", body)
+
+    def test_rejected_uploads(self):
+        resp = self.client.post("/api/uploads/", {"data_file": named("data.txt", b"a\n1\n")})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.client.post("/api/uploads/", {}).status_code, 400)
+        self.assertEqual(self.client.get("/api/uploads/nope/").status_code, 404)
+
+
+class DashboardUploadTests(ApiTestCase):
+    def test_failed_job_is_reported_once(self):
+        content = b"{not json " + uuid.uuid4().hex.encode()
+        with self.assertLogs("api.jobs", "ERROR"):
+            resp = self.client.post("/", {"data_file": named("broken.json", content)})
+            self.assertEqual(resp.status_code, 302)
+            job_id = self.client.session["upload_job"]
+            deadline = time.monotonic() + UPLOAD_TIMEOUT_S
+            while views._JOBS.get(job_id)["state"] != "error":
+                self.assertLess(time.monotonic(), deadline, "el upload no terminó")
+                time.sleep(0.02)
+
+        page = self.client.get("/")
+        self.assertEqual(page.status_code, 200)
+        self.assertContains(page, "Error al leer el archivo")
+        self.assertNotIn("upload_job", self.client.session)
+        # el error no se repite en cada recarga
+        again = self.client.get("/")
+        self.assertEqual(again.status_code, 200)
+        self.assertNotContains(again, "Error al leer el archivo")
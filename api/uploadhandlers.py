@@ -0,0 +1,24 @@
+# api/uploadhandlers.py
+"""
+Handler de uploads: Django escribe cada chunk directo a un archivo temporal
+en disco (nunca se arma el archivo completo en memoria) y aquí se calcula el
+sha256 del contenido al vuelo, así el dataset_id sale sin releer el archivo.
+"""
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self._sha256.hexdigest()
+        return uploaded
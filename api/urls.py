@@ -2,6 +2,12 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    path('datasets/', views.datasets),
+    path('memory/', views.memory),
+    path('metrics/', views.metrics_view),
+    path('overview/', views.overview),
+    path('uploads/', views.uploads),
+    path('uploads/<str:job_id>/', views.upload_status),
     path('summary/', views.summary),
     path('nulls-per-column/', views.nulls_per_column),
     path('cardinality/', views.cardinality),
@@ -15,6 +21,7 @@ urlpatterns = [
     path('boxplot/', views.boxplot),
     path('describe/', views.describe_numeric),   
     path('describe', views.describe_numeric),    
+    path('correlation/', views.correlation),
 
     path('', views.dashboard, name='dashboard'),
 ]
@@ -1,32 +1,206 @@
 # api/utils.py
-import os, os.path, pandas as pd, csv
+import os, os.path, uuid, threading, logging, pandas as pd, csv
+import pyarrow as pa, pyarrow.json as pa_json
 from dotenv import load_dotenv
 load_dotenv()
 
-# Cache controlado por ruta + mtime
-_CACHE = {"path": None, "mtime": None, "df": None}
+from django.conf import settings
+from .ingest import read_csv_chunked, sniff_csv
+from .compaction import compact_frame
+from .columnar import load_columnar
+from .incremental import AppendState
+from .parsedcache import ParsedCache
+from .shared import SharedStore
+from .store import DatasetRegistry, DatasetNotFound, DatasetSnapshot, next_version
 
-# ====== NUEVO: override en memoria para dataset subido ======
-_OVERRIDE_DF_JSON = None   # DataFrame activo (JSON orient='split')
-_OVERRIDE_DF_NAME = None   # Nombre del archivo subido (para UI)
+# Cache controlado por ruta + mtime (+ derivados calculados sobre esa versión)
+# "current": (df, versión, derivados) de la carga vigente, o None; se reemplaza
+# la tupla entera en una sola asignación para que un lector sin lock nunca mezcle
+# el DataFrame de una versión con la versión o los derivados de otra.
+# "append": estado incremental (api/incremental.py) si DATASET_INCREMENTAL está activo
+_CACHE = {"path": None, "mtime": None, "current": None,
+          "lock": threading.RLock(), "append": None,
+          "reload": threading.Lock()}
 
-def set_df(df: pd.DataFrame, name: str | None = None) -> None:
-    """Activa un DataFrame en memoria para que get_df() lo regrese."""
-    global _override_enabled, _OVERRIDE_DF_JSON, _OVERRIDE_DF_NAME
-    _OVERRIDE_DF_JSON = df.to_json(orient='split')
-    _OVERRIDE_DF_NAME = name
+# ====== Registro en memoria para datasets subidos ======
+# Cada upload vive bajo su propio dataset_id (sesión o ?dataset=), así dos
+# usuarios no se pisan. LRU con presupuesto de memoria y spill opcional a Parquet.
+_REGISTRY = DatasetRegistry(
+    budget_bytes=int(getattr(settings, "DATASET_MEMORY_BUDGET_MB", 1024)) * 1024 * 1024,
+    spill_dir=getattr(settings, "DATASET_SPILL_DIR", None),
+)
 
-def get_df_name() -> str | None:
-    """Devuelve el nombre del dataset activo (si fue subido por la UI)."""
-    return _OVERRIDE_DF_NAME
+# ====== Store compartido entre procesos (workers de gunicorn) ======
+# Los uploads se publican como Arrow en memoria compartida; cualquier worker
+# los mapea bajo demanda y el registro local sólo guarda la vista mapeada.
+def _open_shared_store() -> SharedStore | None:
+    if not getattr(settings, "SHARED_STORE", False):
+        return None
+    try:
+        return SharedStore(settings.SHARED_STORE_DIR,
+                           max_bytes=int(settings.SHARED_STORE_MAX_MB) * 1024 * 1024)
+    except OSError as e:
+        logging.getLogger(__name__).warning("Store compartido deshabilitado: %s", e)
+        return None
+
+_SHARED = _open_shared_store()
+
+# ====== Cache persistente de uploads parseados (api/parsedcache.py) ======
+# Clave = hash del contenido (el dataset_id del upload); sobrevive reinicios.
+def _open_parsed_cache() -> ParsedCache | None:
+    if not getattr(settings, "PARSED_CACHE", False):
+        return None
+    try:
+        return ParsedCache(settings.PARSED_CACHE_DIR,
+                           max_bytes=int(settings.PARSED_CACHE_MAX_MB) * 1024 * 1024)
+    except OSError as e:
+        logging.getLogger(__name__).warning("Cache de uploads parseados deshabilitada: %s", e)
+        return None
+
+_PARSED = _open_parsed_cache()
+
+def _attach_shared(dataset_id: str) -> bool:
+    """Mapea un dataset del store compartido en el registro local."""
+    loaded = _SHARED.load(dataset_id) if _SHARED is not None else None
+    if loaded is None:
+        return False
+    df, info = loaded
+    _REGISTRY.put(dataset_id, df, name=info["name"], version=info["version"], shared=True)
+    return True
+
+def _shared_info(dataset_id: str) -> dict | None:
+    return _SHARED.info(dataset_id) if _SHARED is not None else None
+
+def _text_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Nombres de columna como texto (JSON de arrays, XLSX con encabezados
+    numéricos): así los encuentra ?column= y Arrow los acepta. Si dos nombres
+    quedarían iguales se dejan como están.
+    """
+    if all(isinstance(c, str) for c in df.columns):
+        return df
+    names = [str(c) for c in df.columns]
+    if len(set(names)) != len(names):
+        return df
+    return df.set_axis(names, axis=1)
+
+def set_df(df: pd.DataFrame, name: str | None = None, dataset_id: str | None = None) -> str:
+    """Registra un DataFrame (compartido entre procesos si se puede) y devuelve su dataset_id."""
+    dataset_id = dataset_id or uuid.uuid4().hex
+    df = _text_columns(df)
+    version = _SHARED.publish(dataset_id, df, name) if _SHARED is not None else None
+    if version is None or not _attach_shared(dataset_id):
+        _REGISTRY.put(dataset_id, df, name=name)
+    return dataset_id
+
+def has_df(dataset_id: str | None) -> bool:
+    """True si el dataset_id sigue registrado (en memoria, en disco o en el store compartido)."""
+    return bool(dataset_id) and (dataset_id in _REGISTRY or _shared_info(dataset_id) is not None)
+
+def get_df_name(dataset_id: str | None = None) -> str | None:
+    """Devuelve el nombre del dataset (si fue subido por la UI)."""
+    if not dataset_id:
+        return None
+    info = _shared_info(dataset_id)
+    return info["name"] if info else _REGISTRY.name(dataset_id)
+
+def get_df_version(dataset_id: str | None = None) -> int:
+    """
+    Versión (generación) del dataset. Cambia cada vez que se sube
+    un archivo o se recarga DATASET_PATH; sirve para invalidar caches.
+    Para datasets compartidos es la misma en todos los procesos.
+    """
+    if dataset_id:
+        info = _shared_info(dataset_id)
+        return info["version"] if info else _REGISTRY.version(dataset_id)
+    current = _CACHE["current"]
+    return current[1] if current else 0
+
+def dataset_fingerprint(dataset_id: str | None = None) -> str | None:
+    """
+    Identidad barata (sin pandas) del contenido que serviría get_snapshot():
+    id + versión para datasets subidos; ruta + tamaño + mtime para DATASET_PATH.
+    None si el dataset no existe o no se puede leer.
+    """
+    if dataset_id:
+        try:
+            return f"ds:{dataset_id}:{get_df_version(dataset_id)}"
+        except DatasetNotFound:
+            return None
+    path = _dataset_path()
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"path:{path}:{st.st_size}:{st.st_mtime_ns}"
+
+def request_dataset_id(request) -> str | None:
+    """
+    Dataset del request: ?dataset=<id> tiene prioridad sobre el de la sesión.
+    Sin ninguno (o si el de la sesión ya no existe) se usa DATASET_PATH.
+    """
+    ds = request.GET.get('dataset')
+    if ds:
+        return ds
+    ds = request.session.get('dataset_id')
+    if ds and not has_df(ds):
+        request.session.pop('dataset_id', None)
+        return None
+    return ds
+
+def registry_stats() -> dict:
+    """Memoria residente y hits/misses por dataset del registro (+ store compartido)."""
+    stats = _REGISTRY.stats()
+    stats["shared_store"] = _SHARED.stats() if _SHARED is not None else None
+    stats["parsed_cache"] = _PARSED.stats() if _PARSED is not None else None
+    return stats
+
+def _parsed_variant() -> str:
+    # lo guardado depende de la compactación: con y sin ella son entradas distintas
+    return "compact" if compaction_enabled() else ""
+
+def load_parsed_upload(dataset_id: str) -> pd.DataFrame | None:
+    """El DataFrame de un upload ya parseado antes, o None."""
+    return _PARSED.get(dataset_id, _parsed_variant()) if _PARSED is not None else None
+
+def save_parsed_upload(dataset_id: str, df: pd.DataFrame, name: str | None = None) -> None:
+    """Guarda el upload parseado para que volver a subirlo no lo parsee de nuevo."""
+    if _PARSED is not None:
+        _PARSED.put(dataset_id, df, name, _parsed_variant())
 # ============================================================
 
-def _read_csv_autosep(path: str) -> pd.DataFrame:
+def compaction_enabled() -> bool:
+    return getattr(settings, "DTYPE_COMPACTION", True)
+
+def _compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Pasada de compactación de dtypes (api/compaction.py) si está activada."""
+    return compact_frame(df) if compaction_enabled() else df
+
+def _read_csv_autosep(path: str, progress=None) -> pd.DataFrame:
     """
     Lee CSV detectando separador y codificación.
-    - Primero intenta sep=None con engine='python' (sin low_memory).
-    - Luego hace fallback con csv.Sniffer y prueba C-engine y python-engine.
+    - Camino rápido: sniff único sobre una muestra + lectura por chunks con
+      motor C y compactación de dtypes (api/ingest.py).
+    - Si eso falla, cae a los intentos completos de antes (sep=None,
+      csv.Sniffer, C-engine y python-engine).
     """
+    compact = compaction_enabled()
+    try:
+        sep, enc = sniff_csv(path)
+        try:
+            return read_csv_chunked(path, sep=sep, encoding=enc, compact=compact,
+                                    progress=progress)
+        except UnicodeDecodeError:
+            return read_csv_chunked(path, sep=sep, encoding="latin-1", compact=compact,
+                                    progress=progress)
+    except Exception:
+        pass
+    return _read_csv_fallback(path)
+
+def _read_csv_fallback(path: str) -> pd.DataFrame:
+    """Intentos completos (lentos) para archivos que el camino por chunks no entiende."""
     encodings = ("utf-8", "utf-8-sig", "latin-1")
 
     # 1) Autodetección nativa de pandas
@@ -80,37 +254,120 @@ def _read_csv_autosep(path: str) -> pd.DataFrame:
     # Último recurso
     return pd.read_csv(path)
 
-def get_df():
+def read_dataset_file(path: str, name: str, progress=None) -> pd.DataFrame:
     """
-    Devuelve un DataFrame.
+    Lee un CSV/XLSX/Parquet/JSON desde disco; el formato sale de la extensión
+    de `name` (el nombre original del upload). `progress` sólo aplica a CSV.
+    Si DTYPE_COMPACTION está activo, el resultado pasa por compact_frame().
+    """
+    return _compact(_read_by_format(path, name.lower(), progress))
+
+def _read_by_format(path: str, name: str, progress=None) -> pd.DataFrame:
+    if name.endswith('.csv'):
+        return _read_csv_autosep(path, progress=progress)
+    if name.endswith('.xlsx') or name.endswith('.xls'):
+        return pd.read_excel(path)
+    if name.endswith('.parquet'):
+        # memory_map: pyarrow lee las páginas del archivo sin copiarlo entero a memoria
+        return pd.read_parquet(path, memory_map=True)
+    if name.endswith('.json'):
+        with open(path, 'rb') as f:
+            lines = f.read(4096).lstrip().startswith(b'{')
+        if lines:
+            try:
+                # JSON lines: parser columnar de pyarrow (sin objetos Python por fila)
+                return pa_json.read_json(path).to_pandas(split_blocks=True, self_destruct=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                pass
+            try:
+                return pd.read_json(path, lines=True)
+            except ValueError:
+                pass
+        return pd.read_json(path)
+    raise ValueError('Formato no soportado. Sube CSV, XLSX, Parquet o JSON.')
+
+def get_df(dataset_id: str | None = None):
+    """
+    Devuelve un DataFrame (vista de solo lectura, sin deserializar).
     Prioridad:
-    1) Si hay dataset subido (override en memoria) → úsalo.
+    1) Si se pide un dataset_id → el del registro (DatasetNotFound si no existe).
     2) Si no, usa DATASET_PATH (.env) con tu cache por ruta+mtime.
     """
-    # 1) Override en memoria
-    global _OVERRIDE_DF_JSON
-    if _OVERRIDE_DF_JSON is not None:
-        try:
-            return pd.read_json(_OVERRIDE_DF_JSON, orient='split')
-        except Exception:
-            _OVERRIDE_DF_JSON = None  # limpia y cae a la ruta default
+    return get_snapshot(dataset_id).df
 
-    # 2) Lectura por archivo configurado (tu lógica original)
+def _dataset_path() -> str | None:
+    """DATASET_PATH normalizado (por si viene con comillas o espacios)."""
     path = os.getenv("DATASET_PATH")
+    return path.strip().strip('"').strip("'") if path else None
+
+def _reload_dataset_path(path: str, mtime: float) -> None:
+    """
+    Carga DATASET_PATH en _CACHE. Con DATASET_INCREMENTAL, si el archivo sólo
+    creció desde la última carga se parsea la cola nueva y el perfil
+    aproximado y los duplicados llegan ya actualizados al snapshot.
+    """
+    state = _CACHE["append"] if _CACHE["path"] == path else None
+    if state is not None:
+        appended = state.refresh()
+        if appended is not None:
+            if appended:
+                _CACHE["current"] = (state.df, next_version(), state.derived())
+            _CACHE["mtime"] = mtime
+            return
+
+    size = os.path.getsize(path)
+    reader = lambda p: _compact(_read_csv_autosep(p))
+    if getattr(settings, "COLUMNAR_CACHE", True):
+        df = load_columnar(path, settings.COLUMNAR_CACHE_DIR, reader,
+                           variant="compact" if compaction_enabled() else "")
+    else:
+        df = reader(path)
+    state, derived = None, {}
+    if getattr(settings, "DATASET_INCREMENTAL", False) and os.path.getmtime(path) == mtime:
+        state = AppendState.open(path, df, size)
+        if state is not None:
+            derived = state.derived()
+    # "current" antes que path/mtime: quien vea el mtime nuevo ve también la carga nueva
+    _CACHE.update({"current": (df, next_version(), derived), "append": state,
+                   "path": path, "mtime": mtime})
+
+def is_incremental(dataset_id: str | None = None) -> bool:
+    """True si el dataset es DATASET_PATH seguido como log append-only (api/incremental.py)."""
+    return not dataset_id and _CACHE["append"] is not None
+
+def get_snapshot(dataset_id: str | None = None) -> DatasetSnapshot:
+    """
+    Igual que get_df() pero devuelve DataFrame + versión + cache de derivados,
+    para que el llamador memoice cálculos caros con snapshot.memo().
+    """
+    # 1) Dataset subido (en este proceso o publicado por otro worker)
+    if dataset_id:
+        info = _shared_info(dataset_id)
+        if info is not None:
+            try:
+                current = _REGISTRY.version(dataset_id) == info["version"]
+            except DatasetNotFound:
+                current = False
+            if not current:
+                _attach_shared(dataset_id)
+        return _REGISTRY.snapshot(dataset_id)
+
+    # 2) Lectura por archivo configurado (tu lógica original)
+    path = _dataset_path()
     if not path:
         raise RuntimeError("Falta DATASET_PATH en .env")
 
-    # Normaliza la ruta por si viene con comillas o espacios
-    path = path.strip().strip('"').strip("'")
-
     try:
         mtime = os.path.getmtime(path)
     except OSError as e:
         raise RuntimeError(f"No se puede leer el dataset en {path}: {e}")
 
     # recarga si cambia archivo o mtime
-    if _CACHE["df"] is None or _CACHE["path"] != path or _CACHE["mtime"] != mtime:
-        df = _read_csv_autosep(path)
-        _CACHE.update({"path": path, "mtime": mtime, "df": df})
+    if _CACHE["current"] is None or _CACHE["path"] != path or _CACHE["mtime"] != mtime:
+        with _CACHE["reload"]:
+            if _CACHE["current"] is None or _CACHE["path"] != path or _CACHE["mtime"] != mtime:
+                _reload_dataset_path(path, mtime)
 
-    return _CACHE["df"]
+    df, version, derived = _CACHE["current"]
+    return DatasetSnapshot(None, df.copy(deep=False), os.path.basename(path),
+                           version, derived, _CACHE["lock"])
@@ -1,74 +1,335 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ParseError
 import numpy as np
 import pandas as pd
-from .utils import get_df, set_df, get_df_name  # ← AÑADE set_df y get_df_name
-
-from django.shortcuts import render
+import pyarrow as pa
+from .utils import (get_snapshot, set_df, get_df_name, has_df, registry_stats,
+                    compaction_enabled, request_dataset_id, read_dataset_file,
+                    load_parsed_upload, save_parsed_upload, is_incremental)
+from .store import DatasetNotFound
+from .profiling import build_profile, build_approx_profile, resolve_workers, HIST_BINS, TOP_VALUES
+from .duplicates import count_duplicates
+from .sampling import normalize_size, take_sample
+from .httpcache import etag_cached, RESPONSE_CACHE
+from .compaction import memory_report
+from . import metrics
+from .metrics import stage, record_dataset
+from .renderers import ARROW_STREAM, ipc_stream
+from .histindex import sorted_values, histogram, box_stats, outlier_sample, outlier_page
+from .correlation import select_columns, correlation_matrix, CORR_MAX_COLUMNS, METHODS, SELECT_BY
+from .query import QueryCache, QueryError, apply_query, parse_columns, parse_where, to_text
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import render, redirect
 from .forms import UploadDataForm
-from io import BytesIO
-import csv
+from .jobs import JobStore
+from .memtrack import PeakRSS
+import base64, hashlib, json, logging, os, tempfile, time
+
+logger = logging.getLogger(__name__)
 
 SUPPORTED_EXTS = ('.csv', '.xlsx', '.xls', '.parquet', '.json')
 
-def _read_dataset_from_upload(uploaded_file) -> pd.DataFrame:
+# Ingesta de uploads en segundo plano (estado visible desde cualquier worker)
+_JOBS = JobStore(getattr(settings, 'UPLOAD_JOBS_DIR', os.path.join(tempfile.gettempdir(), 'upload-jobs')),
+                 workers=int(getattr(settings, 'UPLOAD_WORKERS', 2)))
+UPLOAD_PARSE_SHARE = 0.8        # fracción de la barra de progreso que ocupa el parseo
+UPLOAD_PROGRESS_EVERY_S = 0.5   # cada cuánto se escribe el progreso del parseo
+OUTLIER_SAMPLE_SIZE = 1_000     # outliers por respuesta de /api/boxplot/ (muestra o página)
+OUTLIER_PAGE_MAX = 100_000      # tope de ?limit=
+BOXPLOT_ENCODINGS = ('json', 'float32', 'arrow')
+
+def _get_snapshot(request):
+    try:
+        with stage("load"):
+            snap = get_snapshot(request_dataset_id(request))
+    except DatasetNotFound:
+        raise NotFound("dataset not found")
+    nbytes = snap.memo('nbytes', lambda df: int(df.memory_usage(index=True, deep=True).sum()))
+    record_dataset(len(snap.df), nbytes)
+    return snap
+
+def _approx(request, snap=None) -> bool:
     """
-    Lee CSV/XLSX/Parquet/JSON directo desde request.FILES (no escribe a disco).
+    Modo aproximado: ?approx=1|0 manda; si no viene, decide APPROX_STATS. Un
+    DATASET_PATH incremental usa por defecto el perfil de sketches, que ya
+    llega actualizado con cada append (el exacto se recalcula entero).
     """
-    name = uploaded_file.name.lower()
-    raw = uploaded_file.read()
-
-    if name.endswith('.csv'):
-        preview = raw[:5000].decode('utf-8', errors='ignore')
+    flag = request.GET.get('approx')
+    if flag is None:
+        if snap is not None and is_incremental(snap.dataset_id):
+            return True
+        return bool(getattr(settings, 'APPROX_STATS', False))
+    return flag.lower() in ('1', 'true', 'yes')
+
+def _dup_rows(snap) -> int:
+    """Filas duplicadas (hash por fila), una vez por versión; lo comparten ambos perfiles."""
+    return snap.memo('dup_rows', lambda df: count_duplicates(df, workers=resolve_workers()))
+
+def _snapshot_profile(snap, approx: bool = False) -> dict:
+    """Perfil exacto o con sketches del snapshot (uno por versión y modo)."""
+    if approx:
+        return snap.memo('profile_approx',
+                         lambda df: build_approx_profile(df, dup_rows=_dup_rows(snap)))
+    return snap.memo('profile', lambda df: build_profile(df, dup_rows=_dup_rows(snap)))
+
+def _sample_size(request, rows: int) -> int | None:
+    """
+    Tamaño de muestra del request: ?sample=N (redondeado a la escalera de
+    api/sampling.py); ?sample=0|all pide exacto. Sin parámetro se muestrean
+    sólo los datasets con más de SAMPLE_DEFAULT_ROWS filas (0 = nunca).
+    """
+    raw = request.GET.get('sample')
+    if raw is None:
+        n = int(getattr(settings, 'SAMPLE_DEFAULT_ROWS', 0))
+        if not n or rows <= n:
+            return None
+    elif raw.lower() in ('0', 'all', 'exact', 'false'):
+        return None
+    else:
         try:
-            dialect = csv.Sniffer().sniff(preview)
-            sep = dialect.delimiter
-        except Exception:
-            sep = ','
-        return pd.read_csv(BytesIO(raw), sep=sep, low_memory=False)
-
-    if name.endswith('.xlsx') or name.endswith('.xls'):
-        return pd.read_excel(BytesIO(raw))
-
-    if name.endswith('.parquet'):
-        return pd.read_parquet(BytesIO(raw))  # requiere pyarrow o fastparquet
+            n = int(raw)
+        except ValueError:
+            return None
+    n = normalize_size(n)
+    return n if n < rows else None
 
-    if name.endswith('.json'):
+def _query(request):
+    """
+    (where normalizado, columnas) de ?where= y ?columns=, o None si el
+    request es sobre el dataset entero. Es la clave de cache del resultado.
+    """
+    where, columns = request.GET.get('where'), request.GET.get('columns')
+    if not where and not columns:
+        return None
+    try:
+        return (to_text(parse_where(where)) if where else None,
+                parse_columns(columns) if columns else None)
+    except QueryError as e:
+        raise ParseError(str(e))
+
+def _query_snapshot(request, snap):
+    """
+    (snapshot del resultado, clave) del request; (snap, None) sin consulta.
+    El resultado de una consulta es un snapshot hijo con sus propios derivados
+    (perfil, muestras, índices): viven en la entrada de la QueryCache y se
+    descartan con ella.
+    """
+    key = _query(request)
+    if key is None:
+        return snap, None
+    cache = snap.memo('queries', lambda _: QueryCache(int(getattr(settings, 'QUERY_CACHE_ENTRIES', 16))))
+    where, columns = key
+    try:
+        # el texto normalizado se vuelve a parsear sólo al calcular (en un miss)
+        result = cache.get(key, lambda: snap.child(apply_query(
+            snap.df, parse_where(where) if where else None, columns)))
+    except QueryError as e:
+        raise ParseError(str(e))
+    return result, key
+
+def _sample_spec(request, snap, frame=None):
+    """(tamaño, columna de estratos) de la muestra pedida, o None si el request es exacto."""
+    frame = snap.df if frame is None else frame
+    n = _sample_size(request, len(frame))
+    if n is None:
+        return None
+    strat = request.GET.get('stratify')
+    return n, (strat if strat in frame.columns else None)
+
+def _derived_scope(request, snap):
+    """(snapshot donde memoizar los derivados del request, muestra pedida o None)."""
+    target, _ = _query_snapshot(request, snap)
+    return target, _sample_spec(request, snap, target.df)
+
+def _analysis(request, snap=None):
+    """
+    (DataFrame, perfil, meta) para el request: el dataset completo o una
+    muestra cacheada por versión, después de aplicar ?where= / ?columns= si
+    vienen. meta dice si el resultado es exacto o muestreado (y la consulta).
+    """
+    snap = snap or _get_snapshot(request)
+    target, query = _query_snapshot(request, snap)
+    frame = target.df
+    spec = _sample_spec(request, snap, frame)
+    if query is None and spec is None:
+        return snap.df, _snapshot_profile(snap, _approx(request, snap)), {"sampled": False}
+    meta = {}
+    if query is not None:
+        meta["query"] = {"where": query[0], "columns": list(query[1]) if query[1] else None,
+                         "rows": len(frame), "total_rows": len(snap.df)}
+    if spec is None:
+        # el perfil de una consulta es exacto (como el de una muestra)
+        prof = target.memo('profile', lambda df: build_profile(df, dup_rows=_dup_rows(target)))
+        return frame, prof, {"sampled": False, **meta}
+    n, strat = spec
+    sample = target.memo(('sample', n, strat), lambda df: take_sample(df, n, strat))
+    prof = target.memo(('profile_sample', n, strat), lambda _: build_profile(sample))
+    return sample, prof, {"sampled": True, "sample_size": len(sample), "total_rows": len(frame), **meta}
+
+def _respond(data, meta: dict, **kwargs) -> Response:
+    """Response con la marca exacto/muestreado: en el cuerpo (dicts o items) y en X-Sampled."""
+    if isinstance(data, dict):
+        data = {**data, **meta}
+    elif meta["sampled"]:
+        data = [{**item, "sampled": True} for item in data]
+    resp = Response(data, **kwargs)
+    resp['X-Sampled'] = 'true' if meta["sampled"] else 'false'
+    return resp
+
+def _arrow_response(columns: dict, metadata: dict, meta: dict) -> HttpResponse:
+    """Arrow IPC (stream) con `columns` y `metadata` como JSON en el esquema."""
+    table = pa.table(columns).replace_schema_metadata({"meta": json.dumps(metadata)})
+    resp = HttpResponse(ipc_stream(table), content_type=ARROW_STREAM)
+    resp['X-Sampled'] = 'true' if meta["sampled"] else 'false'
+    return resp
+
+def _save_upload(uploaded_file) -> tuple[str, str]:
+    """
+    Deja el upload en un archivo temporal propio (el de Django se borra al
+    terminar el request) y devuelve (ruta, dataset_id = hash del contenido).
+    Con HashingTemporaryFileUploadHandler el archivo ya está en disco y
+    hasheado: se enlaza (hard link, sin copiar bytes). Si no, se copia por
+    chunks calculando el hash en la misma pasada.
+    """
+    suffix = os.path.splitext(uploaded_file.name)[1].lower()
+    tmp_dir = getattr(settings, 'UPLOAD_TMP_DIR', None)
+    digest = getattr(uploaded_file, 'sha256', None)
+    if digest and hasattr(uploaded_file, 'temporary_file_path'):
+        fd, path = tempfile.mkstemp(dir=tmp_dir, suffix=suffix)
+        os.close(fd)
+        os.remove(path)
         try:
-            return pd.read_json(BytesIO(raw), lines=True)
-        except ValueError:
-            return pd.read_json(BytesIO(raw))
+            os.link(uploaded_file.temporary_file_path(), path)
+            return path, digest[:32]
+        except OSError:
+            pass    # otro filesystem: se copia abajo
+
+    h = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=tmp_dir, suffix=suffix, delete=False) as tmp:
+        for chunk in uploaded_file.chunks():
+            h.update(chunk)
+            tmp.write(chunk)
+    return tmp.name, h.hexdigest()[:32]
+
+def _ingest_upload(job: dict, path: str, name: str, dataset_id: str) -> None:
+    """
+    Trabajo en segundo plano: parsea el archivo, lo registra y calcula el
+    perfil. La sesión recién apunta al dataset cuando el trabajo queda 'done'.
+    Reporta el pico de memoria del proceso frente al tamaño del DataFrame.
+    """
+    last = [0.0]
 
-    raise ValueError('Formato no soportado. Sube CSV, XLSX, Parquet o JSON.')
+    def progress(rows, pos, total, rate):
+        now = time.monotonic()
+        if now - last[0] >= UPLOAD_PROGRESS_EVERY_S:
+            last[0] = now
+            _JOBS.update(job, progress=round(UPLOAD_PARSE_SHARE * pos / max(total, 1), 3),
+                         rows=rows, rows_per_s=round(rate))
 
-def _compute_profile(df: pd.DataFrame):
+    with PeakRSS() as mem:
+        try:
+            _JOBS.update(job, state="parsing")
+            df = read_dataset_file(path, name, progress=progress)
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        frame_bytes = int(df.memory_usage(index=True, deep=True).sum())
+        _JOBS.update(job, state="profiling", progress=UPLOAD_PARSE_SHARE, rows=len(df),
+                     frame_mb=round(frame_bytes / 2**20, 1))
+        set_df(df, name=name, dataset_id=dataset_id)
+        # el perfil se calcula sobre la copia registrada; la del parseo se suelta ya
+        del df
+        _snapshot_profile(get_snapshot(dataset_id), bool(getattr(settings, 'APPROX_STATS', False)))
+
+    peak_mb = round(mem.delta / 2**20, 1)
+    logger.info("Upload %s: %.1f MB de DataFrame, pico de memoria +%.1f MB (%.1fx)",
+                name, frame_bytes / 2**20, peak_mb, mem.delta / max(frame_bytes, 1))
+    _JOBS.update(job, state="done", progress=1.0, peak_mb=peak_mb,
+                 peak_ratio=round(mem.delta / max(frame_bytes, 1), 2))
+    # ya activable; la copia en la cache persistente no demora el 'done'
+    try:
+        save_parsed_upload(dataset_id, get_snapshot(dataset_id).df, name)
+    except DatasetNotFound:
+        pass
+
+def _activate(request, dataset_id: str, name: str) -> None:
+    # <<<<<<<< clave: la sesión guarda sólo el handle para /api/* >>>>>>>>
+    request.session['dataset_id'] = dataset_id
+    request.session['df_name'] = name
+
+def _start_upload(request, uploaded_file) -> dict | None:
+    """
+    Encola la ingesta del upload y devuelve el trabajo. Si el mismo contenido
+    ya está registrado, o ya se parseó antes (cache persistente por hash),
+    se activa directo y devuelve None.
+    """
+    path, dataset_id = _save_upload(uploaded_file)
+    if has_df(dataset_id):
+        # mismo contenido ya registrado → no se vuelve a parsear
+        os.remove(path)
+        _activate(request, dataset_id, uploaded_file.name)
+        return None
+    cached = load_parsed_upload(dataset_id)
+    if cached is not None:
+        os.remove(path)
+        set_df(cached, name=uploaded_file.name, dataset_id=dataset_id)
+        _activate(request, dataset_id, uploaded_file.name)
+        return None
+    job = _JOBS.create(name=uploaded_file.name, dataset_id=dataset_id,
+                       bytes=uploaded_file.size, rows=0)
+    _JOBS.submit(job, _ingest_upload, path, uploaded_file.name, dataset_id)
+    request.session['upload_job'] = job["id"]
+    return job
+
+def _job_status(request, job: dict) -> dict:
+    """Estado público del trabajo; si es el upload pendiente de la sesión y terminó, lo activa."""
+    if request.session.get('upload_job') == job["id"] and job["state"] in ("done", "error"):
+        request.session.pop('upload_job', None)
+        if job["state"] == "done":
+            _activate(request, job["dataset_id"], job["name"])
+    out = {k: job.get(k) for k in ("id", "state", "progress", "name", "bytes", "rows",
+                                   "rows_per_s", "frame_mb", "peak_mb", "peak_ratio", "error")}
+    if job["state"] == "done":
+        out["dataset"] = job["dataset_id"]
+    return out
+
+def _compute_profile(prof: dict):
+    """Resumen para la plantilla a partir del perfil cacheado (sin reescanear)."""
+    rows = prof['rows']
     profile = {}
-    profile['shape'] = {'rows': int(df.shape[0]), 'cols': int(df.shape[1])}
-    nulls = df.isna().sum().sort_values(ascending=False)
-    profile['nulls_by_col'] = nulls.to_dict()
-    profile['row_duplicates'] = int(df.duplicated().sum())
-    dtype_counts = df.dtypes.astype(str).value_counts()
-    profile['dtypes'] = dtype_counts.to_dict()
-    card = (df.nunique(dropna=False) / len(df) * 100).round(2) if len(df) > 0 else (df.nunique(dropna=False) * 0)
-    profile['cardinality_pct'] = card.to_dict()
+    profile['shape'] = {'rows': rows, 'cols': prof['cols']}
+    nulls = sorted(prof['columns'], key=lambda c: c['nulls'], reverse=True)
+    profile['nulls_by_col'] = {c['column']: c['nulls'] for c in nulls}
+    profile['row_duplicates'] = prof['dup_rows']
+    profile['dtypes'] = dict(prof['dtypes'])
+    profile['cardinality_pct'] = {
+        c['column']: round(c['unique'] / rows * 100, 2) if rows else 0
+        for c in prof['columns']
+    }
     return profile
 
 # Placeholder por si aún no llamas a utils.py
-def build_charts(df: pd.DataFrame):
+def build_charts(profile: dict):
     # Reemplaza esto por tus gráficas reales o importa desde utils.py
     return {
-        'top_nulls': sorted(_compute_profile(df)['nulls_by_col'].items(), key=lambda x: x[1], reverse=True)[:15]
+        'top_nulls': sorted(profile['nulls_by_col'].items(), key=lambda x: x[1], reverse=True)[:15]
     }
 
 def dashboard(request):
     """
     Renderiza templates/index.html con barra de carga arriba.
-    Guarda el último dataset en sesión para recargas.
-    Además, activa el DF subido para que lo usen los endpoints /api/*.
+    La sesión sólo guarda un handle (hash del contenido) hacia el registro en
+    memoria; el perfil se calcula una vez por versión del dataset y se cachea.
     """
     form = UploadDataForm()
-    df = None
     ds_name = None  # ← NUEVO
+    # sesiones antiguas guardaban el dataset entero como JSON
+    request.session.pop('df_json', None)
 
     if request.method == 'POST':
         form = UploadDataForm(request.POST, request.FILES)
@@ -78,209 +339,444 @@ def dashboard(request):
                 form.add_error('data_file', 'Formato no soportado. Sube CSV, XLSX, Parquet o JSON.')
             else:
                 try:
-                    df = _read_dataset_from_upload(up)
-                    # Persistencia en sesión (si quieres seguir usándola)
-                    request.session['df_json'] = df.to_json(orient='split')
-                    request.session['df_name'] = up.name
-                    # <<<<<<<< clave: activa override en memoria para /api/* >>>>>>>>
-                    set_df(df, name=up.name)
-                    ds_name = up.name
+                    _start_upload(request, up)
+                    # POST/redirect/GET: el parseo sigue en segundo plano
+                    return redirect(request.path)
                 except Exception as e:
                     form.add_error('data_file', f'Error al leer el archivo: {e}')
 
-    # Si no hubo POST o no se subió, intenta recuperar nombre desde utils
-    if ds_name is None:
-        ds_name = get_df_name() or request.session.get('df_name')
-
-    if df is None and request.session.get('df_json'):
-        try:
-            df = pd.read_json(request.session['df_json'], orient='split')
-        except Exception:
-            df = None
+    # upload en curso: si ya terminó se activa; si no, la página hace polling
+    upload_job = upload_error = None
+    job_id = request.session.get('upload_job')
+    if job_id:
+        job = _JOBS.get(job_id)
+        status = _job_status(request, job) if job else None
+        if status is None or status["state"] in ("done", "error"):
+            # el error se muestra una sola vez; el form puede no estar ligado
+            request.session.pop('upload_job', None)
+        if status is not None and status["state"] == "error":
+            upload_error = f'Error al leer el archivo: {status["error"]}'
+        elif status is not None and status["state"] != "done":
+            upload_job = status
+
+    # Si no hubo POST o no se subió, intenta recuperar nombre desde la sesión
+    dataset_id = request_dataset_id(request)
+    if ds_name is None and dataset_id:
+        ds_name = request.session.get('df_name') or get_df_name(dataset_id)
 
     context = {
         'form': form,
-        'file_name': request.session.get('df_name'),  # si lo usas en otro lugar
+        'file_name': request.session.get('df_name') if dataset_id else None,
         'ds_name': ds_name,                           # ← para tu pill en el HTML
+        'upload_job': upload_job,
+        'upload_error': upload_error,
     }
 
-    if df is not None:
-        context['profile'] = _compute_profile(df)
-        context['charts'] = build_charts(df)
+    if dataset_id:
+        try:
+            snap = get_snapshot(dataset_id)
+        except DatasetNotFound:
+            snap = None
+        if snap is not None:
+            context['profile'] = _compute_profile(_snapshot_profile(snap))
+            context['charts'] = build_charts(context['profile'])
 
     return render(request, 'index.html', context)
 
+@api_view(['POST'])
+def uploads(request):
+    """
+    Sube un dataset (campo data_file) y devuelve el trabajo de ingesta (202).
+    Si el contenido ya estaba registrado se activa directo (200).
+    """
+    up = request.FILES.get('data_file')
+    if up is None:
+        return Response({"error": "data_file required"}, status=400)
+    if not any(up.name.lower().endswith(ext) for ext in SUPPORTED_EXTS):
+        return Response({"error": "Formato no soportado. Sube CSV, XLSX, Parquet o JSON."}, status=400)
+    job = _start_upload(request, up)
+    if job is None:
+        return Response({"state": "done", "dataset": request.session['dataset_id']})
+    return Response({**_job_status(request, job), "status_url": f"/api/uploads/{job['id']}/"},
+                    status=202)
+
 @api_view(['GET'])
-def summary(request):
-    df = get_df()
-    total_rows = len(df)
-    total_cols = len(df.columns)
-    nulls = int(df.isna().sum().sum())
-    null_pct = float(nulls / (total_rows * total_cols) * 100) if total_rows else 0.0
-    dups = int(df.duplicated().sum())
-    return Response({
+def upload_status(request, job_id):
+    """Progreso del trabajo de ingesta; al terminar activa el dataset en la sesión."""
+    job = _JOBS.get(job_id)
+    if job is None:
+        raise NotFound("job not found")
+    return Response(_job_status(request, job))
+
+@api_view(['GET'])
+def datasets(request):
+    """
+    Estado del registro de datasets (bytes residentes, spill y hits/misses)
+    y de la cache de respuestas HTTP.
+    """
+    return Response({**registry_stats(), "response_cache": RESPONSE_CACHE.stats()})
+
+@api_view(['GET'])
+def metrics_view(request):
+    """
+    Métricas de /api/* en formato de texto de Prometheus (latencias por
+    endpoint y etapa, caches, tamaño de datasets) + estado de registro y caches.
+    Las series de requests suman todos los workers sólo con METRICS_MULTIPROC_DIR
+    (ver api/metrics.py); las gauges de registro y caches son siempre del
+    worker que responde y llevan su pid.
+    """
+    reg = registry_stats()
+    cache = RESPONSE_CACHE.stats()
+    worker = (("pid", os.getpid()),)
+    gauges = {
+        "api_registry_resident_bytes": ("Bytes residentes en el registro de datasets (por worker).",
+                                        {worker: reg.get("resident_bytes", 0)}),
+        "api_registry_datasets": ("Datasets en el registro (por worker).",
+                                  {worker: len(reg.get("datasets", []))}),
+        "api_response_cache_bytes": ("Bytes en la cache de respuestas (por worker).",
+                                     {worker: cache["bytes"]}),
+        "api_response_cache_entries": ("Entradas en la cache de respuestas (por worker).",
+                                       {worker: cache["entries"]}),
+    }
+    return HttpResponse(metrics.render_prometheus(gauges), content_type=metrics.CONTENT_TYPE)
+
+@etag_cached
+@api_view(['GET'])
+def memory(request):
+    """
+    Memoria por columna del dataset completo: dtype y bytes actuales contra
+    los dtypes por defecto de pandas (int64/float64/object, estimado).
+    """
+    snap = _get_snapshot(request)
+    report = snap.memo("memory_report", memory_report)
+    return Response({"compaction": compaction_enabled(), **report})
+
+class PanelError(ValueError):
+    """Parámetros inválidos para un panel (400 en su endpoint, "error" dentro de /overview/)."""
+
+
+def _summary_panel(prof: dict, meta: dict) -> dict:
+    total_rows, total_cols = prof["rows"], prof["cols"]
+    nulls, dups = prof["null_cells"], prof["dup_rows"]
+    null_pct = float(nulls / (total_rows * total_cols) * 100) if total_rows and total_cols else 0.0
+    extra = {}
+    if meta["sampled"]:
+        # filas reales; nulos y duplicados extrapolados desde la muestra (sin
+        # recorrer el dataset completo). Los duplicados no escalan linealmente
+        # (la muestra los subestima), así que se marcan como aproximados:
+        # ?sample=0 da el conteo exacto.
+        scale = meta["total_rows"] / total_rows
+        total_rows = meta["total_rows"]
+        nulls = int(round(nulls * scale))
+        dups = int(round(dups * scale))
+        extra["dup_rows_approx"] = True
+    return {
         "rows": total_rows,
         "cols": total_cols,
         "null_cells": nulls,
         "null_pct": round(null_pct, 2),
         "dup_rows": dups,
-    })
+        **extra,
+    }
+
+def _nulls_panel(prof: dict) -> list:
+    cols = sorted(prof["columns"], key=lambda c: c["nulls"], reverse=True)
+    return [{"column": c["column"], "nulls": c["nulls"]} for c in cols]
+
+def _cardinality_panel(prof: dict) -> list:
+    cols = sorted(prof["columns"], key=lambda c: c["unique"], reverse=True)
+    data = [{"column": c["column"], "unique": c["unique"]} for c in cols]
+    if prof["approx"]:
+        for item, c in zip(data, cols):
+            item.update({"approx": True, "error": c["errors"]["unique_rel"]})
+    return data
+
+def _outliers_panel(prof: dict) -> list:
+    res = [{"column": c["column"], "outliers": c["outliers"]}
+           for c in prof["columns"] if c["numeric"]]
+    if prof["approx"]:
+        for item in res:
+            errors = prof["by_name"][item["column"]]["errors"]
+            item.update({"approx": True, "error": errors.get("outliers", 0)})
+    res.sort(key=lambda x: x["outliers"], reverse=True)
+    return res
+
+def _numeric_columns_panel(prof: dict) -> dict:
+    return {"columns": [c["column"] for c in prof["columns"] if c["numeric"]]}
+
+def _describe_panel(prof: dict) -> dict:
+    num = [c for c in prof["columns"] if c["numeric"]]
+    if not num or not prof["rows"]:
+        return {"columns": [], "rows": []}
+
+    order = ['count','mean','std','min','p05','p25','median','p75','p95','max']
+    # una matriz columnas x estadísticos redondeada de una vez; None → NaN → null
+    qs = [c["quantiles"] or {} for c in num]
+    stats = np.array([
+        [c["mean"], c["std"], c["min"], q.get(0.05), q.get(0.25), q.get(0.5),
+         q.get(0.75), q.get(0.95), c["max"]]
+        for c, q in zip(num, qs)
+    ], dtype=np.float64).round(6)
+    rows = [{"column": c["column"], "count": c["count"], **dict(zip(order[1:], values))}
+            for c, values in zip(num, stats.tolist())]
+    if prof["approx"]:
+        rank = max((c["errors"].get("quantile_rank", 0.0) for c in num), default=0.0)
+        return {"columns": order, "rows": rows, "approx": True, "error": {"quantile_rank": rank}}
+    return {"columns": order, "rows": rows}
+
+def _types_panel(prof: dict) -> list:
+    return [{"dtype": k, "columns": v} for k, v in prof["dtypes"].items()]
+
+def _distribution_panel(request, snap, df, prof: dict, col=None) -> dict:
+    col = col or request.GET.get('column')
+    try:
+        bins = int(request.GET.get('bins', '20'))
+        top  = int(request.GET.get('top', '50'))
+    except ValueError:
+        raise PanelError("bins and top must be integers")
+
+    if col not in prof["by_name"]:
+        raise PanelError("column not found")
+
+    info = prof["by_name"][col]
+    if info["numeric"]:  # bool y texto van como barras con sus etiquetas
+        bins = max(5, min(bins, 100))
+        if info["numeric"] and bins == HIST_BINS and info["hist"] is not None:
+            edges, hist = info["hist"]["bins"], info["hist"]["counts"]
+            extra = {"approx": True, "error": info["errors"]["hist_count"]} if prof["approx"] else {}
+        else:
+            # valores ordenados, una vez por versión (y muestra): re-binear es O(bins·log n)
+            target, spec = _derived_scope(request, snap)
+            values = target.memo(('sorted_values', col, spec), lambda _: sorted_values(df[col]))
+            edges, hist = histogram(values, bins)
+            extra = {}
+        return {
+            "bins": edges,
+            "counts": hist,
+            "numeric": True,
+            **extra
+        }
+    else:
+        top = max(5, min(top, TOP_VALUES))
+        counts = info["top"]["counts"][:top]
+        labels = info["top"]["labels"][:top]
+        extra = {"approx": True, "error": info["errors"]["top_count"]} if prof["approx"] else {}
+        # <- chequeo extra
+        if max(counts) <= 1:
+            return {"labels": labels, "counts": counts, "numeric": False, "unique_like": True, **extra}
+        return {"labels": labels, "counts": counts, "numeric": False, **extra}
+
+def _correlation_panel(request, snap, df, prof: dict) -> dict:
+    method = request.GET.get('method', 'pearson')
+    if method not in METHODS:
+        raise PanelError(f"method must be one of {', '.join(METHODS)}")
+    by = request.GET.get('by', 'variance')
+    if by not in SELECT_BY:
+        raise PanelError(f"by must be one of {', '.join(SELECT_BY)}")
+    try:
+        k = max(2, min(int(request.GET.get('max', 12)), CORR_MAX_COLUMNS))
+    except ValueError:
+        raise PanelError("max must be an integer")
+
+    cols = select_columns(prof, k, by)
+    if len(cols) < 2:
+        return {"labels": [], "matrix": [], "method": method}
+    target, spec = _derived_scope(request, snap)
+    R = target.memo(('corr', method, tuple(cols), spec), lambda _: correlation_matrix(df, cols, method))
+    # NaN (columna constante) sale como null desde el renderer
+    return {"labels": [str(c) for c in cols], "matrix": np.round(R, 4), "method": method}
+
+
+@etag_cached
+@api_view(['GET'])
+def summary(request):
+    _, prof, meta = _analysis(request)
+    return _respond(_summary_panel(prof, meta), meta)
 
+@etag_cached
 @api_view(['GET'])
 def nulls_per_column(request):
-    df = get_df()
-    s = df.isna().sum().sort_values(ascending=False)
-    data = [{"column": c, "nulls": int(s[c])} for c in s.index]
-    return Response(data)
+    _, prof, meta = _analysis(request)
+    return _respond(_nulls_panel(prof), meta)
 
+@etag_cached
 @api_view(['GET'])
 def cardinality(request):
-    df = get_df()
-    s = df.nunique(dropna=False).sort_values(ascending=False)
-    data = [{"column": c, "unique": int(s[c])} for c in s.index]
-    return Response(data)
+    _, prof, meta = _analysis(request)
+    return _respond(_cardinality_panel(prof), meta)
 
+@etag_cached
 @api_view(['GET'])
 def outliers(request):
-    df = get_df()
-    res = []
-    for col in df.select_dtypes(include=[np.number]).columns:
-        s = df[col].dropna()
-        if s.empty:
-            count = 0
-        else:
-            q1, q3 = s.quantile(0.25), s.quantile(0.75)
-            iqr = q3 - q1
-            lower, upper = q1 - 1.5*iqr, q3 + 1.5*iqr
-            count = int(((s < lower) | (s > upper)).sum())
-        res.append({"column": col, "outliers": count})
-    res.sort(key=lambda x: x["outliers"], reverse=True)
-    return Response(res)
+    _, prof, meta = _analysis(request)
+    return _respond(_outliers_panel(prof), meta)
 
+@etag_cached
 @api_view(['GET'])
 def distribution(request):
-    col = request.GET.get('column')
-    bins = int(request.GET.get('bins', '20'))
-    top  = int(request.GET.get('top', '50'))
-    df = get_df()
-
-    if col not in df.columns:
-        return Response({"error": "column not found"}, status=400)
-
-    s = df[col]
-    if s.dtype.kind in 'biufc':  # numérica
-        s = s.dropna().astype(float)
-        bins = max(5, min(bins, 100))
-        hist, edges = np.histogram(s, bins=bins)
-        return Response({
-            "bins": edges.tolist(),
-            "counts": hist.tolist(),
-            "numeric": True
-        })
-    else:
-        top = max(5, min(top, 50))
-        vc = s.astype(str).value_counts(dropna=False).head(top)
-        counts = vc.values.tolist()
-        labels = vc.index.tolist()
-        # <- chequeo extra
-        if max(counts) <= 1:
-            return Response({"labels": labels, "counts": counts, "numeric": False, "unique_like": True})
-        return Response({"labels": labels, "counts": counts, "numeric": False})
+    snap = _get_snapshot(request)
+    df, prof, meta = _analysis(request, snap)
+    try:
+        return _respond(_distribution_panel(request, snap, df, prof), meta)
+    except PanelError as e:
+        return Response({"error": str(e)}, status=400)
 
 
 # -----------------------------------------------------------------------
+@etag_cached
 @api_view(['GET'])
 def types(request):
-    df = get_df()
-    counts = df.dtypes.astype(str).value_counts()
-    return Response([{"dtype": k, "columns": int(v)} for k, v in counts.items()])
+    _, prof, meta = _analysis(request)
+    return _respond(_types_panel(prof), meta)
 
+@etag_cached
 @api_view(['GET'])
 def numeric_columns(request):
     """
     Devuelve la lista de columnas numéricas disponibles para boxplot.
     """
-    df = get_df()
-    cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    return Response({"columns": cols})
+    _, prof, meta = _analysis(request)
+    return _respond(_numeric_columns_panel(prof), meta)
 
+@etag_cached
 @api_view(['GET'])
 def boxplot(request):
     """
     Devuelve los estadísticos para un boxplot tipo Tukey (IQR) de una columna:
     min, q1, median, q3, max y outliers (valores fuera de [Q1-1.5*IQR, Q3+1.5*IQR]).
+    Todo sale del índice ordenado de la columna (api/histindex.py), una vez por versión.
+    - Por defecto `outliers` es una muestra estratificada de hasta ?limit=
+      valores (ambas colas, extremos incluidos); `outliers_total` es el total.
+    - ?cursor= pagina la lista completa en orden: cursor vacío o 0 empieza,
+      y cada página trae `next_cursor` (null al final).
+    - ?encoding=float32 manda los outliers como base64 de float32 little-endian;
+      ?encoding=arrow responde Arrow IPC (columna "outliers", el resto en la metadata).
     """
     col = request.GET.get('column')
     if not col:
         return Response({"error": "column param required"}, status=400)
-
-    df = get_df()
-    if col not in df.columns:
+    encoding = request.GET.get('encoding', 'json')
+    if encoding not in BOXPLOT_ENCODINGS:
+        return Response({"error": f"encoding must be one of {', '.join(BOXPLOT_ENCODINGS)}"},
+                        status=400)
+    try:
+        limit = int(request.GET.get('limit', OUTLIER_SAMPLE_SIZE))
+        cursor = request.GET.get('cursor')
+        start = int(cursor or 0) if cursor is not None else None
+    except ValueError:
+        return Response({"error": "limit and cursor must be integers"}, status=400)
+    limit = max(1, min(limit, OUTLIER_PAGE_MAX))
+
+    snap = _get_snapshot(request)
+    df, prof, meta = _analysis(request, snap)
+    if col not in prof["by_name"]:
         return Response({"error": "column not found"}, status=400)
 
-    s = df[col].dropna()
-    if s.empty or not np.issubdtype(s.dtype, np.number):
+    info = prof["by_name"][col]
+    if not info["numeric"] or not info["count"]:
         return Response({"error": "column is not numeric or has no data"}, status=400)
 
-    s = s.astype(float)
-    q1 = float(s.quantile(0.25))
-    med = float(s.quantile(0.50))
-    q3 = float(s.quantile(0.75))
-    iqr = q3 - q1
-    lower = q1 - 1.5 * iqr
-    upper = q3 + 1.5 * iqr
-
-    # whiskers: típicamente el valor más extremo dentro de [lower, upper]
-    inside = s[(s >= lower) & (s <= upper)]
-    if inside.empty:
-        whisk_min = float(s.min())
-        whisk_max = float(s.max())
+    target, spec = _derived_scope(request, snap)
+    values = target.memo(('sorted_values', col, spec), lambda _: sorted_values(df[col]))
+    box = target.memo(('box_stats', col, spec), lambda _: box_stats(values))
+    total = box["outliers"]
+    if start is None:
+        outliers = outlier_sample(values, box["lo"], box["hi"], limit)
+        paging = {"outliers_sampled": bool(outliers.size < total)}
     else:
-        whisk_min = float(inside.min())
-        whisk_max = float(inside.max())
-
-    outliers = s[(s < lower) | (s > upper)].tolist()
+        start = max(start, 0)
+        outliers = outlier_page(values, box["lo"], box["hi"], start, limit)
+        nxt = start + limit
+        paging = {"next_cursor": str(nxt) if nxt < total else None}
 
-    return Response({
+    data = {
         "column": col,
-        "min": whisk_min,
-        "q1": q1,
-        "median": med,
-        "q3": q3,
-        "max": whisk_max,
-        "outliers": outliers,
-        "lower_fence": float(lower),
-        "upper_fence": float(upper)
-    })
-    
+        "min": box["whisker_min"],
+        "q1": box["q1"],
+        "median": box["median"],
+        "q3": box["q3"],
+        "max": box["whisker_max"],
+        "lower_fence": box["lower_fence"],
+        "upper_fence": box["upper_fence"],
+        "outliers_total": total,
+        **paging,
+    }
+    if encoding == 'arrow':
+        return _arrow_response({"outliers": outliers}, {**data, **meta}, meta)
+    if encoding == 'float32':
+        data["outliers"] = base64.b64encode(outliers.astype('<f4').tobytes()).decode('ascii')
+        data["outliers_encoding"] = "float32-le-base64"
+    else:
+        data["outliers"] = outliers
+    return _respond(data, meta)
+
+@etag_cached
 @api_view(['GET'])
 def describe_numeric(request):
     """
     Estadísticos de columnas numéricas:
     count, mean, std, min, 5%, 25%, 50%(median), 75%, 95%, max.
     """
-    df = get_df()
-    num = df.select_dtypes(include=[np.number])
-    if num.empty:
-        return Response({"columns": [], "rows": []})
+    _, prof, meta = _analysis(request)
+    return _respond(_describe_panel(prof), meta)
 
-    desc = num.describe(percentiles=[.05, .25, .5, .75, .95]).T
-    desc = desc.rename(columns={
-        'count':'count','mean':'mean','std':'std','min':'min',
-        '5%':'p05','25%':'p25','50%':'median','75%':'p75','95%':'p95','max':'max'
-    })
-    order = ['count','mean','std','min','p05','p25','median','p75','p95','max']
-    cols_present = [c for c in order if c in desc.columns]
-    desc = desc[cols_present].round(6)
-
-    rows = []
-    for col, row in desc.iterrows():
-        item = {"column": col}
-        for k in cols_present:
-            v = row[k]
-            if pd.isna(v):
-                item[k] = None
-            else:
-                item[k] = int(v) if k == 'count' else float(v)
-        rows.append(item)
-    return Response({"columns": cols_present, "rows": rows})
\ No newline at end of file
+
+@etag_cached
+@api_view(['GET'])
+def correlation(request):
+    """
+    Matriz de correlación de las `max` columnas numéricas con mayor varianza
+    (?by=count: con más valores no nulos). ?method=pearson|spearman.
+    Se cachea por versión del dataset, muestra y conjunto de columnas.
+    """
+    snap = _get_snapshot(request)
+    df, prof, meta = _analysis(request, snap)
+    try:
+        return _respond(_correlation_panel(request, snap, df, prof), meta)
+    except PanelError as e:
+        return Response({"error": str(e)}, status=400)
+
+
+OVERVIEW_PANELS = ("summary", "nulls", "cardinality", "types", "outliers",
+                   "distribution", "numeric_columns", "describe", "correlation")
+OVERVIEW_DEFAULT = ("summary", "nulls", "cardinality", "types", "outliers", "distribution")
+
+@etag_cached
+@api_view(['GET'])
+def overview(request):
+    """
+    Todos los paneles del dashboard en una respuesta, sobre un único snapshot
+    (mismo DataFrame, muestra y perfil para todos). ?panels=summary,nulls,...
+    elige cuáles; sin ?column= la distribución usa la columna de mayor
+    cardinalidad (la primera del selector). Acepta los mismos parámetros que
+    los endpoints individuales (bins, top, max, method, by, sample, approx).
+    """
+    raw = request.GET.get('panels')
+    panels = [p.strip() for p in raw.split(',') if p.strip()] if raw else list(OVERVIEW_DEFAULT)
+    unknown = [p for p in panels if p not in OVERVIEW_PANELS]
+    if unknown:
+        return Response({"error": f"unknown panels: {', '.join(unknown)}"}, status=400)
+
+    snap = _get_snapshot(request)
+    df, prof, meta = _analysis(request, snap)
+    card = _cardinality_panel(prof)
+    dist_col = request.GET.get('column') or (card[0]["column"] if card else None)
+    builders = {
+        "summary": lambda: _summary_panel(prof, meta),
+        "nulls": lambda: _nulls_panel(prof),
+        "cardinality": lambda: card,
+        "types": lambda: _types_panel(prof),
+        "outliers": lambda: _outliers_panel(prof),
+        "numeric_columns": lambda: _numeric_columns_panel(prof),
+        "describe": lambda: _describe_panel(prof),
+        "distribution": lambda: {"column": dist_col,
+                                 **_distribution_panel(request, snap, df, prof, dist_col)},
+        "correlation": lambda: _correlation_panel(request, snap, df, prof),
+    }
+    data = {}
+    for name in panels:
+        try:
+            data[name] = builders[name]()
+        except PanelError as e:
+            data[name] = {"error": str(e)}
+    return _respond({"panels": data}, meta)
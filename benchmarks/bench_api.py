@@ -0,0 +1,271 @@
+"""
+Benchmark de punta a punta de /api/*: genera datasets sintéticos
+(benchmarks/datagen.py) para cada combinación de filas, mezcla de dtypes,
+nulos y cardinalidad, y recorre todos los endpoints con el test client de
+Django:
+- cold: dataset recién registrado (sin perfil, memo ni cache de respuestas);
+- warm: mediana de --repeat requests más sobre el mismo dataset;
+- upload: POST /api/uploads/ + polling hasta 'done', por formato de archivo.
+Por cada medición guarda latencia (ms), throughput (filas/s) y pico de RSS
+sobre el inicio (MB) en un JSON.
+
+Con --compare BASELINE.json compara contra una corrida anterior y sale con
+código 1 si algún endpoint quedó más de --threshold (fracción) más lento.
+
+Uso:
+    python benchmarks/bench_api.py --rows 1e3,1e5 --out benchmarks/baseline.json
+    python benchmarks/bench_api.py --rows 1e3,1e5 --compare benchmarks/baseline.json --threshold 0.2
+    python benchmarks/bench_api.py --rows 1e7 --mix numeric --formats parquet --endpoints summary,describe
+"""
+import argparse, json, os, platform, sys, tempfile, time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+os.environ.setdefault("ALLOWED_HOSTS", "testserver")
+# sin store compartido: cada corrida mide el proceso solo y los datasets se
+# pueden soltar del registro entre mediciones
+os.environ.setdefault("SHARED_STORE", "False")
+
+import django
+django.setup()
+
+from django.test import Client, override_settings
+
+from api import utils
+from api.memtrack import PeakRSS
+from datagen import CARDINALITIES, FORMATS, MIXES, XLSX_MAX_ROWS, make_dataset, write_dataset
+
+UPLOAD_TIMEOUT_S = 3600
+POLL_EVERY_S = 0.02
+MIN_DELTA_MS = 2.0          # diferencias menores se consideran ruido en --compare
+
+
+def endpoints(df: pd.DataFrame) -> dict:
+    """nombre → URL (sin ?dataset=) de cada endpoint GET, con columnas del df."""
+    numeric = [c for c in df.columns if df[c].dtype.kind in "iuf"]
+    other = [c for c in df.columns if c not in numeric]
+    urls = {
+        "summary": "/api/summary/",
+        "nulls-per-column": "/api/nulls-per-column/",
+        "cardinality": "/api/cardinality/",
+        "outliers": "/api/outliers/",
+        "types": "/api/types/",
+        "numeric-columns": "/api/numeric-columns/",
+        "describe": "/api/describe/",
+        "correlation": "/api/correlation/",
+        "overview": "/api/overview/",
+        "memory": "/api/memory/",
+        "datasets": "/api/datasets/",
+    }
+    if numeric:
+        urls["distribution-numeric"] = f"/api/distribution/?column={numeric[0]}"
+        urls["distribution-numeric-bins"] = f"/api/distribution/?column={numeric[0]}&bins=64"
+        urls["boxplot"] = f"/api/boxplot/?column={numeric[0]}"
+    if other:
+        urls["distribution-categorical"] = f"/api/distribution/?column={other[0]}"
+    return urls
+
+
+def request(client: Client, url: str, dataset_id: str) -> float:
+    sep = "&" if "?" in url else "?"
+    t0 = time.perf_counter()
+    resp = client.get(f"{url}{sep}dataset={dataset_id}")
+    elapsed = time.perf_counter() - t0
+    if resp.status_code != 200:
+        raise RuntimeError(f"{url}: HTTP {resp.status_code} {resp.content[:200]!r}")
+    return elapsed
+
+
+def measure(fn) -> tuple[float, float]:
+    """(segundos, pico de RSS sobre el inicio en MB) de fn()."""
+    with PeakRSS() as mem:
+        elapsed = fn()
+    return elapsed, mem.delta / 2**20
+
+
+def bench_endpoints(client, df, case: str, repeat: int, only: set | None) -> dict:
+    out = {}
+    rows = len(df)
+    for k, (name, url) in enumerate(endpoints(df).items()):
+        if only and name not in only:
+            continue
+        # dataset nuevo por endpoint: el cold incluye perfil y derivados propios
+        dataset_id = utils.set_df(df, name=case, dataset_id=f"bench-{case}-{k}")
+        cold, peak = measure(lambda: request(client, url, dataset_id))
+        warm = [request(client, url, dataset_id) for _ in range(repeat)]
+        utils._REGISTRY.drop(dataset_id)
+        warm_med = float(np.median(warm)) if warm else None
+        out[name] = {
+            "cold_ms": round(cold * 1e3, 3),
+            "warm_ms": round(warm_med * 1e3, 3) if warm_med is not None else None,
+            "cold_rows_per_s": round(rows / cold) if cold else None,
+            "warm_rows_per_s": round(rows / warm_med) if warm_med else None,
+            "peak_rss_mb": round(peak, 1),
+        }
+        print(f"  {name:28s} cold={out[name]['cold_ms']:10.1f} ms  "
+              f"warm={out[name]['warm_ms'] or 0:9.2f} ms  rss+={peak:7.1f} MB", flush=True)
+    return out
+
+
+def upload(client: Client, path: str) -> float:
+    """POST /api/uploads/ y polling hasta que el trabajo termina; segundos totales."""
+    t0 = time.perf_counter()
+    with open(path, "rb") as f:
+        resp = client.post("/api/uploads/", {"data_file": f})
+    if resp.status_code not in (200, 202):
+        raise RuntimeError(f"upload {path}: HTTP {resp.status_code} {resp.content[:200]!r}")
+    body = resp.json()
+    while body.get("state") not in ("done", "error"):
+        if time.perf_counter() - t0 > UPLOAD_TIMEOUT_S:
+            raise RuntimeError(f"upload {path}: timeout")
+        time.sleep(POLL_EVERY_S)
+        body = client.get(body.get("status_url") or f"/api/uploads/{body['id']}/").json()
+    elapsed = time.perf_counter() - t0
+    if body["state"] == "error":
+        raise RuntimeError(f"upload {path}: {body.get('error')}")
+    utils._REGISTRY.drop(body["dataset"])
+    return elapsed
+
+
+def bench_uploads(client, df, formats, tmp_dir: str) -> dict:
+    out = {}
+    rows = len(df)
+    for fmt in formats:
+        if fmt == "xlsx" and rows > XLSX_MAX_ROWS:
+            print(f"  upload-{fmt:23s} omitido ({rows} filas > límite de XLSX)")
+            continue
+        path = write_dataset(df, os.path.join(tmp_dir, f"bench.{fmt}"), fmt)
+        size = os.path.getsize(path)
+        try:
+            elapsed, peak = measure(lambda: upload(client, path))
+        finally:
+            os.remove(path)
+        out[f"upload-{fmt}"] = {
+            "cold_ms": round(elapsed * 1e3, 3),
+            "cold_rows_per_s": round(rows / elapsed),
+            "mb_per_s": round(size / 2**20 / elapsed, 2),
+            "file_mb": round(size / 2**20, 2),
+            "peak_rss_mb": round(peak, 1),
+        }
+        print(f"  upload-{fmt:21s} cold={elapsed * 1e3:10.1f} ms  "
+              f"{size / 2**20 / elapsed:7.1f} MB/s  rss+={peak:7.1f} MB", flush=True)
+    return out
+
+
+# ---------- comparación ----------
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Líneas de regresión: mediciones más de `threshold` más lentas que el baseline."""
+    regressions = []
+    for case, endpoints_ in current["results"].items():
+        base_case = baseline["results"].get(case)
+        if base_case is None:
+            continue
+        for name, m in endpoints_.items():
+            b = base_case.get(name)
+            if b is None:
+                continue
+            for key in ("cold_ms", "warm_ms"):
+                new, old = m.get(key), b.get(key)
+                if new is None or not old:
+                    continue
+                ratio = new / old
+                flag = ratio > 1 + threshold and new - old > MIN_DELTA_MS
+                print(f"{'REGRESIÓN' if flag else 'ok':9s} {case:40s} {name:28s} {key:8s} "
+                      f"{old:10.1f} → {new:10.1f} ms ({ratio:5.2f}x)")
+                if flag:
+                    regressions.append(f"{case} {name} {key}: {old:.1f} → {new:.1f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def _int_list(raw: str) -> list[int]:
+    return [int(float(x)) for x in raw.split(",") if x]
+
+
+def _str_list(raw: str, allowed) -> list[str]:
+    values = [x for x in raw.split(",") if x]
+    bad = set(values) - set(allowed)
+    if bad:
+        raise argparse.ArgumentTypeError(f"valores no válidos {sorted(bad)}; opciones: {list(allowed)}")
+    return values
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", default="1e3,1e5", help="lista, p. ej. 1e3,1e5,1e7")
+    ap.add_argument("--cols", default="12", help="lista de anchos")
+    ap.add_argument("--mix", default="numeric,mixed", help=f"lista de {MIXES}")
+    ap.add_argument("--nulls", default="0,0.1", help="lista de proporciones de nulos")
+    ap.add_argument("--cardinality", default="medium", help=f"lista de {tuple(CARDINALITIES)}")
+    ap.add_argument("--formats", default=",".join(FORMATS),
+                    help="formatos para el upload (vacío = sin upload)")
+    ap.add_argument("--endpoints", default="", help="sólo estos endpoints (por nombre)")
+    ap.add_argument("--repeat", type=int, default=5, help="requests warm por endpoint")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="JSON donde guardar la corrida")
+    ap.add_argument("--compare", help="baseline JSON contra el que comparar")
+    ap.add_argument("--threshold", type=float, default=0.25,
+                    help="regresión si es más de esta fracción más lento que el baseline")
+    args = ap.parse_args()
+
+    mixes = _str_list(args.mix, MIXES)
+    cards = _str_list(args.cardinality, CARDINALITIES)
+    formats = _str_list(args.formats, FORMATS)
+    only = set(x for x in args.endpoints.split(",") if x) or None
+    nulls = [float(x) for x in args.nulls.split(",") if x]
+
+    client = Client()
+    results = {}
+    # sesiones en cache local: el benchmark no necesita la base de datos
+    with override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cache"), \
+            tempfile.TemporaryDirectory(prefix="bench-api-") as tmp_dir:
+        for rows in _int_list(args.rows):
+            for cols in _int_list(args.cols):
+                for mix in mixes:
+                    for null_ratio in nulls:
+                        for card in cards:
+                            case = f"rows={rows},cols={cols},mix={mix},nulls={null_ratio:g},card={card}"
+                            print(case, flush=True)
+                            df = make_dataset(rows, cols, mix, null_ratio, card, args.seed)
+                            results[case] = bench_endpoints(client, df, case, args.repeat, only)
+                            if not only or any(f"upload-{f}" in only for f in formats):
+                                fmts = [f for f in formats if not only or f"upload-{f}" in only]
+                                results[case].update(bench_uploads(client, df, fmts, tmp_dir))
+                            del df
+
+    run = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"guardado en {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(run, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresiones (> {args.threshold:.0%} más lento):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nsin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: matriz de correlación de muchas columnas (api/correlation.py)
+frente a DataFrame.corr, con y sin NaN.
+
+Uso:
+    python benchmarks/bench_correlation.py --rows 10000 --cols 1000 --repeat 3
+"""
+import argparse, sys, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from api.correlation import correlation_matrix
+
+
+def make_numeric_df(rows: int, cols: int, null_ratio: float, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(rows, 8))
+    X = base @ rng.normal(size=(8, cols)) + rng.normal(size=(rows, cols))
+    if null_ratio:
+        X[rng.random(X.shape) < null_ratio] = np.nan
+    return pd.DataFrame(X, columns=[f"num_{i}" for i in range(cols)])
+
+
+def timed(fn, repeat: int):
+    times, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times)), out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--cols", type=int, default=1_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--skip-pandas", action="store_true",
+                    help="no mide DataFrame.corr (lento con NaN y muchas columnas)")
+    args = ap.parse_args()
+    print(f"rows={args.rows} cols={args.cols}")
+
+    for null_ratio in (0.0, 0.05):
+        df = make_numeric_df(args.rows, args.cols, null_ratio)
+        cols = list(df.columns)
+        for method in ("pearson", "spearman"):
+            t_new, R = timed(lambda: correlation_matrix(df, cols, method), args.repeat)
+            line = f"nulls={null_ratio:4.2f} {method:8s}  engine={t_new * 1e3:9.1f} ms"
+            if not args.skip_pandas:
+                t_pd, ref = timed(lambda: df.corr(method), 1)
+                err = float(np.nanmax(np.abs(R - ref.to_numpy())))
+                line += f"  pandas={t_pd * 1e3:9.1f} ms  speedup={t_pd / t_new:6.1f}x  max_err={err:.1e}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
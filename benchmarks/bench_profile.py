@@ -0,0 +1,73 @@
+"""
+Benchmark: escalado del perfilado en frío (build_profile) de 1 a N workers,
+con pool de hilos y con procesos (fork) para columnas object.
+
+Uso:
+    python benchmarks/bench_profile.py --rows 20000 --cols 500 --repeat 3
+"""
+import argparse, os, sys, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+
+import django
+django.setup()
+
+from api.profiling import build_profile
+
+
+def make_wide_df(rows: int, cols: int, object_ratio: float, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_obj = int(cols * object_ratio)
+    data = {}
+    for i in range(cols - n_obj):
+        col = rng.normal(size=rows)
+        col[rng.random(rows) < 0.05] = np.nan
+        data[f"num_{i}"] = col
+    words = np.array([f"w{k}" for k in range(200)], dtype=object)
+    for i in range(n_obj):
+        data[f"obj_{i}"] = words[rng.integers(0, len(words), size=rows)]
+    return pd.DataFrame(data)
+
+
+def worker_counts(max_workers: int) -> list[int]:
+    out, w = [], 1
+    while w < max_workers:
+        out.append(w)
+        w *= 2
+    return out + [max_workers]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--cols", type=int, default=500)
+    ap.add_argument("--object-ratio", type=float, default=0.3)
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    df = make_wide_df(args.rows, args.cols, args.object_ratio)
+    print(f"rows={args.rows} cols={args.cols} object_ratio={args.object_ratio}")
+
+    for executor in ("thread", "process"):
+        base = None
+        for workers in worker_counts(args.max_workers):
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                build_profile(df, workers=workers, executor=executor)
+                times.append(time.perf_counter() - t0)
+            med = float(np.median(times))
+            base = base or med
+            print(f"{executor:8s} workers={workers:3d}  median={med * 1e3:9.1f} ms  "
+                  f"speedup={base / med:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: latencia por request de get_df() con el almacén en memoria
+frente al round-trip JSON anterior (to_json + read_json por cada llamada).
+
+Uso:
+    python benchmarks/bench_store.py --rows 200000 --cols 12 --repeat 7
+"""
+import argparse, os, sys, time
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+
+import django
+django.setup()
+
+from api import utils
+
+
+def make_df(rows: int, cols: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(cols):
+        if i % 4 == 3:
+            data[f"cat_{i}"] = rng.choice(["a", "b", "c", "d"], size=rows)
+        else:
+            data[f"num_{i}"] = rng.normal(size=rows)
+    return pd.DataFrame(data)
+
+
+def timeit(fn, repeat: int) -> list[float]:
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--cols", type=int, default=12)
+    ap.add_argument("--repeat", type=int, default=7)
+    args = ap.parse_args()
+
+    df = make_df(args.rows, args.cols)
+
+    # Antes: set_df serializaba a JSON y cada get_df() lo volvía a parsear
+    payload = df.to_json(orient="split")
+    json_times = timeit(lambda: pd.read_json(StringIO(payload), orient="split"), args.repeat)
+
+    # Ahora: el DataFrame vive en memoria y get_df() devuelve una vista
+    dataset_id = utils.set_df(df, name="bench")
+    store_times = timeit(lambda: utils.get_df(dataset_id), args.repeat)
+
+    def fmt(ts):
+        return f"median={np.median(ts) * 1e3:9.3f} ms  min={min(ts) * 1e3:9.3f} ms"
+
+    print(f"rows={args.rows} cols={args.cols} repeat={args.repeat}")
+    print(f"json round-trip : {fmt(json_times)}")
+    print(f"in-memory store : {fmt(store_times)}")
+    print(f"speedup         : {np.median(json_times) / max(np.median(store_times), 1e-9):,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Generador de datasets sintéticos para los benchmarks: filas, ancho, mezcla
+de dtypes, proporción de nulos y cardinalidad configurables, escritos en
+CSV, Parquet, XLSX o JSON (lines). Misma semilla → mismo archivo.
+
+Uso:
+    python benchmarks/datagen.py --rows 1e6 --cols 20 --mix mixed --nulls 0.05 \
+        --cardinality high --format parquet --out /tmp/bench.parquet
+"""
+import argparse, os, sys
+
+import numpy as np
+import pandas as pd
+
+MIXES = ("numeric", "mixed", "text")
+CARDINALITIES = {"low": 10, "medium": 1_000, "high": None}   # None = ~rows / 2
+FORMATS = ("csv", "parquet", "xlsx", "json")
+XLSX_MAX_ROWS = 1_048_575    # límite de filas de una hoja (sin el encabezado)
+
+# tipo de cada columna, ciclando según la mezcla
+_KINDS = {
+    "numeric": ("float", "int", "float", "int"),
+    "mixed": ("float", "int", "category", "text", "bool", "datetime"),
+    "text": ("category", "text", "text", "float"),
+}
+
+
+def _column(kind: str, rows: int, distinct: int, rng) -> np.ndarray | pd.Series:
+    if kind == "float":
+        return rng.normal(loc=rng.uniform(-100, 100), scale=rng.uniform(1, 50), size=rows)
+    if kind == "int":
+        # colas largas para que boxplot/outliers tengan algo que mostrar
+        return rng.zipf(2.0, size=rows).clip(max=1_000_000)
+    if kind == "bool":
+        return rng.choice(np.array(["yes", "no"], dtype=object), size=rows)
+    if kind == "datetime":
+        start = np.datetime64("2020-01-01")
+        return start + rng.integers(0, 5 * 365 * 86_400, size=rows).astype("timedelta64[s]")
+    words = np.array([f"{kind[:3]}_{i:x}" for i in range(distinct)], dtype=object)
+    if kind == "category":
+        return words[rng.integers(0, distinct, size=rows)]
+    # text: frecuencias sesgadas (pocos valores muy repetidos, muchos raros)
+    idx = (rng.pareto(1.2, size=rows) * distinct / 20).astype(np.int64) % distinct
+    return words[idx]
+
+
+def make_dataset(rows: int, cols: int = 12, mix: str = "mixed", nulls: float = 0.0,
+                 cardinality: str = "medium", seed: int = 0) -> pd.DataFrame:
+    """DataFrame sintético reproducible con `rows` x `cols` columnas."""
+    if mix not in MIXES:
+        raise ValueError(f"mix debe ser uno de {MIXES}")
+    rng = np.random.default_rng(seed)
+    distinct = CARDINALITIES[cardinality] or max(rows // 2, 1)
+    distinct = max(min(distinct, rows), 1)
+    kinds = _KINDS[mix]
+    data = {}
+    for i in range(cols):
+        kind = kinds[i % len(kinds)]
+        col = pd.Series(_column(kind, rows, distinct, rng))
+        if nulls:
+            col = col.mask(rng.random(rows) < nulls)
+        data[f"{kind}_{i}"] = col
+    return pd.DataFrame(data)
+
+
+def write_dataset(df: pd.DataFrame, path: str, fmt: str | None = None) -> str:
+    """Escribe df en `path` con el formato de su extensión (o `fmt`)."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    elif fmt == "xlsx":
+        if len(df) > XLSX_MAX_ROWS:
+            raise ValueError(f"XLSX admite hasta {XLSX_MAX_ROWS} filas")
+        df.to_excel(path, index=False)
+    elif fmt == "json":
+        df.to_json(path, orient="records", lines=True, date_format="iso")
+    else:
+        raise ValueError(f"formato debe ser uno de {FORMATS}")
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=float, default=100_000)
+    ap.add_argument("--cols", type=int, default=12)
+    ap.add_argument("--mix", choices=MIXES, default="mixed")
+    ap.add_argument("--nulls", type=float, default=0.0)
+    ap.add_argument("--cardinality", choices=tuple(CARDINALITIES), default="medium")
+    ap.add_argument("--format", choices=FORMATS, default="csv")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+
+    df = make_dataset(int(args.rows), args.cols, args.mix, args.nulls, args.cardinality, args.seed)
+    write_dataset(df, args.out, args.format)
+    print(f"{args.out}: {len(df)} filas x {df.shape[1]} columnas, "
+          f"{os.path.getsize(args.out) / 2**20:.1f} MB", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
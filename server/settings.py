@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-import os
+import importlib.util, os, tempfile
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # ← importantísimo para servir estáticos
     "corsheaders.middleware.CorsMiddleware",
@@ -143,4 +144,101 @@ CORS_ALLOWED_ORIGINS = [
 
 # Datos: en producción cambiaremos la variable de entorno
 # Para desarrollo, como respaldo:
-os.environ.setdefault("DATASET_PATH", "./data/diabetes.csv")
\ No newline at end of file
+os.environ.setdefault("DATASET_PATH", "./data/diabetes.csv")
+
+# Registro de datasets subidos (api/store.py): presupuesto total de memoria
+# residente y carpeta opcional para desalojar a Parquet (vacío = sin spill).
+DATASET_MEMORY_BUDGET_MB = int(os.getenv("DATASET_MEMORY_BUDGET_MB", "1024"))
+DATASET_SPILL_DIR = os.getenv("DATASET_SPILL_DIR", "")
+
+# Perfilado por columnas (api/profiling.py): número de workers (0 = todos los
+# núcleos, 1 = secuencial) y tipo de pool ("thread" o "process").
+PROFILE_WORKERS = int(os.getenv("PROFILE_WORKERS", "0"))
+PROFILE_EXECUTOR = os.getenv("PROFILE_EXECUTOR", "thread")
+
+# Estadísticas aproximadas con sketches (HLL/KLL/top-k) por defecto; cada
+# request puede forzarlo con ?approx=1 o desactivarlo con ?approx=0.
+APPROX_STATS = os.getenv("APPROX_STATS", "False").lower() == "true"
+
+# Muestreo (api/sampling.py): datasets con más filas que esto se sirven por
+# defecto desde una muestra cacheada; ?sample=0 pide el resultado exacto.
+SAMPLE_DEFAULT_ROWS = int(os.getenv("SAMPLE_DEFAULT_ROWS", "200000"))
+
+# Cache de respuestas de /api/* (api/httpcache.py): ETag por versión del
+# dataset + query; las respuestas renderizadas se guardan en memoria (LRU).
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "300"))   # 0 = sin cache en memoria
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", "64"))
+
+# Cache columnar de DATASET_PATH (api/columnar.py): el CSV se parsea una vez y
+# se guarda como Arrow IPC; los workers lo abren con memory-map.
+COLUMNAR_CACHE = os.getenv("COLUMNAR_CACHE", "True").lower() == "true"
+COLUMNAR_CACHE_DIR = os.getenv("COLUMNAR_CACHE_DIR",
+                               os.path.join(tempfile.gettempdir(), "dataset-columnar"))
+
+# Store compartido entre workers (api/shared.py): los uploads se guardan una
+# vez como Arrow en memoria compartida y cada proceso los mapea.
+SHARED_STORE = os.getenv("SHARED_STORE", "True").lower() == "true"
+SHARED_STORE_DIR = os.getenv(
+    "SHARED_STORE_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "dataset-store"))
+SHARED_STORE_MAX_MB = int(os.getenv("SHARED_STORE_MAX_MB", "2048"))
+
+# Cache persistente de uploads ya parseados (api/parsedcache.py): Parquet por
+# hash del contenido, LRU acotada a PARSED_CACHE_MAX_MB. Un archivo que se
+# vuelve a subir se activa sin parsear, también después de reiniciar.
+PARSED_CACHE = os.getenv("PARSED_CACHE", "True").lower() == "true"
+PARSED_CACHE_DIR = os.getenv("PARSED_CACHE_DIR",
+                             os.path.join(tempfile.gettempdir(), "parsed-uploads"))
+PARSED_CACHE_MAX_MB = int(os.getenv("PARSED_CACHE_MAX_MB", "4096"))
+
+# Ingesta de uploads en segundo plano: hilos por worker, estado de los
+# trabajos en UPLOAD_JOBS_DIR (compartido entre workers) y copia temporal del
+# archivo en UPLOAD_TMP_DIR mientras se parsea.
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+UPLOAD_JOBS_DIR = os.getenv("UPLOAD_JOBS_DIR", os.path.join(tempfile.gettempdir(), "upload-jobs"))
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+
+# Los uploads van directo a disco (nunca enteros en memoria) y se hashean al
+# vuelo; mismo directorio que UPLOAD_TMP_DIR para poder enlazar sin copiar.
+FILE_UPLOAD_HANDLERS = ["api.uploadhandlers.HashingTemporaryFileUploadHandler"]
+FILE_UPLOAD_TEMP_DIR = UPLOAD_TMP_DIR
+
+# Compactación de dtypes al cargar (api/compaction.py): downcast numérico,
+# texto sí/no → bool, baja cardinalidad → category y el resto → strings Arrow.
+DTYPE_COMPACTION = os.getenv("DTYPE_COMPACTION", "True").lower() == "true"
+
+# DATASET_PATH como log append-only (api/incremental.py): al crecer el archivo
+# se parsea sólo la cola nueva y se actualizan sketches y duplicados. Si el
+# archivo cambia de otra forma, se recarga entero como siempre. Activo, los
+# endpoints usan el perfil aproximado salvo ?approx=0.
+DATASET_INCREMENTAL = os.getenv("DATASET_INCREMENTAL", "False").lower() == "true"
+
+# Métricas de /api/* (api/metrics.py, expuestas en /api/metrics/). Con
+# METRICS_PROFILE, ?_profile=1 (o X-Profile: 1) corre el request bajo cProfile
+# y deja el .prof en METRICS_PROFILE_DIR; METRICS_PROFILE_SAMPLE perfila
+# además una fracción de requests al azar (0 = ninguno).
+METRICS_PROFILE = os.getenv("METRICS_PROFILE", "False").lower() == "true"
+METRICS_PROFILE_SAMPLE = float(os.getenv("METRICS_PROFILE_SAMPLE", "0"))
+METRICS_PROFILE_DIR = os.getenv("METRICS_PROFILE_DIR",
+                                os.path.join(tempfile.gettempdir(), "api-profiles"))
+# Con varios workers, directorio donde cada proceso vuelca sus métricas para
+# que /api/metrics/ las sume (vacío = sólo las del worker que responde). Los
+# archivos de corridas anteriores se borran al arrancar la app.
+# METRICS_FLUSH_S: cada cuánto se vuelca.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_S = float(os.getenv("METRICS_FLUSH_S", "1"))
+
+# Consultas ?where= / ?columns= (api/query.py): resultados filtrados que se
+# guardan por versión del dataset, por predicado normalizado (LRU).
+QUERY_CACHE_ENTRIES = int(os.getenv("QUERY_CACHE_ENTRIES", "16"))
+
+# Renderers (api/renderers.py): JSON con numpy vectorizado y NaN → null, y
+# por Accept (o ?format=) Arrow IPC o MessagePack (sólo con msgpack instalado).
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.NumpyJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "api.renderers.ArrowIPCRenderer",
+    ] + (["api.renderers.MessagePackRenderer"] if importlib.util.find_spec("msgpack") else []),
+}
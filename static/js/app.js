@@ -17,8 +17,7 @@ function showErr(msg){
 }
 
 // KPIs & Dataset pill
-async function loadSummary(){
-    const s = await j(`${API_BASE}/summary/`);
+function loadSummary(s){
     $('#kpi-rows').textContent = fmt(s.rows);
     $('#kpi-cols').textContent = fmt(s.cols);
     $('#kpi-null').textContent = `${s.null_pct}%`;
@@ -41,22 +40,18 @@ function makeBar(ctx, labels, data, label){
     });
 }
 
-async function drawNulls(){
-    const data = await j(`${API_BASE}/nulls-per-column/`);
+function drawNulls(data){
     const top = data.slice(0, 30);
     makeBar($('#nulls'), top.map(d=>d.column), top.map(d=>d.nulls), 'Nulos');
 }
-async function drawCardinality(){
-    const data = await j(`${API_BASE}/cardinality/`);
+function drawCardinality(data){
     const top = data.slice(0, 30);
     makeBar($('#card'), top.map(d=>d.column), top.map(d=>d.unique), 'Cardinalidad');
 }
-async function drawTypes(){
-    const data = await j(`${API_BASE}/types/`);
+function drawTypes(data){
     makeBar($('#types'), data.map(d=>d.dtype), data.map(d=>d.columns), 'Columnas por tipo');
 }
-async function drawOutliers(){
-    const data = await j(`${API_BASE}/outliers/`);
+function drawOutliers(data){
     const top = data.slice(0, 30);
     makeBar($('#outliers'), top.map(d=>d.column), top.map(d=>d.outliers), 'Outliers');
 }
@@ -69,18 +64,18 @@ function yOpts(maxVal){
     return { beginAtZero: true, suggestedMax: m, ticks: { precision: 0 } };
 }
 
-async function setupDistribution(){
+// `card` y `first` vienen de /overview/: la distribución inicial no necesita otro request
+async function setupDistribution(card, first){
     const sel = $('#colSel');
-    const card = await j(`${API_BASE}/cardinality/`);
     card.forEach(it=>{
     const opt = document.createElement('option');
     opt.value = it.column; opt.textContent = it.column;
     sel.appendChild(opt);
     });
 
-    async function render(){
+    async function render(initial){
     const col = sel.value;
-    const data = await j(`${API_BASE}/distribution/?column=${encodeURIComponent(col)}&bins=20&top=50`);
+    const data = initial || await j(`${API_BASE}/distribution/?column=${encodeURIComponent(col)}&bins=20&top=50`);
     const canvas = $('#dist');
     const ctx = canvas.getContext('2d');
     Chart.getChart(canvas)?.destroy(); distChart?.destroy();
@@ -117,7 +112,8 @@ async function setupDistribution(){
     }
     }
     sel.addEventListener('change', ()=>render());
-    sel.selectedIndex = 0; await render();
+    sel.selectedIndex = 0;
+    await render(first && first.column === sel.value && !first.error ? first : null);
 }
 
 // Correlación (canvas manual para rendimiento)
@@ -151,12 +147,30 @@ async function setupDistribution(){
     ctx.fillText('+1', barX+barW+6, barY+8); ctx.fillText('0', barX+barW+6, barY+barH/2); ctx.fillText('-1', barX+barW+6, barY+barH-6);
 } */
 
+// Upload en segundo plano: polling del trabajo hasta que el dataset queda activo
+async function waitForUpload(){
+    const job = document.body.dataset.uploadJob;
+    if(!job) return;
+    const box = $('#upload-status');
+    while(true){
+    const s = await j(`${API_BASE}/uploads/${job}/`);
+    if(s.state === 'done'){ location.assign(location.pathname); return; }
+    if(s.state === 'error'){ if(box) box.textContent = ''; showErr(`Error al procesar ${s.name}: ${s.error}`); return; }
+    if(box) box.textContent = `· ${s.name}: ${s.state === 'profiling' ? 'perfilando' : 'leyendo'} ${Math.round(100*s.progress)}%` + (s.rows ? ` (${fmt(s.rows)} filas)` : '');
+    await new Promise(r=>setTimeout(r, 700));
+    }
+}
+
 // Boot
 (async function(){
+    waitForUpload().catch(e=>console.error(e));
     try{
-    await loadSummary();
-    await Promise.all([drawNulls(), drawCardinality(), drawTypes(), drawOutliers()]);
-    await setupDistribution();
+    // un solo request con todos los paneles (mismo snapshot del dataset)
+    const { panels } = await j(`${API_BASE}/overview/?panels=summary,nulls,cardinality,types,outliers,distribution&bins=20&top=50`);
+    loadSummary(panels.summary);
+    drawNulls(panels.nulls); drawCardinality(panels.cardinality);
+    drawTypes(panels.types); drawOutliers(panels.outliers);
+    await setupDistribution(panels.cardinality, panels.distribution);
     // await drawCorrelation();
     }catch(e){
     console.error(e);
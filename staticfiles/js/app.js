@@ -17,8 +17,7 @@ function showErr(msg){
 }
 
 // KPIs & Dataset pill
-async function loadSummary(){
-    const s = await j(`${API_BASE}/summary/`);
+function loadSummary(s){
     $('#kpi-rows').textContent = fmt(s.rows);
     $('#kpi-cols').textContent = fmt(s.cols);
     $('#kpi-null').textContent = `${s.null_pct}%`;
@@ -41,22 +40,18 @@ function makeBar(ctx, labels, data, label){
     });
 }
 
-async function drawNulls(){
-    const data = await j(`${API_BASE}/nulls-per-column/`);
+function drawNulls(data){
     const top = data.slice(0, 30);
     makeBar($('#nulls'), top.map(d=>d.column), top.map(d=>d.nulls), 'Nulos');
 }
-async function drawCardinality(){
-    const data = await j(`${API_BASE}/cardinality/`);
+function drawCardinality(data){
     const top = data.slice(0, 30);
     makeBar($('#card'), top.map(d=>d.column), top.map(d=>d.unique), 'Cardinalidad');
 }
-async function drawTypes(){
-    const data = await j(`${API_BASE}/types/`);
+function drawTypes(data){
     makeBar($('#types'), data.map(d=>d.dtype), data.map(d=>d.columns), 'Columnas por tipo');
 }
-async function drawOutliers(){
-    const data = await j(`${API_BASE}/outliers/`);
+function drawOutliers(data){
     const top = data.slice(0, 30);
     makeBar($('#outliers'), top.map(d=>d.column), top.map(d=>d.outliers), 'Outliers');
 }
@@ -69,18 +64,18 @@ function yOpts(maxVal){
     return { beginAtZero: true, suggestedMax: m, ticks: { precision: 0 } };
 }
 
-async function setupDistribution(){
+// `card` y `first` vienen de /overview/: la distribución inicial no necesita otro request
+async function setupDistribution(card, first){
     const sel = $('#colSel');
-    const card = await j(`${API_BASE}/cardinality/`);
     card.forEach(it=>{
     const opt = document.createElement('option');
     opt.value = it.column; opt.textContent = it.column;
     sel.appendChild(opt);
     });
 
-    async function render(){
+    async function render(initial){
     const col = sel.value;
-    const data = await j(`${API_BASE}/distribution/?column=${encodeURIComponent(col)}&bins=20&top=50`);
+    const data = initial || await j(`${API_BASE}/distribution/?column=${encodeURIComponent(col)}&bins=20&top=50`);
     const canvas = $('#dist');
     const ctx = canvas.getContext('2d');
     Chart.getChart(canvas)?.destroy(); distChart?.destroy();
@@ -117,15 +112,35 @@ async function setupDistribution(){
     }
     }
     sel.addEventListener('change', ()=>render());
-    sel.selectedIndex = 0; await render();
+    sel.selectedIndex = 0;
+    await render(first && first.column === sel.value && !first.error ? first : null);
 }
+// Upload en segundo plano: polling del trabajo hasta que el dataset queda activo
+async function waitForUpload(){
+    const job = document.body.dataset.uploadJob;
+    if(!job) return;
+    const box = $('#upload-status');
+    while(true){
+    const s = await j(`${API_BASE}/uploads/${job}/`);
+    if(s.state === 'done'){ location.assign(location.pathname); return; }
+    if(s.state === 'error'){ if(box) box.textContent = ''; showErr(`Error al procesar ${s.name}: ${s.error}`); return; }
+    if(box) box.textContent = `· ${s.name}: ${s.state === 'profiling' ? 'perfilando' : 'leyendo'} ${Math.round(100*s.progress)}%` + (s.rows ? ` (${fmt(s.rows)} filas)` : '');
+    await new Promise(r=>setTimeout(r, 700));
+    }
+}
+
 // Boot
 (async function(){
+    waitForUpload().catch(e=>console.error(e));
     try{
-    await loadSummary();
-    await Promise.all([drawNulls(), drawCardinality(), drawTypes(), drawOutliers()]);
-    await setupDistribution();
-    await renderDescribeTable(); 
+    // un solo request con todos los paneles (mismo snapshot del dataset)
+    const { panels } = await j(`${API_BASE}/overview/?panels=summary,nulls,cardinality,types,outliers,distribution,numeric_columns,describe&bins=20&top=50`);
+    loadSummary(panels.summary);
+    drawNulls(panels.nulls); drawCardinality(panels.cardinality);
+    drawTypes(panels.types); drawOutliers(panels.outliers);
+    renderDescribeTable(panels.describe);
+    initBoxplot(panels.numeric_columns);
+    await setupDistribution(panels.cardinality, panels.distribution);
     }catch(e){
     console.error(e);
     showErr('No se pudo cargar la API. Verifica que el servidor esté activo y que DATASET_PATH apunte a un CSV válido.');
@@ -140,14 +155,13 @@ async function fetchJSON(url) {
 
 let boxChart = null;
 
-async function initBoxplot() {
+async function initBoxplot(meta) {
   const sel = document.getElementById('boxColSel');
   const canvas = document.getElementById('boxplot');
   if (!sel || !canvas) return;
 
   try {
-    // 1) Cargar columnas numéricas
-    const meta = await fetchJSON('/api/numeric-columns');
+    // 1) Columnas numéricas (vienen de /overview/)
     const cols = meta.columns || [];
     sel.innerHTML = '';
     cols.forEach(c => {
@@ -308,12 +322,6 @@ async function drawBoxplot(column, canvas) {
   }
 }
 
-// Llama a initBoxplot() junto con tus otras inicializaciones
-window.addEventListener('load', () => {
-  // ... tus inits existentes ...
-  initBoxplot();
-});
-
 
 // ======= Describe numérico =======
 function fmtNum(x){
@@ -322,9 +330,8 @@ function fmtNum(x){
   return x.toLocaleString(undefined, { maximumFractionDigits: 6 });
 }
 
-async function renderDescribeTable(){
+function renderDescribeTable(data){
   try{
-    const data = await j('/api/describe/');
     const cols = ['column', ...(data.columns || [])];
     const table = document.getElementById('descTable');
     if (!table) return;
@@ -365,8 +372,4 @@ async function renderDescribeTable(){
     showErr('No se pudo cargar la tabla de estadísticos.');
   }
 }
-// Mantén este listener (inicia el boxplot al cargar)
-window.addEventListener('load', () => {
-  initBoxplot();
-});
 